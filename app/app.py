@@ -1,14 +1,51 @@
 """FastAPI application factory and router configuration."""
 
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 
-from app.middleware import RequestLoggingMiddleware
-from app.routers import audit, encounters, health
+from app.config import get_settings, watch_config
+from app.db import get_db
+from app.exports import get_export_manager
+from app.logging_pipeline import start_logging, stop_logging
+from app.middleware import MetricsMiddleware, RequestLoggingMiddleware
+from app.routers import audit, encounters, exports, health, metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    start_logging(
+        level=settings.log_level,
+        queue_size=settings.log_queue_size,
+        policy=settings.log_overflow_policy,
+        sample_rate=settings.log_sample_rate,
+    )
+    await get_db().start()
+    watcher = None
+    if settings.config_reload_interval_seconds > 0:
+        watcher = asyncio.create_task(
+            watch_config(settings.config_reload_interval_seconds)
+        )
+    yield
+    if watcher is not None:
+        watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await watcher
+    await get_export_manager().close()
+    await get_db().close()
+    stop_logging()
+
 
-app = FastAPI(title="Patient Encounter API")
+app = FastAPI(title="Patient Encounter API", lifespan=lifespan)
 
 app.add_middleware(RequestLoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(health.router)
 app.include_router(encounters.router)
 app.include_router(audit.router)
+app.include_router(exports.router)
+app.include_router(metrics.router)
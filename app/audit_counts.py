@@ -0,0 +1,116 @@
+"""Incrementally maintained audit log access counts.
+
+Every audit write adds to hourly counters along three dimensions: all
+access, per user and per encounter. Aggregation queries read only the
+counters for the requested hours, never the raw log.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from typing import Any, Literal
+
+HOUR_MICROS = 3_600_000_000
+
+# Counter dimensions; "all" has a single empty key
+Dimension = Literal["all", "user", "encounter"]
+DIMENSIONS: tuple[Dimension, ...] = ("all", "user", "encounter")
+
+
+def bucket_rows(totals: Counter[tuple[int, str]]) -> list[tuple[int, str, int]]:
+    """Return ``AuditCounters.totals`` output as sorted (bucket, key, count)."""
+    return [(bucket, value, count) for (bucket, value), count in sorted(totals.items())]
+
+
+class AuditCounters:
+    """Hourly access counts per dimension and key.
+
+    Only ``dimensions`` are counted; querying any other raises ``KeyError``.
+    """
+
+    def __init__(self, dimensions: Iterable[Dimension] = DIMENSIONS) -> None:
+        self._hours: list[int] = []
+        self._counts: dict[str, defaultdict[int, Counter[str]]] = {
+            dimension: defaultdict(Counter) for dimension in dimensions
+        }
+
+    def add(self, encounter_ids: list[str], user_id: str, timestamp: int) -> None:
+        """Count one access per encounter id at ``timestamp``."""
+        if not encounter_ids:
+            return
+        hour = timestamp // HOUR_MICROS
+        if not self._hours or hour > self._hours[-1]:
+            self._hours.append(hour)
+        else:
+            i = bisect_left(self._hours, hour)
+            if i == len(self._hours) or self._hours[i] != hour:
+                insort(self._hours, hour)
+
+        counts = self._counts
+        if "encounter" in counts:
+            counts["encounter"][hour].update(encounter_ids)
+        if "all" in counts:
+            counts["all"][hour][""] += len(encounter_ids)
+        if "user" in counts:
+            counts["user"][hour][user_id] += len(encounter_ids)
+
+    def query(
+        self,
+        dimension: Dimension,
+        key: str | None,
+        lo_hour: int | None,
+        hi_hour: int | None,
+        bucket_hours: int,
+    ) -> list[tuple[int, str, int]]:
+        """Return (bucket start hour, key, count) rows in bucket, key order.
+
+        Hours from ``lo_hour`` to ``hi_hour`` inclusive are summed into
+        buckets of ``bucket_hours`` aligned to the epoch. With ``key`` only
+        that key is counted.
+        """
+        return bucket_rows(self.totals(dimension, key, lo_hour, hi_hour, bucket_hours))
+
+    def totals(
+        self,
+        dimension: Dimension,
+        key: str | None,
+        lo_hour: int | None,
+        hi_hour: int | None,
+        bucket_hours: int,
+    ) -> Counter[tuple[int, str]]:
+        """Return the counts of ``query`` keyed by (bucket start hour, key)."""
+        start = 0 if lo_hour is None else bisect_left(self._hours, lo_hour)
+        stop = (
+            len(self._hours) if hi_hour is None else bisect_right(self._hours, hi_hour)
+        )
+        counts = self._counts[dimension]
+        totals: Counter[tuple[int, str]] = Counter()
+        for hour in self._hours[start:stop]:
+            bucket = hour - hour % bucket_hours
+            by_key = counts[hour]
+            if key is not None:
+                if key in by_key:
+                    totals[bucket, key] += by_key[key]
+                continue
+            for value, count in by_key.items():
+                totals[bucket, value] += count
+        return totals
+
+    def state(self) -> dict[str, Any]:
+        """Return a copy of the counters for a snapshot."""
+        return {
+            dimension: {hour: dict(by_key) for hour, by_key in counts.items()}
+            for dimension, counts in self._counts.items()
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "AuditCounters":
+        """Restore ``state()`` output, counting the dimensions it holds."""
+        counters = cls(state)
+        hours = set()
+        for dimension, counts in state.items():
+            for hour, by_key in counts.items():
+                counters._counts[dimension][hour] = Counter(by_key)
+            hours.update(counts)
+        counters._hours = sorted(hours)
+        return counters
@@ -0,0 +1,721 @@
+"""Time-partitioned audit log storage with sealed segments on disk.
+
+Audit rows are numbered globally in append order and grouped into
+segments by time bucket (daily by default). The newest segment is an
+in-memory ``AuditLogStore``; when a row arrives for a later bucket it is
+sealed and written to ``audit-<first row>.seg`` in the segment directory:
+
+    <magic><u32 header length><pickled header><8-byte aligned sections>
+
+The header holds the row range, time range and the offset of each
+section. Sections are raw arrays in native byte order, read in place
+through ``mmap``:
+
+- the row columns, sorted by (timestamp, row): audit ids, timestamps,
+  local row numbers and encounter and user codes
+- per id dimension, the sorted ids (a utf-8 blob and offsets into it),
+  so a code is the id's rank, and a posting list of column positions
+  per code, again in time order
+- per encounter code, its hourly access counts as (hour, count) runs
+
+Queries find ids by bisecting the dictionary and time bounds by
+bisecting the timestamp column or a posting list, then read only the
+rows they return. Nothing is decompressed or re-indexed on read.
+
+Files are deliberately not compressed: a compressed segment has to be
+inflated and re-indexed whole before any row can be read, which costs
+seconds per million rows on every cold query, while a mapped file only
+pages in what a query touches. Audit ids are random and dominate the row
+size, so compression would save little anyway.
+
+Per-encounter access counts are kept with the segments too: segments in
+memory count as rows are appended and sealed files hold the counts of
+their rows, so only the active window's counters stay in memory.
+"""
+
+import asyncio
+import heapq
+import logging
+import mmap
+import os
+import pickle
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from itertools import accumulate, groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, BinaryIO
+from uuid import UUID
+
+from app.audit_counts import HOUR_MICROS, AuditCounters, bucket_rows
+from app.audit_store import AuditLogStore
+from app.indexes import from_micros
+from app.models import AuditLogEntry
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"AUDSEG2\0"
+_HEADER_LENGTH = struct.Struct("<I")
+_ALIGN = 8
+
+# Sealed segment files kept mapped for repeated queries
+OPEN_SEGMENTS = 16
+
+# (timestamp, global row) position of an audit row in list order
+AuditKey = tuple[int, int]
+
+
+def _segment_name(base: int) -> str:
+    return f"audit-{base:012d}.seg"
+
+
+def _padding(offset: int) -> int:
+    return -offset % _ALIGN
+
+
+def _encounter_counters() -> AuditCounters:
+    return AuditCounters(("encounter",))
+
+
+def _count_encounters(columns: dict[str, Any]) -> AuditCounters:
+    """Return the per-encounter hourly counts of ``columns()`` output."""
+    encounters = columns["encounters"]
+    hours = (timestamp // HOUR_MICROS for timestamp in columns["timestamps"])
+    by_hour: defaultdict[int, dict[str, int]] = defaultdict(dict)
+    for (hour, code), count in Counter(zip(hours, columns["encounter_col"])).items():
+        by_hour[hour][encounters[code]] = count
+    return AuditCounters.from_state({"encounter": by_hour})
+
+
+@dataclass
+class _MemorySegment:
+    """Rows ``base``.. held in an in-memory store, with their counts."""
+
+    base: int
+    store: AuditLogStore
+    bucket: int | None = None
+    counts: AuditCounters = field(default_factory=_encounter_counters)
+
+    @property
+    def end(self) -> int:
+        return self.base + len(self.store)
+
+
+@dataclass(frozen=True)
+class _DiskSegment:
+    """A sealed segment file; only its ranges are kept in memory."""
+
+    path: Path
+    base: int
+    count: int
+    min_ts: int
+    max_ts: int
+
+    @property
+    def end(self) -> int:
+        return self.base + self.count
+
+
+# Sections of one id dimension, after its "encounter_" or "user_" prefix
+_DICTIONARY_PARTS = ("names", "name_offsets", "postings", "posting_offsets")
+
+
+class _IdDictionary:
+    """Sorted ids of one dimension of a segment file, with posting lists."""
+
+    def __init__(
+        self,
+        names: memoryview,
+        name_offsets: memoryview,
+        postings: memoryview,
+        posting_offsets: memoryview,
+    ) -> None:
+        self._names = names
+        self._name_offsets = name_offsets
+        self._postings = postings
+        self._posting_offsets = posting_offsets
+
+    def __len__(self) -> int:
+        return len(self._name_offsets) - 1
+
+    def value(self, code: int) -> str:
+        offsets = self._name_offsets
+        return str(self._names[offsets[code] : offsets[code + 1]], "utf-8")
+
+    def code(self, value: str) -> int | None:
+        """Return the code of ``value``, or None if the segment lacks it."""
+        encoded = value.encode()
+        offsets, names = self._name_offsets, self._names
+        code = bisect_left(
+            range(len(self)),
+            encoded,
+            key=lambda i: names[offsets[i] : offsets[i + 1]].tobytes(),
+        )
+        if code < len(self) and self.value(code) == value:
+            return code
+        return None
+
+    def postings(self, code: int) -> memoryview:
+        """Return the time-ordered column positions of rows with ``code``."""
+        offsets = self._posting_offsets
+        return self._postings[offsets[code] : offsets[code + 1]]
+
+
+class _SegmentReader:
+    """Read-only view of a segment file, mapped into memory."""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            header, data_start = _read_header(f)
+            # The mapping outlives the file object and is unmapped with
+            # the last view of it
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        def section(name: str) -> memoryview:
+            offset, length, typecode = header["sections"][name]
+            start = data_start + offset
+            return view[start : start + length].cast(typecode)
+
+        self.base: int = header["base"]
+        self._audit_ids = section("audit_ids")
+        self._timestamps = section("timestamps")
+        self._rows = section("rows")
+        self._encounter_col = section("encounter_col")
+        self._user_col = section("user_col")
+        self._encounters = _IdDictionary(
+            *(section(f"encounter_{part}") for part in _DICTIONARY_PARTS)
+        )
+        self._users = _IdDictionary(
+            *(section(f"user_{part}") for part in _DICTIONARY_PARTS)
+        )
+        self._hours = section("encounter_hours")
+        self._hour_counts = section("encounter_hour_counts")
+        self._hour_offsets = section("encounter_hour_offsets")
+
+    def scan(
+        self,
+        encounter_id: str | None = None,
+        user_id: str | None = None,
+        lo: int | None = None,
+        hi: int | None = None,
+        after: tuple[int, int] | None = None,
+    ) -> Iterator[int]:
+        """Yield matching column positions in (timestamp, row) order.
+
+        Like ``AuditLogStore.scan``, driven by whichever of the whole
+        column or an id's posting list has the fewest rows in range.
+        """
+        encounter = user = None
+        drivers: list[Sequence[int]] = [range(len(self._timestamps))]
+        if encounter_id is not None:
+            encounter = self._encounters.code(encounter_id)
+            if encounter is None:
+                return
+            drivers.append(self._encounters.postings(encounter))
+        if user_id is not None:
+            user = self._users.code(user_id)
+            if user is None:
+                return
+            drivers.append(self._users.postings(user))
+
+        candidates = [
+            (positions, self._bounds(positions, lo, hi, after)) for positions in drivers
+        ]
+        positions, (start, stop) = min(candidates, key=lambda c: c[1][1] - c[1][0])
+        encounter_col, user_col = self._encounter_col, self._user_col
+        for i in range(start, stop):
+            position = positions[i]
+            if (encounter is None or encounter_col[position] == encounter) and (
+                user is None or user_col[position] == user
+            ):
+                yield position
+
+    def _bounds(
+        self,
+        positions: Sequence[int],
+        lo: int | None,
+        hi: int | None,
+        after: tuple[int, int] | None,
+    ) -> tuple[int, int]:
+        timestamp = self._timestamps.__getitem__
+        start = 0 if lo is None else bisect_left(positions, lo, key=timestamp)
+        if after is not None:
+            start = max(start, bisect_right(positions, after, key=self.sort_key))
+        stop = (
+            len(positions) if hi is None else bisect_right(positions, hi, key=timestamp)
+        )
+        return start, max(start, stop)
+
+    def encounter_totals(
+        self,
+        key: str | None,
+        lo_hour: int | None,
+        hi_hour: int | None,
+        bucket_hours: int,
+    ) -> Counter[tuple[int, str]]:
+        """Return ``AuditCounters.totals`` for the encounter dimension."""
+        encounters = self._encounters
+        if key is None:
+            codes: Iterable[int] = range(len(encounters))
+        else:
+            code = encounters.code(key)
+            if code is None:
+                return Counter()
+            codes = [code]
+
+        hours, counts, offsets = self._hours, self._hour_counts, self._hour_offsets
+        totals: Counter[tuple[int, str]] = Counter()
+        for code in codes:
+            start, stop = offsets[code], offsets[code + 1]
+            if lo_hour is not None:
+                start = bisect_left(hours, lo_hour, start, stop)
+            if hi_hour is not None:
+                stop = bisect_right(hours, hi_hour, start, stop)
+            if start >= stop:
+                continue
+            value = encounters.value(code)
+            for i in range(start, stop):
+                hour = hours[i]
+                totals[hour - hour % bucket_hours, value] += counts[i]
+        return totals
+
+    def sort_key(self, position: int) -> tuple[int, int]:
+        """Return the (timestamp, local row) of a position, for cursors."""
+        return self._timestamps[position], self._rows[position]
+
+    def entry(self, position: int) -> AuditLogEntry:
+        offset = position * 16
+        return AuditLogEntry.model_construct(
+            audit_id=str(UUID(bytes=self._audit_ids[offset : offset + 16].tobytes())),
+            encounter_id=self._encounters.value(self._encounter_col[position]),
+            user_id=self._users.value(self._user_col[position]),
+            timestamp=from_micros(self._timestamps[position]),
+        )
+
+
+def _scan_store(
+    store: AuditLogStore | _SegmentReader,
+    base: int,
+    encounter_id: str | None,
+    user_id: str | None,
+    lo: int | None,
+    hi: int | None,
+    after: AuditKey | None,
+) -> Iterator[tuple[AuditKey, AuditLogStore | _SegmentReader, int]]:
+    # Global and local row order agree within a segment, so the cursor
+    # only needs shifting into local row numbers
+    local_after = None if after is None else (after[0], after[1] - base)
+    for position in store.scan(encounter_id, user_id, lo, hi, local_after):
+        timestamp, row = store.sort_key(position)
+        yield (timestamp, base + row), store, position
+
+
+def _dictionary_sections(prefix: str, values: list[str], column: array) -> dict:
+    """Return the sorted dictionary, recoded column and posting lists of ids.
+
+    ``column`` holds codes into ``values`` in time order; the result
+    renumbers them by the sorted rank of their value.
+    """
+    by_value = sorted(range(len(values)), key=values.__getitem__)
+    rank = [0] * len(values)
+    for i, code in enumerate(by_value):
+        rank[code] = i
+    names = [values[code].encode() for code in by_value]
+    codes = array("I", map(rank.__getitem__, column))
+
+    by_code: list[array] = [array("I") for _ in by_value]
+    for position, code in enumerate(codes):
+        by_code[code].append(position)
+    postings = array("I")
+    for positions in by_code:
+        postings.extend(positions)
+    return {
+        f"{prefix}_col": codes,
+        f"{prefix}_names": b"".join(names),
+        f"{prefix}_name_offsets": array("Q", accumulate(map(len, names), initial=0)),
+        f"{prefix}_postings": postings,
+        f"{prefix}_posting_offsets": array(
+            "Q", accumulate(map(len, by_code), initial=0)
+        ),
+    }
+
+
+def _hour_count_sections(
+    prefix: str, timestamps: array, sections: dict[str, Any]
+) -> dict[str, array]:
+    """Return each code's hourly counts, from its time-ordered postings."""
+    postings = sections[f"{prefix}_postings"]
+    posting_offsets = sections[f"{prefix}_posting_offsets"]
+    hours, counts, offsets = array("q"), array("I"), array("Q", [0])
+    for code in range(len(posting_offsets) - 1):
+        positions = postings[posting_offsets[code] : posting_offsets[code + 1]]
+        runs = groupby(timestamps[position] // HOUR_MICROS for position in positions)
+        for hour, run in runs:
+            hours.append(hour)
+            counts.append(sum(1 for _ in run))
+        offsets.append(len(hours))
+    return {
+        f"{prefix}_hours": hours,
+        f"{prefix}_hour_counts": counts,
+        f"{prefix}_hour_offsets": offsets,
+    }
+
+
+def _write_segment(directory: Path, segment: _MemorySegment) -> _DiskSegment:
+    """Durably write a sealed segment and return its descriptor."""
+    return _write_columns(directory, segment.base, segment.store.columns())
+
+
+def _write_columns(directory: Path, base: int, columns: dict[str, Any]) -> _DiskSegment:
+    """Durably write a segment from ``AuditLogStore.columns()`` output."""
+    timestamps = columns["timestamps"]
+    audit_ids = columns["audit_ids"]
+    encounter_col, user_col = columns["encounter_col"], columns["user_col"]
+    count = len(timestamps)
+    # A stable sort, so ties keep row order
+    sorted_timestamps = array("q", sorted(timestamps))
+    if sorted_timestamps == timestamps:
+        # The usual case, as rows are appended in time order
+        order: Sequence[int] = range(count)
+    else:
+        order = sorted(range(count), key=timestamps.__getitem__)
+        audit_ids = b"".join(audit_ids[row * 16 : row * 16 + 16] for row in order)
+        encounter_col = array("I", map(encounter_col.__getitem__, order))
+        user_col = array("I", map(user_col.__getitem__, order))
+
+    sections: dict[str, Any] = {
+        "audit_ids": audit_ids,
+        "timestamps": sorted_timestamps,
+        "rows": array("I", order),
+        **_dictionary_sections("encounter", columns["encounters"], encounter_col),
+        **_dictionary_sections("user", columns["users"], user_col),
+    }
+    sections.update(_hour_count_sections("encounter", sorted_timestamps, sections))
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        typecode = data.typecode if isinstance(data, array) else "B"
+        length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        layout[name] = (offset, length, typecode)
+        offset += length + _padding(length)
+
+    header = {
+        "base": base,
+        "count": count,
+        "min_ts": sorted_timestamps[0],
+        "max_ts": sorted_timestamps[-1],
+        "sections": layout,
+    }
+    header_bytes = pickle.dumps(header, protocol=pickle.HIGHEST_PROTOCOL)
+    prefix_length = len(_MAGIC) + _HEADER_LENGTH.size + len(header_bytes)
+
+    path = directory / _segment_name(base)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(bytes(_padding(prefix_length)))
+        for data in sections.values():
+            f.write(data)
+            f.write(bytes(_padding(f.tell())))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    return _DiskSegment(path, base, count, header["min_ts"], header["max_ts"])
+
+
+def _read_header(f: BinaryIO) -> tuple[dict[str, Any], int]:
+    """Return a segment file's header and the offset of its first section.
+
+    Raises:
+        ValueError: If the file is not an audit segment file.
+    """
+    if f.read(len(_MAGIC)) != _MAGIC:
+        raise ValueError(f"{f.name} is not an audit segment file")
+    (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+    header = pickle.loads(f.read(length))
+    prefix_length = len(_MAGIC) + _HEADER_LENGTH.size + length
+    return header, prefix_length + _padding(prefix_length)
+
+
+class SegmentedAuditLog:
+    """Audit rows split into time-bucketed segments.
+
+    Without a ``directory`` nothing is sealed and every row stays in one
+    in-memory segment. With one, sealed segments are written to disk in the
+    background by ``write_sealed`` and dropped from memory once durable.
+    Row numbers are global and stable, so cursors span segments.
+    """
+
+    def __init__(
+        self, directory: Path | str | None = None, segment_seconds: int = 86400
+    ) -> None:
+        self.directory = Path(directory) if directory is not None else None
+        self._bucket_micros = segment_seconds * 1_000_000
+        self._disk: list[_DiskSegment] = []
+        self._sealed: list[_MemorySegment] = []
+        self._active = _MemorySegment(0, AuditLogStore())
+        self._readers: OrderedDict[int, _SegmentReader] = OrderedDict()
+        self._write_lock = asyncio.Lock()
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for path in sorted(self.directory.glob("audit-*.seg")):
+                with open(path, "rb") as f:
+                    header, _ = _read_header(f)
+                self._disk.append(
+                    _DiskSegment(
+                        path,
+                        header["base"],
+                        header["count"],
+                        header["min_ts"],
+                        header["max_ts"],
+                    )
+                )
+            self._active.base = self._disk_end
+
+    def __len__(self) -> int:
+        return self._active.end
+
+    @property
+    def _disk_end(self) -> int:
+        return self._disk[-1].end if self._disk else 0
+
+    @property
+    def has_sealed(self) -> bool:
+        """True if sealed segments are waiting to be written to disk."""
+        return bool(self._sealed)
+
+    # Writes
+
+    def append(
+        self,
+        encounter_ids: list[str],
+        user_id: str,
+        timestamp: int,
+        audit_ids: bytes | None = None,
+    ) -> range:
+        """Append one row per encounter id and return the global row numbers.
+
+        Rolls over to a new segment when ``timestamp`` falls in a later
+        bucket than the active segment. Replayed rows that are already in a
+        segment file are skipped.
+        """
+        active = self._active
+        if not len(active.store) and active.end + len(encounter_ids) <= self._disk_end:
+            # Replaying rows that were sealed to disk before a crash
+            active.base += len(encounter_ids)
+            return range(active.base - len(encounter_ids), active.base)
+
+        bucket = timestamp // self._bucket_micros
+        if active.bucket is None:
+            active.bucket = bucket
+        elif self.directory is not None and bucket > active.bucket:
+            self._sealed.append(active)
+            active = self._active = _MemorySegment(active.end, AuditLogStore(), bucket)
+
+        rows = active.store.append(encounter_ids, user_id, timestamp, audit_ids)
+        active.counts.add(encounter_ids, user_id, timestamp)
+        return range(active.base + rows.start, active.base + rows.stop)
+
+    async def write_sealed(self) -> None:
+        """Write sealed segments to disk and release their memory."""
+        async with self._write_lock:
+            while self._sealed:
+                disk = await asyncio.to_thread(
+                    _write_segment, self.directory, self._sealed[0]
+                )
+                self._disk.append(disk)
+                self._sealed.pop(0)
+                logger.info(
+                    "Sealed audit segment %s (%d rows)", disk.path.name, disk.count
+                )
+
+    def write_sealed_now(self) -> None:
+        """Blocking ``write_sealed``, for use before the event loop runs."""
+        while self._sealed:
+            self._disk.append(_write_segment(self.directory, self._sealed.pop(0)))
+
+    # Rows in the active segment, as returned by ``append``
+
+    def audit_id_bytes(self, rows: range) -> bytes:
+        base = self._active.base
+        return self._active.store.audit_id_bytes(
+            range(rows.start - base, rows.stop - base)
+        )
+
+    def entry(self, row: int) -> AuditLogEntry:
+        return self._active.store.entry(row - self._active.base)
+
+    # Snapshots
+
+    def state(self) -> dict[str, Any]:
+        """Return the rows not yet in segment files, for a snapshot."""
+        return {
+            "segments": [
+                (segment.base, segment.bucket, segment.store.columns())
+                for segment in [*self._sealed, self._active]
+            ]
+        }
+
+    def restore(self, state: dict[str, Any] | None) -> None:
+        """Prepare to replay a log, starting from a ``state()`` snapshot.
+
+        Snapshot segments already written to disk are skipped. With no
+        snapshot the log replays from the first row.
+        """
+        if state is None:
+            self._active = _MemorySegment(0, AuditLogStore())
+            return
+        segments = [
+            _MemorySegment(
+                base,
+                AuditLogStore.from_columns(columns),
+                bucket,
+                _count_encounters(columns),
+            )
+            for base, bucket, columns in state["segments"]
+        ]
+        self._active = segments.pop()
+        self._sealed = [s for s in segments if s.end > self._disk_end]
+        if self._active.end <= self._disk_end:
+            self._active = _MemorySegment(self._active.end, AuditLogStore())
+
+    def finish_recovery(self) -> None:
+        """Write segments sealed during replay and resume numbering."""
+        self.write_sealed_now()
+        if self._active.end < self._disk_end:
+            if len(self._active.store):
+                logger.warning(
+                    "Audit rows %d-%d overlap segment files; renumbering",
+                    self._active.base,
+                    self._active.end,
+                )
+            self._active = _MemorySegment(self._disk_end, AuditLogStore())
+
+    # Queries
+
+    async def fetch(
+        self,
+        encounter_id: str | None,
+        user_id: str | None,
+        lo: int | None,
+        hi: int | None,
+        after: AuditKey | None,
+        limit: int | None,
+    ) -> list[tuple[AuditKey, AuditLogEntry]]:
+        """Return matching rows in (timestamp, row) order, up to ``limit``.
+
+        Segment files are pruned by time range and cursor, then scanned in
+        place one overlapping group at a time, stopping as soon as ``limit``
+        rows are found.
+        """
+        results: list[tuple[AuditKey, AuditLogEntry]] = []
+        for group in self._groups(self._candidates(lo, hi, after)):
+            scans = []
+            for segment in group:
+                if isinstance(segment, _DiskSegment):
+                    store = await self._open(segment)
+                else:
+                    store = segment.store
+                scans.append(
+                    _scan_store(
+                        store, segment.base, encounter_id, user_id, lo, hi, after
+                    )
+                )
+            for key, store, position in heapq.merge(*scans, key=itemgetter(0)):
+                results.append((key, store.entry(position)))
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
+
+    async def count_encounters(
+        self,
+        key: str | None,
+        lo_hour: int | None,
+        hi_hour: int | None,
+        bucket_hours: int,
+    ) -> list[tuple[int, str, int]]:
+        """Return ``AuditCounters.query`` rows for the encounter dimension.
+
+        Segment files outside the hour range are skipped; the rest answer
+        from the counts stored in them.
+        """
+        totals: Counter[tuple[int, str]] = Counter()
+        for segment in [*self._disk, *self._sealed, self._active]:
+            if isinstance(segment, _MemorySegment):
+                counts = segment.counts.totals(
+                    "encounter", key, lo_hour, hi_hour, bucket_hours
+                )
+            elif (lo_hour is not None and segment.max_ts // HOUR_MICROS < lo_hour) or (
+                hi_hour is not None and segment.min_ts // HOUR_MICROS > hi_hour
+            ):
+                continue
+            else:
+                reader = await self._open(segment)
+                counts = reader.encounter_totals(key, lo_hour, hi_hour, bucket_hours)
+            totals.update(counts)
+        return bucket_rows(totals)
+
+    def _candidates(
+        self, lo: int | None, hi: int | None, after: AuditKey | None
+    ) -> list[tuple[int, int, _DiskSegment | _MemorySegment]]:
+        """Return (min_ts, max_ts, segment) for segments that may match."""
+        candidates = []
+        for disk in self._disk:
+            if (lo is not None and disk.max_ts < lo) or (
+                hi is not None and disk.min_ts > hi
+            ):
+                continue
+            if after is not None and (disk.max_ts, disk.end - 1) <= after:
+                continue
+            candidates.append((disk.min_ts, disk.max_ts, disk))
+        for segment in [*self._sealed, self._active]:
+            time_range = segment.store.time_range()
+            if time_range is not None:
+                candidates.append((*time_range, segment))
+        return candidates
+
+    @staticmethod
+    def _groups(
+        candidates: Iterable[tuple[int, int, _DiskSegment | _MemorySegment]],
+    ) -> Iterator[list[_DiskSegment | _MemorySegment]]:
+        """Group segments whose time ranges overlap, in time order.
+
+        Groups are disjoint in time, so each can be merged on its own and
+        the groups read one after another.
+        """
+        group: list[_DiskSegment | _MemorySegment] = []
+        group_max = None
+        for min_ts, max_ts, segment in sorted(
+            candidates, key=lambda c: (c[0], c[2].base)
+        ):
+            if group and min_ts > group_max:
+                yield group
+                group, group_max = [], None
+            group.append(segment)
+            group_max = max_ts if group_max is None else max(group_max, max_ts)
+        if group:
+            yield group
+
+    async def _open(self, segment: _DiskSegment) -> _SegmentReader:
+        reader = self._readers.get(segment.base)
+        if reader is not None:
+            self._readers.move_to_end(segment.base)
+            return reader
+        reader = await asyncio.to_thread(_SegmentReader, segment.path)
+        self._readers[segment.base] = reader
+        while len(self._readers) > OPEN_SEGMENTS:
+            self._readers.popitem(last=False)
+        return reader
@@ -0,0 +1,184 @@
+"""Columnar, append-only storage for audit log rows."""
+
+from array import array
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from typing import Any
+from uuid import UUID, uuid4
+
+from app.indexes import SortedIndex, from_micros
+from app.models import AuditLogEntry
+
+
+class _Interner:
+    """Maps repeated string ids to small integer codes."""
+
+    def __init__(self) -> None:
+        self._codes: dict[str, int] = {}
+        self._values: list[str] = []
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._values)
+            self._values.append(value)
+        return code
+
+    def get(self, value: str) -> int | None:
+        return self._codes.get(value)
+
+    def value(self, code: int) -> str:
+        return self._values[code]
+
+    def values(self) -> list[str]:
+        return list(self._values)
+
+
+class AuditLogStore:
+    """Audit rows stored column-wise in typed arrays.
+
+    Each row costs a 16-byte audit id, an integer epoch-microsecond
+    timestamp and two interned id codes, plus its index entries.
+    ``AuditLogEntry`` models are only built by ``entry`` when a row is
+    returned to a caller.
+    """
+
+    def __init__(self) -> None:
+        self._audit_ids = bytearray()
+        self._timestamps = array("q")
+        self._encounter_col = array("I")
+        self._user_col = array("I")
+
+        self._encounters = _Interner()
+        self._users = _Interner()
+        self._by_time = SortedIndex("I")
+        self._by_encounter: defaultdict[int, SortedIndex] = defaultdict(
+            lambda: SortedIndex("I")
+        )
+        self._by_user: defaultdict[int, SortedIndex] = defaultdict(
+            lambda: SortedIndex("I")
+        )
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def append(
+        self,
+        encounter_ids: Iterable[str],
+        user_id: str,
+        timestamp: int,
+        audit_ids: bytes | None = None,
+    ) -> range:
+        """Append one row per encounter id and return the new row numbers.
+
+        Fresh audit ids are generated unless ``audit_ids`` supplies them as
+        concatenated 16-byte uuids, as when replaying a log.
+        """
+        first = len(self._timestamps)
+        user = self._users.code(user_id)
+        user_index = self._by_user[user]
+
+        for i, encounter_id in enumerate(encounter_ids):
+            row = len(self._timestamps)
+            encounter = self._encounters.code(encounter_id)
+            if audit_ids is None:
+                self._audit_ids += uuid4().bytes
+            else:
+                self._audit_ids += audit_ids[i * 16 : i * 16 + 16]
+            self._timestamps.append(timestamp)
+            self._encounter_col.append(encounter)
+            self._user_col.append(user)
+            self._by_time.insert(timestamp, row)
+            self._by_encounter[encounter].insert(timestamp, row)
+            user_index.insert(timestamp, row)
+
+        return range(first, len(self._timestamps))
+
+    def scan(
+        self,
+        encounter_id: str | None = None,
+        user_id: str | None = None,
+        lo: int | None = None,
+        hi: int | None = None,
+        after: tuple[int, int] | None = None,
+    ) -> Iterator[int]:
+        """Yield matching row numbers in (timestamp, row) order.
+
+        Every index is time-ordered, so the scan is driven by whichever of
+        the time, encounter or user index has the fewest entries in range;
+        the remaining predicates are checked against the columns.
+        """
+        encounter = user = None
+        indexes = [self._by_time]
+        if encounter_id is not None:
+            encounter = self._encounters.get(encounter_id)
+            if encounter is None:
+                return
+            indexes.append(self._by_encounter[encounter])
+        if user_id is not None:
+            user = self._users.get(user_id)
+            if user is None:
+                return
+            indexes.append(self._by_user[user])
+
+        candidates = [(index, index.bounds(lo, hi, after)) for index in indexes]
+        driver, (start, stop) = min(candidates, key=lambda c: c[1][1] - c[1][0])
+        for row in driver.scan(start, stop):
+            if (encounter is None or self._encounter_col[row] == encounter) and (
+                user is None or self._user_col[row] == user
+            ):
+                yield row
+
+    def time_range(self) -> tuple[int, int] | None:
+        """Return the earliest and latest timestamps, or None if empty."""
+        if not self._timestamps:
+            return None
+        return self._by_time.first_key(), self._by_time.last_key()
+
+    def audit_id_bytes(self, rows: range) -> bytes:
+        """Return the packed 16-byte audit ids of a contiguous run of rows."""
+        return bytes(self._audit_ids[rows.start * 16 : rows.stop * 16])
+
+    def columns(self) -> dict[str, Any]:
+        """Return a copy of the row columns, enough to rebuild the store."""
+        return {
+            "audit_ids": bytes(self._audit_ids),
+            "timestamps": array("q", self._timestamps),
+            "encounter_col": array("I", self._encounter_col),
+            "user_col": array("I", self._user_col),
+            "encounters": self._encounters.values(),
+            "users": self._users.values(),
+        }
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, Any]) -> "AuditLogStore":
+        """Rebuild a store, including its indexes, from ``columns()`` output."""
+        store = cls()
+        for value in columns["encounters"]:
+            store._encounters.code(value)
+        for value in columns["users"]:
+            store._users.code(value)
+        store._audit_ids = bytearray(columns["audit_ids"])
+        store._timestamps = columns["timestamps"]
+        store._encounter_col = columns["encounter_col"]
+        store._user_col = columns["user_col"]
+
+        for row, timestamp in enumerate(store._timestamps):
+            store._by_time.insert(timestamp, row)
+            store._by_encounter[store._encounter_col[row]].insert(timestamp, row)
+            store._by_user[store._user_col[row]].insert(timestamp, row)
+        return store
+
+    def sort_key(self, row: int) -> tuple[int, int]:
+        """Return the (timestamp, row) position of a row, for cursors."""
+        return self._timestamps[row], row
+
+    def entry(self, row: int) -> AuditLogEntry:
+        """Materialize a row as an ``AuditLogEntry``."""
+        offset = row * 16
+        return AuditLogEntry.model_construct(
+            audit_id=str(UUID(bytes=bytes(self._audit_ids[offset : offset + 16]))),
+            encounter_id=self._encounters.value(self._encounter_col[row]),
+            user_id=self._users.value(self._user_col[row]),
+            timestamp=from_micros(self._timestamps[row]),
+        )
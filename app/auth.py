@@ -1,11 +1,53 @@
 """API key authentication."""
 
+import hashlib
+from collections.abc import Mapping
+from types import MappingProxyType
+
 from fastapi import Header, HTTPException, status
 
-from app.config import get_settings
+from app.config import Settings, get_settings
 from app.models import User
 
 
+def hash_api_key(api_key: str) -> bytes:
+    """Digest under which an API key is stored in the key store."""
+    return hashlib.sha256(api_key.encode()).digest()
+
+
+class KeyStore:
+    """Immutable map from hashed API key to a prebuilt user.
+
+    Plaintext keys are not kept, and users are built once when the store is
+    created rather than per request.
+    """
+
+    def __init__(self, api_keys: Mapping[str, Mapping[str, str]]) -> None:
+        self._users: Mapping[bytes, User] = MappingProxyType(
+            {hash_api_key(key): User(**user) for key, user in api_keys.items()}
+        )
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def lookup(self, api_key: str) -> User | None:
+        return self._users.get(hash_api_key(api_key))
+
+
+# The store and the settings it was built from; rebuilt when reload_settings
+# swaps in new settings
+_key_store: tuple[Settings, KeyStore] | None = None
+
+
+def get_key_store() -> KeyStore:
+    """Return the key store for the current settings."""
+    global _key_store
+    settings = get_settings()
+    if _key_store is None or _key_store[0] is not settings:
+        _key_store = (settings, KeyStore(settings.api_keys))
+    return _key_store[1]
+
+
 async def get_current_user(
     x_api_key: str = Header(..., description="API key for authentication"),
 ) -> User:
@@ -14,13 +56,12 @@ async def get_current_user(
     Raises:
         HTTPException: 401 if API key is missing or invalid.
     """
-    settings = get_settings()
-    user = settings.api_keys.get(x_api_key)
+    user = get_key_store().lookup(x_api_key)
 
-    if not user:
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key",
         )
 
-    return User(**user)
+    return user
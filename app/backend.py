@@ -0,0 +1,390 @@
+"""Storage backend interface shared by the database implementations."""
+
+import asyncio
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Generic, Literal, TypeVar
+
+from app.audit_counts import HOUR_MICROS, Dimension
+from app.indexes import from_micros, to_micros
+from app.models import (
+    AuditCount,
+    AuditLogEntry,
+    AuditLogFilter,
+    Encounter,
+    EncounterFilter,
+)
+from app.pagination import DEFAULT_PAGE_SIZE, Page, decode_cursor, encode_cursor
+
+# Records fetched per round trip when streaming
+STREAM_CHUNK_SIZE = 500
+
+# (epoch-microsecond time key, tiebreak) position of a record in list order
+SortKey = tuple[int, Any]
+
+# Audit count bucket widths, in hours
+BUCKET_HOURS = {"hour": 1, "day": 24}
+
+# How often a change feed long poll checks for new encounters, in seconds
+CHANGE_POLL_INTERVAL = 0.2
+
+T = TypeVar("T")
+Fetch = Callable[[Any, SortKey | None, int | None], Awaitable[list[tuple[SortKey, T]]]]
+
+
+@dataclass
+class Changes(Generic[T]):
+    """Records inserted after a sequence number, in insert order."""
+
+    items: list[T]
+    # Sequence of the last item, or the requested one if there are none
+    last_sequence: int
+
+
+def date_bounds(
+    filter: EncounterFilter | AuditLogFilter,
+) -> tuple[int | None, int | None]:
+    """Return the filter's date range as epoch-microsecond bounds."""
+    return (
+        to_micros(filter.date_from) if filter.date_from else None,
+        to_micros(filter.date_to) if filter.date_to else None,
+    )
+
+
+def audit_count_dimension(
+    filter: AuditLogFilter, group_by: Literal["user", "encounter"] | None
+) -> tuple[Dimension, str | None]:
+    """Return the counter dimension and key that answer a count query.
+
+    Counters are kept per user and per encounter but not per pair, so an id
+    filter must be on the grouped dimension.
+
+    Raises:
+        ValueError: If the query needs counts per (user, encounter) pair.
+    """
+    if filter.user_id and filter.encounter_id:
+        raise ValueError("Filter counts by userId or encounterId, not both")
+    if group_by == "user" and filter.encounter_id:
+        raise ValueError("encounterId filter requires groupBy=encounter")
+    if group_by == "encounter" and filter.user_id:
+        raise ValueError("userId filter requires groupBy=user")
+    if group_by == "user" or filter.user_id:
+        return "user", filter.user_id
+    if group_by == "encounter" or filter.encounter_id:
+        return "encounter", filter.encounter_id
+    return "all", None
+
+
+class StorageBackend(ABC):
+    """Interface for encounter and audit-log storage.
+
+    Encounters are listed in (encounter_date, encounter_id) order and audit
+    logs in (timestamp, row) order. Backends implement the ``_fetch_*``
+    primitives, which return matching records paired with their sort key,
+    starting strictly after ``after``; listing, cursor pagination and
+    streaming are built on top of them here.
+
+    Every inserted encounter also gets a sequence number, increasing in
+    commit order and stable across restarts, which the change feed reads.
+
+    Encounter reads take an optional ``fields`` projection (snake_case
+    field names). Backends may skip loading other fields, so callers must
+    only read the fields they asked for.
+    """
+
+    # Encounters
+
+    @abstractmethod
+    async def create_encounter(self, encounter: Encounter) -> Encounter: ...
+
+    @abstractmethod
+    async def create_encounters(
+        self, encounters: list[Encounter]
+    ) -> list[Encounter]: ...
+
+    @abstractmethod
+    async def get_encounter(
+        self, encounter_id: str, fields: frozenset[str] | None = None
+    ) -> Encounter | None: ...
+
+    @abstractmethod
+    async def _fetch_encounters(
+        self,
+        filter: EncounterFilter,
+        after: tuple[int, str] | None,
+        limit: int | None,
+        fields: frozenset[str] | None = None,
+    ) -> list[tuple[SortKey, Encounter]]: ...
+
+    @abstractmethod
+    async def encounter_generation(self) -> str:
+        """Return a token that changes whenever any encounter is written.
+
+        Read it before listing: a list fetched afterwards is at least as new
+        as the token, so the token can validate a cached copy of that list.
+        """
+
+    @abstractmethod
+    async def latest_sequence(self) -> int:
+        """Return the sequence number of the newest encounter (0 if none)."""
+
+    @abstractmethod
+    async def _fetch_changes(
+        self, after: int, limit: int, fields: frozenset[str] | None = None
+    ) -> list[tuple[int, Encounter]]:
+        """Return up to ``limit`` (sequence, encounter) pairs after ``after``."""
+
+    async def wait_for_changes(self, after: int, timeout: float) -> None:
+        """Wait up to ``timeout`` seconds for an encounter after ``after``.
+
+        Polls by default, which sees inserts made by other processes;
+        backends that see every insert may wake waiters directly.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while await self.latest_sequence() <= after:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(CHANGE_POLL_INTERVAL, remaining))
+
+    async def encounter_changes(
+        self,
+        after: int = 0,
+        limit: int = DEFAULT_PAGE_SIZE,
+        wait: float = 0.0,
+        fields: frozenset[str] | None = None,
+    ) -> Changes[Encounter]:
+        """Return encounters inserted after sequence ``after``.
+
+        If there are none yet, waits up to ``wait`` seconds for one to
+        arrive (long polling) before returning.
+        """
+        rows = await self._fetch_changes(after, limit, fields)
+        if not rows and wait > 0:
+            await self.wait_for_changes(after, wait)
+            rows = await self._fetch_changes(after, limit, fields)
+        return Changes(
+            [encounter for _, encounter in rows], rows[-1][0] if rows else after
+        )
+
+    async def list_encounters(
+        self, filter: EncounterFilter | None = None
+    ) -> list[Encounter]:
+        """List encounters matching the filter, ordered by encounter date."""
+        rows = await self._fetch_encounters(filter or EncounterFilter(), None, None)
+        return [encounter for _, encounter in rows]
+
+    async def page_encounters(
+        self,
+        filter: EncounterFilter | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        fields: frozenset[str] | None = None,
+    ) -> Page[Encounter]:
+        """Return one page of matching encounters, resuming after ``cursor``.
+
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        return await self._page(
+            partial(self._fetch_encounters, fields=fields),
+            filter or EncounterFilter(),
+            limit,
+            cursor,
+            str,
+        )
+
+    def iter_encounters(
+        self,
+        filter: EncounterFilter | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        fields: frozenset[str] | None = None,
+    ) -> AsyncIterator[list[Encounter]]:
+        """Iterate matching encounters in order, one chunk per fetch.
+
+        Each chunk resumes from the sort key of the previous one, so memory
+        stays bounded by ``chunk_size`` and concurrent inserts never shift
+        the scan.
+
+        Raises:
+            ValueError: If the cursor is invalid (raised immediately).
+        """
+        after = decode_cursor(cursor, str) if cursor else None
+        return self._chunks(
+            partial(self._fetch_encounters, fields=fields),
+            filter or EncounterFilter(),
+            after,
+            limit,
+            chunk_size,
+        )
+
+    # Audit logs
+
+    @abstractmethod
+    async def create_audit_log(
+        self, encounter_id: str, user_id: str
+    ) -> AuditLogEntry: ...
+
+    @abstractmethod
+    async def create_audit_logs(
+        self, encounter_ids: Iterable[str], user_id: str
+    ) -> None:
+        """Record one audit entry per encounter in a single write.
+
+        All entries in the batch share one timestamp.
+        """
+
+    @abstractmethod
+    async def _fetch_audit_logs(
+        self,
+        filter: AuditLogFilter,
+        after: tuple[int, int] | None,
+        limit: int | None,
+    ) -> list[tuple[SortKey, AuditLogEntry]]: ...
+
+    async def list_audit_logs(
+        self, filter: AuditLogFilter | None = None
+    ) -> list[AuditLogEntry]:
+        """List audit logs matching the filter, ordered by timestamp."""
+        rows = await self._fetch_audit_logs(filter or AuditLogFilter(), None, None)
+        return [entry for _, entry in rows]
+
+    async def page_audit_logs(
+        self,
+        filter: AuditLogFilter | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> Page[AuditLogEntry]:
+        """Return one page of matching audit logs, resuming after ``cursor``.
+
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        return await self._page(
+            self._fetch_audit_logs, filter or AuditLogFilter(), limit, cursor, int
+        )
+
+    def iter_audit_logs(
+        self,
+        filter: AuditLogFilter | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[list[AuditLogEntry]]:
+        """Iterate matching audit logs in order, one chunk per fetch.
+
+        Raises:
+            ValueError: If the cursor is invalid (raised immediately).
+        """
+        after = decode_cursor(cursor, int) if cursor else None
+        return self._chunks(
+            self._fetch_audit_logs,
+            filter or AuditLogFilter(),
+            after,
+            limit,
+            chunk_size,
+        )
+
+    @abstractmethod
+    async def _count_audit_logs(
+        self,
+        dimension: Dimension,
+        key: str | None,
+        lo_hour: int | None,
+        hi_hour: int | None,
+        bucket_hours: int,
+    ) -> list[tuple[int, str, int]]:
+        """Return (bucket start hour, key, count) rows in bucket, key order."""
+
+    async def count_audit_logs(
+        self,
+        filter: AuditLogFilter | None = None,
+        group_by: Literal["user", "encounter"] | None = None,
+        bucket: Literal["hour", "day"] = "day",
+    ) -> list[AuditCount]:
+        """Count audit log entries per time bucket, optionally per user or
+        encounter.
+
+        Served from counters maintained on every audit write, so the cost is
+        proportional to the number of hours and groups returned. Date bounds
+        are widened to whole hours.
+
+        Raises:
+            ValueError: If the filter and grouping cannot be combined.
+        """
+        filter = filter or AuditLogFilter()
+        dimension, key = audit_count_dimension(filter, group_by)
+        lo, hi = date_bounds(filter)
+        rows = await self._count_audit_logs(
+            dimension,
+            key,
+            None if lo is None else lo // HOUR_MICROS,
+            None if hi is None else hi // HOUR_MICROS,
+            BUCKET_HOURS[bucket],
+        )
+        field = {"user": "user_id", "encounter": "encounter_id"}.get(dimension)
+        return [
+            AuditCount.model_construct(
+                bucket_start=from_micros(hour * HOUR_MICROS),
+                count=count,
+                **({field: value} if field else {}),
+            )
+            for hour, value, count in rows
+        ]
+
+    # Introspection
+
+    @abstractmethod
+    async def record_counts(self) -> dict[str, int]:
+        """Return the number of stored encounters and audit logs."""
+
+    # Lifecycle
+
+    async def start(self) -> None:
+        """Start any background work the backend needs."""
+
+    async def close(self) -> None:
+        """Release any resources held by the backend."""
+
+    # Shared helpers
+
+    @staticmethod
+    async def _page(
+        fetch: Fetch[T],
+        filter: Any,
+        limit: int,
+        cursor: str | None,
+        tiebreak_type: type,
+    ) -> Page[T]:
+        after = decode_cursor(cursor, tiebreak_type) if cursor else None
+        rows = await fetch(filter, after, limit + 1)
+        page = Page([item for _, item in rows[:limit]])
+        if len(rows) > limit:
+            page.next_cursor = encode_cursor(*rows[limit - 1][0])
+        return page
+
+    @staticmethod
+    async def _chunks(
+        fetch: Fetch[T],
+        filter: Any,
+        after: SortKey | None,
+        limit: int | None,
+        chunk_size: int,
+    ) -> AsyncIterator[list[T]]:
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            rows = await fetch(filter, after, size)
+            if not rows:
+                return
+            yield [item for _, item in rows]
+            if len(rows) < size:
+                return
+            if remaining is not None:
+                remaining -= len(rows)
+            after = rows[-1][0]
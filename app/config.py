@@ -1,20 +1,66 @@
 """Application configuration loaded from YAML and environment."""
 
+import asyncio
+import logging
 import os
-from functools import lru_cache
+from collections.abc import Mapping
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Annotated, Literal
 
 import yaml
-from dotenv import load_dotenv
-from pydantic import ConfigDict, Field
-from pydantic_settings import BaseSettings
+from dotenv import dotenv_values, find_dotenv, load_dotenv
+from pydantic import ConfigDict, Field, field_validator
+from pydantic_settings import (
+    BaseSettings,
+    EnvSettingsSource,
+    NoDecode,
+    PydanticBaseSettingsSource,
+)
+from pydantic_settings.sources import parse_env_vars
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
+CONFIG_PATH = Path("config.yml")
+DOTENV_PATH = Path(find_dotenv() or ".env")
 
-def _parse_api_keys_from_env() -> dict[str, dict[str, str]]:
+# Variables set by the process environment take precedence over .env, also
+# when .env is re-read on reload
+_PROCESS_ENV = frozenset(os.environ)
+
+load_dotenv(DOTENV_PATH)
+
+# Variables copied in from .env, so a reload can remove ones deleted there
+_dotenv_keys = {
+    key for key, value in dotenv_values(DOTENV_PATH).items() if value is not None
+} - _PROCESS_ENV
+
+
+# Environment that settings are read from instead of os.environ, so a
+# reload can validate new .env values before applying them
+_environ: ContextVar[Mapping[str, str] | None] = ContextVar("_environ", default=None)
+
+
+class _EnvSource(EnvSettingsSource):
+    """Environment variables from ``_environ`` if set, else os.environ."""
+
+    def _load_env_vars(self) -> Mapping[str, str | None]:
+        environ = _environ.get()
+        if environ is None:
+            return super()._load_env_vars()
+        return parse_env_vars(
+            environ, self.case_sensitive, self.env_ignore_empty, self.env_parse_none_str
+        )
+
+
+def _parse_api_keys_from_env(
+    environ: Mapping[str, str] = os.environ,
+) -> dict[str, dict[str, str]]:
     """Parse API_KEYS env var format: key:user_id:name,key:user_id:name"""
-    env_keys = os.getenv("API_KEYS", "")
+    return _parse_api_keys(environ.get("API_KEYS", ""))
+
+
+def _parse_api_keys(env_keys: str) -> dict[str, dict[str, str]]:
     if not env_keys:
         return {}
 
@@ -44,16 +90,79 @@ class Settings(BaseSettings):
         )
     )
 
-    api_keys: dict[str, dict[str, str]] = Field(
+    # NoDecode: the API_KEYS env var is key:user_id:name pairs, not JSON
+    api_keys: Annotated[dict[str, dict[str, str]], NoDecode] = Field(
         default={
             "dev-api-key": {"user_id": "dev-user", "name": "Development User"},
         }
     )
 
+    # Storage: "memory" keeps everything in-process; "sqlite" persists to
+    # sqlite_path and can be shared by several worker processes
+    storage_backend: Literal["memory", "sqlite"] = "memory"
+    sqlite_path: str = "encounters.db"
+    sqlite_pool_size: int = Field(default=4, ge=1)
+
+    # Durability for the memory backend: write-ahead log and snapshots are
+    # kept in wal_dir (disabled when unset)
+    wal_dir: str | None = None
+    memory_shards: int = Field(default=1, ge=1)
+    snapshot_interval_seconds: float = Field(default=300.0, ge=0)
+
+    # Audit logs for the memory backend are split into segments of this many
+    # seconds; sealed segments are written to audit_segment_dir as indexed,
+    # uncompressed files read in place (kept in memory when unset)
+    audit_segment_dir: str | None = None
+    audit_segment_seconds: int = Field(default=86400, ge=1)
+
+    # Logging: records are queued and written as JSON by a background thread
+    log_level: str = "INFO"
+    log_queue_size: int = Field(default=10000, ge=1)
+    log_overflow_policy: Literal["drop", "sample", "block"] = "drop"
+    log_sample_rate: int = Field(default=10, ge=1)
+
+    # Upper bound on serialized encounter JSON kept for reuse by responses
+    json_cache_max_bytes: int = Field(default=64 * 1024 * 1024, ge=0)
+
+    # Bulk exports are written to export_dir by this many background workers
+    export_dir: str = "exports"
+    export_workers: int = Field(default=2, ge=1)
+
+    # How often .env and config.yml are checked for changes (0 disables).
+    # API keys and encounter types apply on reload; other settings are read
+    # once at startup
+    config_reload_interval_seconds: float = Field(default=5.0, ge=0)
+
     @classmethod
-    def from_yaml(cls, path: Path | str = "config.yml") -> "Settings":
-        """Load settings from YAML config file, with env overrides."""
-        config_path = Path(path)
+    def settings_customise_sources(
+        cls,
+        settings_cls: type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> tuple[PydanticBaseSettingsSource, ...]:
+        return (
+            init_settings,
+            _EnvSource(settings_cls),
+            dotenv_settings,
+            file_secret_settings,
+        )
+
+    @field_validator("api_keys", mode="before")
+    @classmethod
+    def _parse_api_keys_string(cls, value: object) -> object:
+        return _parse_api_keys(value) if isinstance(value, str) else value
+
+    @classmethod
+    def from_yaml(
+        cls, path: Path | str | None = None, environ: Mapping[str, str] | None = None
+    ) -> "Settings":
+        """Load settings from YAML config file, with env overrides.
+
+        The overrides come from ``environ`` when given, else os.environ.
+        """
+        config_path = Path(path or CONFIG_PATH)
         data: dict = {}
 
         if config_path.exists():
@@ -64,14 +173,91 @@ class Settings(BaseSettings):
             data["encounter_types"] = frozenset(data["encounter_types"])
 
         # API keys from env take precedence
-        env_keys = _parse_api_keys_from_env()
+        env_keys = _parse_api_keys_from_env(os.environ if environ is None else environ)
         if env_keys:
             data["api_keys"] = env_keys
 
-        return cls(**data)
+        token = _environ.set(environ)
+        try:
+            return cls(**data)
+        finally:
+            _environ.reset(token)
+
+
+_settings: Settings | None = None
 
 
-@lru_cache
 def get_settings() -> Settings:
     """Get cached application settings."""
-    return Settings.from_yaml()
+    global _settings
+    if _settings is None:
+        _settings = Settings.from_yaml()
+    return _settings
+
+
+def reload_settings() -> Settings:
+    """Re-read .env and config.yml and swap in the new settings.
+
+    The cached settings are replaced in one assignment, so concurrent
+    readers see either the old or the new settings, never a mix. Variables
+    removed from .env are removed from the environment too, so deleting
+    API_KEYS there falls back to config.yml. The new settings are built
+    from the new environment before either is applied.
+
+    Raises:
+        yaml.YAMLError: If config.yml cannot be parsed.
+        pydantic.ValidationError: If the new settings are invalid. The
+            previous settings and environment stay in place.
+    """
+    global _settings, _dotenv_keys
+    values = {
+        key: value
+        for key, value in dotenv_values(DOTENV_PATH).items()
+        if key not in _PROCESS_ENV and value is not None
+    }
+    removed = _dotenv_keys - values.keys()
+    environ = {key: v for key, v in os.environ.items() if key not in removed}
+    environ.update(values)
+    settings = Settings.from_yaml(environ=environ)
+
+    for key in removed:
+        os.environ.pop(key, None)
+    os.environ.update(values)
+    _dotenv_keys = set(values)
+    _settings = settings
+    return settings
+
+
+def _file_signature(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _file_signatures(paths: tuple[Path, ...]) -> list[tuple[int, int] | None]:
+    return [_file_signature(path) for path in paths]
+
+
+async def watch_config(interval: float) -> None:
+    """Reload settings whenever .env or config.yml changes on disk.
+
+    Polls file modification times every ``interval`` seconds; runs until
+    cancelled. An invalid file is logged and the previous settings are kept.
+    File checks and parsing run on a thread, off the event loop.
+    """
+    paths = (DOTENV_PATH, CONFIG_PATH)
+    seen = await asyncio.to_thread(_file_signatures, paths)
+    while True:
+        await asyncio.sleep(interval)
+        current = await asyncio.to_thread(_file_signatures, paths)
+        if current == seen:
+            continue
+        seen = current
+        try:
+            await asyncio.to_thread(reload_settings)
+        except Exception:
+            logger.exception("Settings reload failed; keeping previous settings")
+        else:
+            logger.info("Reloaded settings from %s", ", ".join(map(str, paths)))
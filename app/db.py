@@ -1,98 +1,509 @@
-"""In-memory database for encounters and audit logs."""
+"""Database backends for encounters and audit logs."""
 
+import asyncio
+import heapq
+import logging
+import time
 from asyncio import Lock
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from contextlib import suppress
 from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
 from uuid import uuid4
 
+from app.audit_counts import AuditCounters, Dimension
+from app.audit_segments import SegmentedAuditLog
+from app.backend import SortKey, StorageBackend, date_bounds
+from app.config import get_settings
+from app.indexes import SortedIndex, to_micros
+from app.metrics import DB_LOCK_WAIT, DB_ROWS_RETURNED, DB_ROWS_SCANNED
 from app.models import AuditLogEntry, Encounter, EncounterFilter, AuditLogFilter
+from app.packed_json import PackedJson
+from app.sqlite_db import SQLiteDB
+from app.wal import WriteAheadLog
 
+logger = logging.getLogger(__name__)
 
-class InMemoryDB:
-    """Simple in-memory storage for the exercise."""
+
+class TimedLock(Lock):
+    """asyncio lock that records time spent waiting to acquire it."""
+
+    async def acquire(self) -> bool:
+        if not self.locked():
+            return await super().acquire()
+        start = time.perf_counter()
+        try:
+            return await super().acquire()
+        finally:
+            DB_LOCK_WAIT.inc(time.perf_counter() - start)
+
+
+# Shared stand-in for index values that have no entries yet
+_EMPTY_INDEX = SortedIndex()
+
+# Audit count dimensions kept for the whole log; per-encounter counts are
+# kept by the audit segments
+_GLOBAL_COUNTS: tuple[Dimension, ...] = ("all", "user")
+
+
+def _pack(encounter: Encounter) -> Encounter:
+    """Return the encounter with clinical_data packed for storage."""
+    if isinstance(encounter.clinical_data, PackedJson):
+        return encounter
+    return encounter.model_copy(
+        update={"clinical_data": PackedJson.pack(encounter.clinical_data)}
+    )
+
+
+def _matches(filter: EncounterFilter, encounter: Encounter) -> bool:
+    """Check the non-date filters; date bounds are applied by the indexes."""
+    if filter.patient_id and (
+        encounter.patient_id.get_secret_value() != filter.patient_id
+    ):
+        return False
+    if filter.provider_id and encounter.provider_id != filter.provider_id:
+        return False
+    if filter.encounter_type and encounter.encounter_type != filter.encounter_type:
+        return False
+    return True
+
+
+class _EncounterShard:
+    """One partition of the encounter table with its own lock and indexes."""
 
     def __init__(self) -> None:
-        self._lock = Lock()
-        self._encounters: dict[str, Encounter] = {}
-        self._audit_logs: dict[str, AuditLogEntry] = {}
+        self.lock = TimedLock()
+        self.encounters: dict[str, Encounter] = {}
+
+        # Encounter ids ordered by (encounter_date, encounter_id): one index
+        # over the shard plus one per patient, provider and type
+        self._by_date = SortedIndex()
+        self._by_patient: defaultdict[str, SortedIndex] = defaultdict(SortedIndex)
+        self._by_provider: defaultdict[str, SortedIndex] = defaultdict(SortedIndex)
+        self._by_type: defaultdict[str, SortedIndex] = defaultdict(SortedIndex)
+
+    def insert(self, encounter: Encounter) -> bool:
+        """Store an encounter and index it, returning False if already stored.
+
+        The encounter must already be packed (see ``_pack``), as logged
+        and snapshotted ones are. Replaying a stored id is a no-op.
+        """
+        encounter_id = encounter.encounter_id
+        if encounter_id in self.encounters:
+            return False
+        key = to_micros(encounter.encounter_date)
+        self.encounters[encounter_id] = encounter
+        self._by_date.insert(key, encounter_id)
+        self._by_patient[encounter.patient_id.get_secret_value()].insert(
+            key, encounter_id
+        )
+        self._by_provider[encounter.provider_id].insert(key, encounter_id)
+        self._by_type[encounter.encounter_type].insert(key, encounter_id)
+        return True
+
+    def scan(
+        self, filter: EncounterFilter, after: tuple[int, str] | None = None
+    ) -> Iterator[tuple[SortKey, Encounter]]:
+        """Yield matching encounters in (encounter_date, encounter_id) order.
+
+        Every index shares that order, so the scan is driven by whichever
+        index has the fewest entries in the requested date range and the
+        other filters are checked per candidate. Cost tracks the most
+        selective filter rather than the table.
+        """
+        indexes = [self._by_date]
+        if filter.patient_id:
+            indexes.append(self._by_patient.get(filter.patient_id, _EMPTY_INDEX))
+        if filter.provider_id:
+            indexes.append(self._by_provider.get(filter.provider_id, _EMPTY_INDEX))
+        if filter.encounter_type:
+            indexes.append(self._by_type.get(filter.encounter_type, _EMPTY_INDEX))
+
+        lo, hi = date_bounds(filter)
+        candidates = [(index, index.bounds(lo, hi, after)) for index in indexes]
+        driver, (start, stop) = min(candidates, key=lambda c: c[1][1] - c[1][0])
+
+        scanned = 0
+        try:
+            for key, encounter_id in driver.scan_items(start, stop):
+                scanned += 1
+                encounter = self.encounters[encounter_id]
+                if _matches(filter, encounter):
+                    yield (key, encounter_id), encounter
+        finally:
+            DB_ROWS_SCANNED.inc(scanned)
+
+
+class InMemoryDB(StorageBackend):
+    """Simple in-memory storage for the exercise.
+
+    Encounters can be partitioned by encounter_id hash into ``shards``,
+    each with its own lock, and audit logs have a separate lock. Stored
+    encounters keep ``clinical_data`` packed (see ``PackedJson``), so
+    filtering never decodes it and responses decode it only to serialize. Locks only
+    serialize writers: records are immutable and every read completes in
+    one synchronous step on the event loop, so reads never take a lock.
+
+    No critical section awaits, so on one event loop the locks never
+    contend and more shards add no concurrency, only a per-shard scan and
+    merge to every list query. One shard is the default for that reason.
+
+    With ``wal_dir`` set, every write is appended to a write-ahead log
+    (group-committed) before it is acknowledged, snapshots are written every
+    ``snapshot_interval`` seconds and on close, and the constructor recovers
+    the previous state from the snapshot plus the log tail.
+
+    Encounters are also kept in insert order for the change feed, where an
+    encounter's sequence number is its position. Snapshots store them in
+    that order and the WAL logs inserts in the same step as they are
+    sequenced, so recovery reassigns the same numbers. The feed only shows
+    sequences whose log records are fsynced, so a consumer never sees a
+    number that a crash could give to another encounter.
+
+    With ``audit_dir`` set, audit logs are partitioned into segments of
+    ``audit_segment_seconds``; sealed segments are written there as
+    indexed files and only the active one is kept in memory. Per-encounter
+    access counts are kept by the segments, so they leave memory (and
+    snapshots) with their rows; only the small all-access and per-user
+    counters are global.
+    """
+
+    def __init__(
+        self,
+        wal_dir: Path | str | None = None,
+        snapshot_interval: float = 300.0,
+        shards: int = 1,
+        audit_dir: Path | str | None = None,
+        audit_segment_seconds: int = 86400,
+    ) -> None:
+        self._shards = [_EncounterShard() for _ in range(shards)]
+        # Counts encounter writes; the epoch keeps tokens from a previous
+        # process from matching after a restart
+        self._generation = 0
+        self._generation_epoch = uuid4().hex
+        self._changes: list[Encounter] = []
+        # Highest sequence whose WAL record is durable (all of them when
+        # the WAL is off); the change feed reads up to here
+        self._durable_sequence = 0
+        # One event per change feed long poll, set when it advances
+        self._change_waiters: set[asyncio.Event] = set()
+        self._audit_lock = TimedLock()
+        self._audit_logs = SegmentedAuditLog(audit_dir, audit_segment_seconds)
+        self._audit_counts = AuditCounters(_GLOBAL_COUNTS)
+        self._segment_task: asyncio.Task | None = None
+
+        self._wal: WriteAheadLog | None = None
+        self._snapshot_interval = snapshot_interval
+        self._snapshot_lock = Lock()
+        self._snapshot_task: asyncio.Task | None = None
+        self.recovery_stats: dict[str, float] = {}
+        if wal_dir is not None:
+            self._wal = WriteAheadLog(wal_dir)
+            self._recover()
+
+    # Durability
+
+    @property
+    def wal(self) -> WriteAheadLog | None:
+        return self._wal
+
+    def _recover(self) -> None:
+        start = time.perf_counter()
+        state, records = self._wal.recover()
+        if state is not None:
+            for encounter in state["encounters"]:
+                self._insert(encounter)
+            self._audit_counts = AuditCounters.from_state(state["audit_counts"])
+        self._audit_logs.restore(state["audit"] if state is not None else None)
+
+        replayed = 0
+        for record in records:
+            self._apply(record)
+            replayed += 1
+        self._audit_logs.finish_recovery()
+        self._durable_sequence = len(self._changes)
+
+        self.recovery_stats = {
+            **self._record_counts(),
+            "replayed_records": replayed,
+            "seconds": time.perf_counter() - start,
+        }
+        logger.info(
+            "Recovered %d encounters and %d audit logs (%d log records) in %.3fs",
+            self.recovery_stats["encounters"],
+            self.recovery_stats["audit_logs"],
+            replayed,
+            self.recovery_stats["seconds"],
+        )
+
+    def _apply(self, record: tuple) -> None:
+        """Apply a replayed log record."""
+        if record[0] == "encounters":
+            for encounter in record[1]:
+                self._insert(encounter)
+        elif record[0] == "audit":
+            _, encounter_ids, user_id, timestamp, audit_ids = record
+            self._audit_logs.append(encounter_ids, user_id, timestamp, audit_ids)
+            self._audit_counts.add(encounter_ids, user_id, timestamp)
+
+    def _log(self, record: tuple) -> asyncio.Future | None:
+        """Queue a record for the WAL, if enabled.
+
+        Must be called in the same synchronous step as the in-memory change,
+        so a snapshot never sees a change whose record lands in a later
+        generation; await the result outside the lock.
+        """
+        return self._wal.append(record) if self._wal is not None else None
+
+    async def snapshot(self) -> None:
+        """Write a snapshot and drop the log generations it covers."""
+        if self._wal is None:
+            return
+        async with self._snapshot_lock:
+            # Rotation and capture happen in one synchronous step, which is a
+            # consistent point across all shards
+            gen = self._wal.rotate()
+            state = {
+                "encounters": list(self._changes),
+                "audit": self._audit_logs.state(),
+                "audit_counts": self._audit_counts.state(),
+            }
+            await self._wal.sync()
+            await asyncio.to_thread(self._wal.write_snapshot, state, gen)
+
+    async def _snapshot_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._snapshot_interval)
+            try:
+                await self.snapshot()
+            except Exception:
+                logger.exception("Snapshot failed")
+
+    async def start(self) -> None:
+        if self._wal is not None and self._snapshot_interval > 0:
+            self._snapshot_task = asyncio.create_task(self._snapshot_periodically())
+
+    async def close(self) -> None:
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._snapshot_task
+            self._snapshot_task = None
+        await self._audit_logs.write_sealed()
+        if self._wal is not None:
+            await self.snapshot()
+            self._wal.close()
 
     # Encounters
 
     async def create_encounter(self, encounter: Encounter) -> Encounter:
-        async with self._lock:
-            self._encounters[encounter.encounter_id] = encounter
+        await self.create_encounters([encounter])
         return encounter
 
-    async def get_encounter(self, encounter_id: str) -> Encounter | None:
-        async with self._lock:
-            return self._encounters.get(encounter_id)
-
-    async def list_encounters(
-        self, filter: EncounterFilter | None = None
-    ) -> list[Encounter]:
-        async with self._lock:
-            encounters = list(self._encounters.values())
-
-        if filter:
-            if filter.patient_id:
-                encounters = [
-                    e
-                    for e in encounters
-                    if e.patient_id.get_secret_value() == filter.patient_id
-                ]
-            if filter.provider_id:
-                encounters = [
-                    e for e in encounters if e.provider_id == filter.provider_id
-                ]
-            if filter.encounter_type:
-                encounters = [
-                    e for e in encounters if e.encounter_type == filter.encounter_type
-                ]
-            if filter.date_from:
-                encounters = [
-                    e for e in encounters if e.encounter_date >= filter.date_from
-                ]
-            if filter.date_to:
-                encounters = [
-                    e for e in encounters if e.encounter_date <= filter.date_to
-                ]
+    async def create_encounters(self, encounters: list[Encounter]) -> list[Encounter]:
+        """Insert a batch of encounters, taking each affected shard lock once."""
+        by_shard: defaultdict[int, list[Encounter]] = defaultdict(list)
+        for encounter in encounters:
+            # Packed before logging so the WAL and snapshots stay compact
+            by_shard[self._shard_index(encounter.encounter_id)].append(_pack(encounter))
 
+        commits = []
+        for index, group in by_shard.items():
+            shard = self._shards[index]
+            async with shard.lock:
+                for encounter in group:
+                    self._insert(encounter)
+                self._generation += 1
+                commit = self._log(("encounters", group))
+                self._on_durable(commit, len(self._changes))
+                commits.append(commit)
+        for commit in commits:
+            if commit is not None:
+                await commit
         return encounters
 
+    def _insert(self, encounter: Encounter) -> None:
+        """Insert into the encounter's shard and sequence it if new."""
+        shard = self._shard_for(encounter.encounter_id)
+        if shard.insert(encounter):
+            self._changes.append(shard.encounters[encounter.encounter_id])
+
+    def _on_durable(self, commit: asyncio.Future | None, sequence: int) -> None:
+        """Publish sequences up to ``sequence`` to the feed once committed.
+
+        Log batches are fsynced and resolved in append order, so the durable
+        sequence only moves forward.
+        """
+
+        def advance(future: asyncio.Future | None = None) -> None:
+            if future is not None and (future.cancelled() or future.exception()):
+                return
+            if sequence > self._durable_sequence:
+                self._durable_sequence = sequence
+                for waiter in self._change_waiters:
+                    waiter.set()
+
+        if commit is None:
+            advance()
+        else:
+            commit.add_done_callback(advance)
+
+    def _shard_index(self, encounter_id: str) -> int:
+        return hash(encounter_id) % len(self._shards)
+
+    def _shard_for(self, encounter_id: str) -> _EncounterShard:
+        return self._shards[self._shard_index(encounter_id)]
+
+    async def get_encounter(
+        self, encounter_id: str, fields: frozenset[str] | None = None
+    ) -> Encounter | None:
+        # Records are stored whole with clinical_data packed, so a
+        # projection has nothing to skip here
+        return self._shard_for(encounter_id).encounters.get(encounter_id)
+
+    async def _fetch_encounters(
+        self,
+        filter: EncounterFilter,
+        after: tuple[int, str] | None,
+        limit: int | None,
+        fields: frozenset[str] | None = None,
+    ) -> list[tuple[SortKey, Encounter]]:
+        scans = [shard.scan(filter, after) for shard in self._shards]
+        merged = scans[0] if len(scans) == 1 else heapq.merge(*scans, key=itemgetter(0))
+        rows = list(islice(merged, limit))
+        DB_ROWS_RETURNED.inc(len(rows))
+        return rows
+
+    async def latest_sequence(self) -> int:
+        return self._durable_sequence
+
+    async def _fetch_changes(
+        self, after: int, limit: int, fields: frozenset[str] | None = None
+    ) -> list[tuple[int, Encounter]]:
+        changes = self._changes[after : min(after + limit, self._durable_sequence)]
+        return list(enumerate(changes, start=after + 1))
+
+    async def wait_for_changes(self, after: int, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waiter = asyncio.Event()
+        self._change_waiters.add(waiter)
+        try:
+            while self._durable_sequence <= after:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                waiter.clear()
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(waiter.wait(), remaining)
+        finally:
+            self._change_waiters.discard(waiter)
+
+    async def encounter_generation(self) -> str:
+        return f"{self._generation_epoch}-{self._generation}"
+
+    async def record_counts(self) -> dict[str, int]:
+        return self._record_counts()
+
+    def _record_counts(self) -> dict[str, int]:
+        return {
+            "encounters": sum(len(shard.encounters) for shard in self._shards),
+            "audit_logs": len(self._audit_logs),
+        }
+
     # Audit logs
 
     async def create_audit_log(self, encounter_id: str, user_id: str) -> AuditLogEntry:
-        entry = AuditLogEntry(
-            audit_id=str(uuid4()),
-            encounter_id=encounter_id,
-            user_id=user_id,
-            timestamp=datetime.now(timezone.utc),
-        )
-        async with self._lock:
-            self._audit_logs[entry.audit_id] = entry
-        return entry
+        return await self._append_audit_logs([encounter_id], user_id)
+
+    async def create_audit_logs(
+        self, encounter_ids: Iterable[str], user_id: str
+    ) -> None:
+        """Record one audit entry per encounter under a single lock acquisition.
 
-    async def list_audit_logs(
-        self, filter: AuditLogFilter | None = None
-    ) -> list[AuditLogEntry]:
-        async with self._lock:
-            logs = list(self._audit_logs.values())
+        All entries in the batch share one timestamp.
+        """
+        await self._append_audit_logs(list(encounter_ids), user_id)
 
-        if filter:
-            if filter.encounter_id:
-                logs = [log for log in logs if log.encounter_id == filter.encounter_id]
-            if filter.user_id:
-                logs = [log for log in logs if log.user_id == filter.user_id]
-            if filter.date_from:
-                logs = [log for log in logs if log.timestamp >= filter.date_from]
-            if filter.date_to:
-                logs = [log for log in logs if log.timestamp <= filter.date_to]
+    async def _append_audit_logs(
+        self, encounter_ids: list[str], user_id: str
+    ) -> AuditLogEntry | None:
+        """Append a batch and return its first entry, if any."""
+        if not encounter_ids:
+            # Nothing to record, so no lock, log record or fsync
+            return None
+        async with self._audit_lock:
+            # Taken under the lock so rows are appended in timestamp order and
+            # never land in a segment that has already been sealed
+            key = to_micros(datetime.now(timezone.utc))
+            rows = self._audit_logs.append(encounter_ids, user_id, key)
+            self._audit_counts.add(encounter_ids, user_id, key)
+            commit = self._log(
+                (
+                    "audit",
+                    encounter_ids,
+                    user_id,
+                    key,
+                    self._audit_logs.audit_id_bytes(rows),
+                )
+            )
+            first = self._audit_logs.entry(rows.start) if rows else None
+        if self._audit_logs.has_sealed and self._segment_task is None:
+            self._segment_task = asyncio.create_task(self._write_segments())
+        if commit is not None:
+            await commit
+        return first
 
-        return logs
+    async def _write_segments(self) -> None:
+        try:
+            await self._audit_logs.write_sealed()
+        except Exception:
+            # Sealed rows stay in memory and in snapshots; retried by the
+            # next audit write and on close
+            logger.exception("Writing audit segment failed")
+        finally:
+            self._segment_task = None
 
+    async def _fetch_audit_logs(
+        self,
+        filter: AuditLogFilter,
+        after: tuple[int, int] | None,
+        limit: int | None,
+    ) -> list[tuple[SortKey, AuditLogEntry]]:
+        lo, hi = date_bounds(filter)
+        return await self._audit_logs.fetch(
+            filter.encounter_id, filter.user_id, lo, hi, after, limit
+        )
 
-_db = InMemoryDB()
+    async def _count_audit_logs(
+        self,
+        dimension: Dimension,
+        key: str | None,
+        lo_hour: int | None,
+        hi_hour: int | None,
+        bucket_hours: int,
+    ) -> list[tuple[int, str, int]]:
+        if dimension == "encounter":
+            return await self._audit_logs.count_encounters(
+                key, lo_hour, hi_hour, bucket_hours
+            )
+        return self._audit_counts.query(dimension, key, lo_hour, hi_hour, bucket_hours)
 
 
-def get_db() -> InMemoryDB:
-    """Dependency for injecting the database into routes."""
-    return _db
+@lru_cache
+def get_db() -> StorageBackend:
+    """Dependency for injecting the configured storage backend into routes."""
+    settings = get_settings()
+    if settings.storage_backend == "sqlite":
+        return SQLiteDB(settings.sqlite_path, pool_size=settings.sqlite_pool_size)
+    return InMemoryDB(
+        wal_dir=settings.wal_dir,
+        snapshot_interval=settings.snapshot_interval_seconds,
+        shards=settings.memory_shards,
+        audit_dir=settings.audit_segment_dir,
+        audit_segment_seconds=settings.audit_segment_seconds,
+    )
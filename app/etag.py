@@ -0,0 +1,30 @@
+"""Entity tags and conditional GET for encounter reads."""
+
+import hashlib
+
+# Responses hold PHI: browsers may keep them but must revalidate, and
+# shared caches must not store them
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Return a strong ETag identifying the representation built from parts."""
+    digest = hashlib.blake2b(
+        "\x1f".join(map(str, parts)).encode(), digest_size=16
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def none_match(if_none_match: str | None, etag: str) -> bool:
+    """Return True if an If-None-Match header matches ``etag``.
+
+    Uses the weak comparison that RFC 9110 requires for If-None-Match, so a
+    ``W/`` prefix on a client's tag is ignored.
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
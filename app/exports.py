@@ -0,0 +1,231 @@
+"""Background bulk export of encounters to local files.
+
+Jobs are queued and run by a fixed pool of worker tasks. Each one streams
+matching encounters from the backend in chunks; serialization and file
+writes run on a thread so the event loop stays free. Every chunk is audited
+in one batch before it is written. Output goes to ``<job_id>.<format>.part``
+and is renamed into place when complete; the job's status is kept next to it
+in ``<job_id>.json`` so any worker process can report it.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+from collections.abc import Callable
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO
+from uuid import UUID
+
+from app.backend import StorageBackend
+from app.config import get_settings
+from app.models import Encounter, ExportJob
+from app.models.export import ExportFormat
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES: dict[ExportFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+_CSV_COLUMNS = [info.alias or name for name, info in Encounter.model_fields.items()]
+
+
+def _ndjson_chunk(encounters: list[Encounter]) -> bytes:
+    # Not via the JSON cache: a bulk export would evict everything else
+    return b"".join(
+        encounter.model_dump_json(by_alias=True).encode() + b"\n"
+        for encounter in encounters
+    )
+
+
+def _csv_header() -> bytes:
+    out = io.StringIO()
+    csv.DictWriter(out, fieldnames=_CSV_COLUMNS).writeheader()
+    return out.getvalue().encode()
+
+
+def _csv_chunk(encounters: list[Encounter]) -> bytes:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=_CSV_COLUMNS)
+    for encounter in encounters:
+        row = encounter.model_dump(mode="json", by_alias=True)
+        row["clinicalData"] = json.dumps(row["clinicalData"])
+        writer.writerow(row)
+    return out.getvalue().encode()
+
+
+_SERIALIZERS: dict[ExportFormat, Callable[[list[Encounter]], bytes]] = {
+    "ndjson": _ndjson_chunk,
+    "csv": _csv_chunk,
+}
+
+# Written once, before the first chunk
+_HEADERS: dict[ExportFormat, bytes] = {
+    "ndjson": b"",
+    "csv": _csv_header(),
+}
+
+
+def _write_chunk(
+    f: BinaryIO, fmt: ExportFormat, encounters: list[Encounter], first: bool
+) -> int:
+    """Serialize and append one chunk, returning the bytes written."""
+    data = _SERIALIZERS[fmt](encounters)
+    if first:
+        data = _HEADERS[fmt] + data
+    f.write(data)
+    return len(data)
+
+
+def _finish(f: BinaryIO) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+
+
+def _write_status(path: Path, job: ExportJob) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(job.model_dump_json(by_alias=True))
+    os.replace(tmp, path)
+
+
+class ExportManager:
+    """Queue of export jobs run by ``workers`` background tasks.
+
+    Workers start with the first job, on the running event loop, and are
+    stopped by ``close``. Only pending and running jobs are held in memory;
+    finished ones are read back from their status file.
+    """
+
+    def __init__(self, directory: Path | str, workers: int = 2) -> None:
+        self.directory = Path(directory)
+        self._worker_count = workers
+        self._jobs: dict[str, ExportJob] = {}
+        self._queue: asyncio.Queue[tuple[ExportJob, StorageBackend]] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    def output_path(self, job: ExportJob) -> Path:
+        return self.directory / f"{job.job_id}.{job.format}"
+
+    def _status_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    async def submit(self, job: ExportJob, db: StorageBackend) -> ExportJob:
+        """Queue a job to export from ``db`` and return it."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [
+                asyncio.create_task(self._work()) for _ in range(self._worker_count)
+            ]
+        await asyncio.to_thread(self.directory.mkdir, parents=True, exist_ok=True)
+        self._jobs[job.job_id] = job
+        await self._save(job)
+        self._queue.put_nowait((job, db))
+        return job
+
+    async def get(self, job_id: str) -> ExportJob | None:
+        """Return a job's current status, including jobs run by other workers."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        try:
+            # Ids name files, so only well-formed ones reach the filesystem
+            UUID(job_id)
+        except ValueError:
+            return None
+        path = self._status_path(job_id)
+        try:
+            data = await asyncio.to_thread(path.read_text)
+        except FileNotFoundError:
+            return None
+        return ExportJob.model_validate_json(data)
+
+    async def close(self) -> None:
+        """Stop the workers, marking unfinished jobs as failed."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while self._queue is not None and not self._queue.empty():
+            job, _ = self._queue.get_nowait()
+            self._fail(job, "Interrupted by shutdown")
+            _write_status(self._status_path(job.job_id), job)
+            self._jobs.pop(job.job_id, None)
+        self._queue = None
+
+    async def _save(self, job: ExportJob) -> None:
+        await asyncio.to_thread(_write_status, self._status_path(job.job_id), job)
+
+    @staticmethod
+    def _fail(job: ExportJob, error: str) -> None:
+        job.status = "failed"
+        job.error = error
+        job.completed_at = datetime.now(timezone.utc)
+
+    async def _work(self) -> None:
+        while True:
+            job, db = await self._queue.get()
+            try:
+                await self._run(job, db)
+            except asyncio.CancelledError:
+                # The job may have finished while its final status was saving
+                if job.status != "completed":
+                    self._fail(job, "Interrupted by shutdown")
+                _write_status(self._status_path(job.job_id), job)
+                raise
+            except Exception:
+                # No details: the error could quote PHI
+                logger.exception("Export %s failed", job.job_id)
+                self._fail(job, "Export failed")
+                await self._save(job)
+            finally:
+                # Finished jobs are served from their status file
+                self._jobs.pop(job.job_id, None)
+
+    async def _run(self, job: ExportJob, db: StorageBackend) -> None:
+        path = self.output_path(job)
+        part = path.with_suffix(path.suffix + ".part")
+        job.status = "running"
+        await self._save(job)
+
+        f = await asyncio.to_thread(open, part, "wb")
+        try:
+            async for chunk in db.iter_encounters(job.filter):
+                # Log access to PHI for the chunk before it is written
+                await db.create_audit_logs(
+                    (e.encounter_id for e in chunk), job.created_by
+                )
+                job.bytes_written += await asyncio.to_thread(
+                    _write_chunk, f, job.format, chunk, job.rows_written == 0
+                )
+                job.rows_written += len(chunk)
+                await self._save(job)
+            if job.rows_written == 0:
+                job.bytes_written += await asyncio.to_thread(
+                    _write_chunk, f, job.format, [], True
+                )
+            await asyncio.to_thread(_finish, f)
+        except BaseException:
+            # Also on cancellation, so no await
+            f.close()
+            part.unlink(missing_ok=True)
+            raise
+        await asyncio.to_thread(os.replace, part, path)
+
+        job.status = "completed"
+        job.completed_at = datetime.now(timezone.utc)
+        await self._save(job)
+        logger.info("Export %s wrote %d encounters", job.job_id, job.rows_written)
+
+
+@lru_cache
+def get_export_manager() -> ExportManager:
+    """Return the process-wide export manager."""
+    settings = get_settings()
+    return ExportManager(settings.export_dir, settings.export_workers)
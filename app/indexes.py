@@ -0,0 +1,86 @@
+"""Index structures used by the in-memory database."""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator, MutableSequence
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(value: datetime) -> int:
+    """Convert a datetime to integer UTC epoch microseconds.
+
+    Naive datetimes are treated as UTC so mixed inputs stay comparable.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def from_micros(micros: int) -> datetime:
+    """Convert integer UTC epoch microseconds back to an aware datetime."""
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+class SortedIndex:
+    """Values ordered by (integer time key, value), located by bisection.
+
+    Values are string ids kept in a list, or integer row numbers kept in a
+    typed array when ``typecode`` is given. In-order appends are O(1);
+    out-of-order inserts shift the tail of the columns.
+    """
+
+    def __init__(self, typecode: str | None = None) -> None:
+        self._keys = array("q")
+        self._values: MutableSequence = array(typecode) if typecode else []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def first_key(self) -> int:
+        return self._keys[0]
+
+    def last_key(self) -> int:
+        return self._keys[-1]
+
+    def insert(self, key: int, value: str | int) -> None:
+        keys, values = self._keys, self._values
+        if not keys or key > keys[-1] or (key == keys[-1] and value >= values[-1]):
+            keys.append(key)
+            values.append(value)
+            return
+        pos = self._position_after(key, value)
+        keys.insert(pos, key)
+        values.insert(pos, value)
+
+    def bounds(
+        self,
+        lo: int | None = None,
+        hi: int | None = None,
+        after: tuple[int, str | int] | None = None,
+    ) -> tuple[int, int]:
+        """Return the [start, stop) positions of keys within lo..hi inclusive.
+
+        When ``after`` is given, entries at or before that (key, value) are
+        skipped, which is how cursors resume a scan.
+        """
+        start = 0 if lo is None else bisect_left(self._keys, lo)
+        if after is not None:
+            start = max(start, self._position_after(*after))
+        stop = len(self._keys) if hi is None else bisect_right(self._keys, hi)
+        return start, max(start, stop)
+
+    def scan(self, start: int, stop: int) -> Iterator[str | int]:
+        values = self._values
+        return (values[pos] for pos in range(start, stop))
+
+    def scan_items(self, start: int, stop: int) -> Iterator[tuple[int, str | int]]:
+        keys, values = self._keys, self._values
+        return ((keys[pos], values[pos]) for pos in range(start, stop))
+
+    def _position_after(self, key: int, value: str | int) -> int:
+        lo = bisect_left(self._keys, key)
+        hi = bisect_right(self._keys, key, lo)
+        return bisect_right(self._values, value, lo, hi)
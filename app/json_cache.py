@@ -0,0 +1,73 @@
+"""Cached JSON serialization of stored encounters.
+
+Encounters are immutable once stored, so each one is serialized once and
+responses are built by concatenating the cached bytes.
+"""
+
+from collections import OrderedDict
+from collections.abc import Iterable
+from functools import lru_cache
+
+from app.config import get_settings
+from app.metrics import JSON_CACHE_LOOKUPS
+from app.models import Encounter
+
+
+class JsonCache:
+    """LRU map from encounter_id to serialized JSON, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def encounter(
+        self, encounter: Encounter, fields: frozenset[str] | None = None
+    ) -> bytes:
+        """Return the encounter's JSON, serializing it on first use.
+
+        With ``fields`` only those fields are encoded. Projections are not
+        cached, since they are cheap next to the full record.
+        """
+        if fields is not None:
+            return encounter.model_dump_json(by_alias=True, include=fields).encode()
+
+        key = encounter.encounter_id
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            JSON_CACHE_LOOKUPS.inc(labels=("hit",))
+            return data
+
+        JSON_CACHE_LOOKUPS.inc(labels=("miss",))
+        data = encounter.model_dump_json(by_alias=True).encode()
+        if len(data) <= self.max_bytes:
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        return data
+
+    def array(
+        self, encounters: Iterable[Encounter], fields: frozenset[str] | None = None
+    ) -> bytes:
+        """Return a JSON array of the encounters."""
+        return b"[" + b",".join(self.encounter(e, fields) for e in encounters) + b"]"
+
+
+@lru_cache
+def _shared_cache() -> JsonCache:
+    return JsonCache(get_settings().json_cache_max_bytes)
+
+
+async def get_json_cache() -> JsonCache:
+    """Return the process-wide encounter JSON cache.
+
+    A coroutine, so FastAPI resolves it on the event loop instead of
+    handing it to the threadpool on every request.
+    """
+    return _shared_cache()
@@ -0,0 +1,131 @@
+"""Non-blocking structured logging.
+
+Log calls on the event loop only enqueue the record; a background thread
+formats it as JSON and writes it out. Anything logged must already be
+redacted, since records leave the request path as soon as they are queued.
+"""
+
+import json
+import logging
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import count
+from logging.handlers import QueueHandler, QueueListener
+from typing import Literal
+
+OverflowPolicy = Literal["drop", "sample", "block"]
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Queue handler with a bounded buffer and an overflow policy.
+
+    - drop: discard records while the queue is full
+    - sample: once the queue is more than half full keep only every
+      ``sample_rate``-th record, and discard while it is full
+    - block: wait for space (applies backpressure to the caller)
+
+    Discarded records are counted in ``dropped``.
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        policy: OverflowPolicy = "drop",
+        sample_rate: int = 10,
+    ) -> None:
+        super().__init__(log_queue)
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._sample_counter = count()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is deferred to the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        if self.policy == "sample" and self.queue.qsize() * 2 > self.queue.maxsize:
+            if next(self._sample_counter) % self.sample_rate:
+                self.dropped += 1
+                return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: QueueListener | None = None
+_handler: BoundedQueueHandler | None = None
+
+
+def start_logging(
+    level: str = "INFO",
+    queue_size: int = 10000,
+    policy: OverflowPolicy = "drop",
+    sample_rate: int = 10,
+) -> BoundedQueueHandler:
+    """Route the ``app`` loggers through a background JSON writer."""
+    global _listener, _handler
+    stop_logging()
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _handler = BoundedQueueHandler(log_queue, policy, sample_rate)
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(level)
+    app_logger.addHandler(_handler)
+    _listener.start()
+    return _handler
+
+
+def stop_logging() -> None:
+    """Flush queued records and detach the pipeline."""
+    global _listener, _handler
+    if _listener is not None:
+        while True:
+            try:
+                _listener.stop()
+                break
+            except queue.Full:
+                # The stop sentinel needs a free slot; let the writer drain
+                time.sleep(0.01)
+        _listener = None
+    if _handler is not None:
+        logging.getLogger("app").removeHandler(_handler)
+        _handler = None
+
+
+def dropped_records() -> int:
+    """Number of records discarded by the overflow policy."""
+    return _handler.dropped if _handler is not None else 0
@@ -0,0 +1,191 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Metrics are plain dicts updated from the event loop thread, so recording
+takes no locks and costs a dict update.
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import defaultdict
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        _REGISTRY.append(self)
+
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        """Return the metric's sample lines."""
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.type}\n"
+        return header + "".join(line + "\n" for line in self._samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.values: defaultdict[Labels, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        self.values[labels] += amount
+
+    def set_total(self, value: float, labels: Labels = ()) -> None:
+        """Mirror a running total kept elsewhere, sampled at scrape time."""
+        self.values[labels] = value
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down or be set directly."""
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        self.values[labels] -= amount
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self.values[labels] = value
+
+
+class Histogram(_Metric):
+    """Observation counts in fixed buckets, plus their sum and count."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Labels = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+        # Per label set: [count per bucket..., count above the last bucket]
+        self.counts: dict[Labels, list[int]] = {}
+        self.sums: defaultdict[Labels, float] = defaultdict(float)
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for labels, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_str = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {self.sums[labels]}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+_REGISTRY: list[_Metric] = []
+
+
+def render() -> str:
+    """Render every registered metric."""
+    return "".join(metric.render() for metric in _REGISTRY)
+
+
+# HTTP
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template, method and status.",
+    ("route", "method", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and method.",
+    ("route", "method"),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served, by method.",
+    ("method",),
+)
+
+# Storage
+
+DB_RECORDS = Gauge(
+    "db_records",
+    "Records currently stored, by table.",
+    ("table",),
+)
+DB_LOCK_WAIT = Counter(
+    "db_lock_wait_seconds_total",
+    "Time spent waiting to acquire storage locks.",
+)
+DB_ROWS_SCANNED = Counter(
+    "db_list_encounters_rows_scanned_total",
+    "Index entries examined by list_encounters.",
+)
+DB_ROWS_RETURNED = Counter(
+    "db_list_encounters_rows_returned_total",
+    "Encounters returned by list_encounters.",
+)
+
+# Serialization
+
+JSON_CACHE_LOOKUPS = Counter(
+    "json_cache_lookups_total",
+    "Encounter JSON cache lookups, by result (hit or miss).",
+    ("result",),
+)
+
+# Sampled at scrape time
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records discarded by the logging overflow policy.",
+)
+WAL_FSYNCS = Counter(
+    "wal_fsyncs_total",
+    "Write-ahead log fsyncs (one per group commit).",
+)
+WAL_FSYNC_SECONDS = Counter(
+    "wal_fsync_seconds_total",
+    "Time spent in write-ahead log fsyncs.",
+)
+WAL_RECORDS = Counter(
+    "wal_records_total",
+    "Records written to the write-ahead log.",
+)
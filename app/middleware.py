@@ -1,12 +1,12 @@
 """Request logging middleware with PHI redaction."""
 
 import logging
-import re
 import time
-from collections.abc import Callable
+from urllib.parse import parse_qsl, quote_plus
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS
 
 logger = logging.getLogger(__name__)
 
@@ -14,41 +14,123 @@ logger = logging.getLogger(__name__)
 PHI_QUERY_PARAMS = {"patientId", "patientid", "patient_id"}
 
 
+def _is_phi_param(key: str) -> bool:
+    # Any case or underscore variant, e.g. patientId or patient_id
+    return key.replace("_", "").lower() == "patientid"
+
+
 def redact_query_params(query_string: str) -> str:
-    """Redact PHI query parameters from query string."""
-    if not query_string:
+    """Redact PHI query parameters from query string.
+
+    Keys are compared after percent-decoding, as the router sees them, so
+    an encoded key such as ``patient%49d`` is redacted too.
+    """
+    # Without an escape or "patient" no key can be PHI, so skip parsing
+    if (
+        "%" not in query_string
+        and "+" not in query_string
+        and "patient" not in query_string.lower()
+    ):
         return query_string
+    return "&".join(
+        (
+            f"{quote_plus(key)}=[REDACTED]"
+            if _is_phi_param(key)
+            else f"{quote_plus(key)}={quote_plus(value)}"
+        )
+        for key, value in parse_qsl(query_string, keep_blank_values=True)
+    )
+
 
-    def redact_match(match: re.Match) -> str:
-        key = match.group(1)
-        if key.lower().replace("_", "") in {"patientid"}:
-            return f"{key}=[REDACTED]"
-        return match.group(0)
+class RequestLoggingMiddleware:
+    """ASGI middleware that logs requests with PHI redaction.
 
-    return re.sub(r"([^&=]+)=([^&]*)", redact_match, query_string)
+    Implemented as raw ASGI rather than ``BaseHTTPMiddleware`` so responses
+    (including streams) pass straight through. Does nothing when INFO
+    logging is disabled.
+    """
 
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware that logs requests with PHI redaction."""
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
         start_time = time.perf_counter()
+        method, path = scope["method"], scope["path"]
 
-        redacted_query = redact_query_params(str(request.query_params))
+        redacted_query = redact_query_params(scope["query_string"].decode("latin-1"))
         query_part = f"?{redacted_query}" if redacted_query else ""
 
-        logger.info("Request: %s %s%s", request.method, request.url.path, query_part)
-
-        response = await call_next(request)
-
-        process_time = time.perf_counter() - start_time
-
         logger.info(
-            "Response: %s %s status=%d duration=%.3fs",
-            request.method,
-            request.url.path,
-            response.status_code,
-            process_time,
+            "Request: %s %s%s",
+            method,
+            path,
+            query_part,
+            extra={"method": method, "path": path, "query": redacted_query},
         )
 
-        return response
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            process_time = time.perf_counter() - start_time
+
+            logger.info(
+                "Response: %s %s status=%d duration=%.3fs",
+                method,
+                path,
+                status_code,
+                process_time,
+                extra={
+                    "method": method,
+                    "path": path,
+                    "status": status_code,
+                    "duration": process_time,
+                },
+            )
+
+
+class MetricsMiddleware:
+    """ASGI middleware that records request counts, latency and concurrency.
+
+    Requests are labelled by route template (e.g. ``/encounters/{encounter_id}``)
+    so ids and other PHI never become label values.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(labels=(method,))
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec(labels=(method,))
+            route = scope.get("route")
+            route_path = route.path if route is not None else "<unmatched>"
+            HTTP_REQUESTS.inc(labels=(route_path, method, str(status_code)))
+            HTTP_LATENCY.observe(time.perf_counter() - start_time, (route_path, method))
@@ -1,14 +1,26 @@
 """Pydantic models for the Patient Encounter API."""
 
-from app.models.audit import AuditLogEntry, AuditLogFilter
-from app.models.encounter import Encounter, EncounterCreate, EncounterFilter
+from app.models.audit import AuditCount, AuditLogEntry, AuditLogFilter
+from app.models.encounter import (
+    Encounter,
+    EncounterBatchItemResult,
+    EncounterBatchResult,
+    EncounterCreate,
+    EncounterFilter,
+)
+from app.models.export import ExportCreate, ExportJob
 from app.models.user import User
 
 __all__ = [
+    "AuditCount",
     "AuditLogEntry",
     "AuditLogFilter",
     "Encounter",
+    "EncounterBatchItemResult",
+    "EncounterBatchResult",
     "EncounterCreate",
     "EncounterFilter",
+    "ExportCreate",
+    "ExportJob",
     "User",
 ]
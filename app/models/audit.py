@@ -16,6 +16,18 @@ class AuditLogEntry(CamelModel):
     timestamp: datetime
 
 
+class AuditCount(CamelModel):
+    """Number of audit log entries in one time bucket.
+
+    ``user_id`` or ``encounter_id`` is set when counts are grouped by it.
+    """
+
+    bucket_start: datetime
+    user_id: str | None = None
+    encounter_id: str | None = None
+    count: int
+
+
 class AuditLogFilter(CamelModel):
     """Query parameters for filtering audit logs."""
 
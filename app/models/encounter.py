@@ -1,7 +1,8 @@
 """Encounter models."""
 
+from collections.abc import Mapping
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Literal
 from uuid import uuid4
 
 from pydantic import (
@@ -14,6 +15,7 @@ from pydantic import (
 
 from app.config import get_settings
 from app.models.base import CamelModel
+from app.packed_json import PackedJson
 
 
 def _utc_now() -> datetime:
@@ -24,6 +26,15 @@ def _generate_id() -> str:
     return str(uuid4())
 
 
+def _validate_encounter_type(v: str) -> str:
+    # encounter_types is a frozenset on the cached settings, so this is one
+    # global read and a set lookup; the message is only built on failure
+    allowed = get_settings().encounter_types
+    if v not in allowed:
+        raise ValueError(f"Must be one of: {', '.join(sorted(allowed))}")
+    return v
+
+
 class EncounterCreate(CamelModel):
     """Input for creating an encounter - only client-provided fields."""
 
@@ -40,14 +51,15 @@ class EncounterCreate(CamelModel):
     @field_validator("encounter_type")
     @classmethod
     def validate_encounter_type(cls, v: str) -> str:
-        allowed = get_settings().encounter_types
-        if v not in allowed:
-            raise ValueError(f"Must be one of: {', '.join(sorted(allowed))}")
-        return v
+        return _validate_encounter_type(v)
 
 
 class Encounter(CamelModel):
-    """Patient encounter record."""
+    """Patient encounter record.
+
+    Records loaded from storage may hold ``clinical_data`` as a read-only
+    ``PackedJson`` mapping, decoded only when it is read or serialized.
+    """
 
     encounter_id: str = Field(default_factory=_generate_id)
 
@@ -70,13 +82,34 @@ class Encounter(CamelModel):
         """Expose patient_id in API responses (but still redacted in logs)."""
         return v.get_secret_value()
 
+    @field_serializer("clinical_data")
+    def serialize_clinical_data(self, v: Mapping[str, Any]) -> dict[str, Any]:
+        return v.unpack() if isinstance(v, PackedJson) else v
+
     @field_validator("encounter_type")
     @classmethod
     def validate_encounter_type(cls, v: str) -> str:
-        allowed = get_settings().encounter_types
-        if v not in allowed:
-            raise ValueError(f"Must be one of: {', '.join(sorted(allowed))}")
-        return v
+        return _validate_encounter_type(v)
+
+    @classmethod
+    def from_create(cls, data: EncounterCreate, created_by: str) -> "Encounter":
+        """Build an encounter from already-validated input.
+
+        Skips re-validation and the model_dump round-trip; ``clinical_data``
+        is shared with ``data`` rather than copied.
+        """
+        now = _utc_now()
+        return cls.model_construct(
+            encounter_id=_generate_id(),
+            created_at=now,
+            updated_at=now,
+            created_by=created_by,
+            patient_id=data.patient_id,
+            clinical_data=data.clinical_data,
+            provider_id=data.provider_id,
+            encounter_date=data.encounter_date,
+            encounter_type=data.encounter_type,
+        )
 
 
 class EncounterFilter(CamelModel):
@@ -93,3 +126,20 @@ class EncounterFilter(CamelModel):
         if self.date_from and self.date_to and self.date_from > self.date_to:
             raise ValueError("date_from cannot be after date_to")
         return self
+
+
+class EncounterBatchItemResult(CamelModel):
+    """Outcome of one item in a batch create request."""
+
+    index: int
+    status: Literal["created", "invalid"]
+    encounter_id: str | None = None
+    errors: list[dict[str, Any]] = Field(default_factory=list)
+
+
+class EncounterBatchResult(CamelModel):
+    """Per-item outcomes of a batch create request."""
+
+    created: int
+    failed: int
+    results: list[EncounterBatchItemResult]
@@ -0,0 +1,34 @@
+"""Bulk export job models."""
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import Field
+
+from app.models.base import CamelModel
+from app.models.encounter import EncounterFilter, _generate_id, _utc_now
+
+ExportFormat = Literal["ndjson", "csv"]
+ExportStatus = Literal["pending", "running", "completed", "failed"]
+
+
+class ExportCreate(CamelModel):
+    """Input for starting an export of the encounters matching a filter."""
+
+    filter: EncounterFilter = Field(default_factory=EncounterFilter)
+    format: ExportFormat = "ndjson"
+
+
+class ExportJob(CamelModel):
+    """Status and progress of a bulk export job."""
+
+    job_id: str = Field(default_factory=_generate_id)
+    format: ExportFormat
+    filter: EncounterFilter
+    created_by: str
+    status: ExportStatus = "pending"
+    created_at: datetime = Field(default_factory=_utc_now)
+    completed_at: datetime | None = None
+    rows_written: int = 0
+    bytes_written: int = 0
+    error: str | None = None
@@ -1,10 +1,17 @@
 """User model."""
 
+from pydantic import ConfigDict
+
 from app.models.base import CamelModel
 
 
 class User(CamelModel):
-    """Authenticated user context."""
+    """Authenticated user context.
+
+    Instances are shared across requests, so they are frozen.
+    """
+
+    model_config = ConfigDict(frozen=True)
 
     user_id: str
     name: str
@@ -0,0 +1,67 @@
+"""Compact storage for JSON object payloads."""
+
+import zlib
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+import pydantic_core
+
+# Payloads below this size are kept as plain JSON; compressing them saves
+# little and costs a decompress on every read
+COMPRESS_MIN_BYTES = 512
+
+
+class PackedJson(Mapping[str, Any]):
+    """A JSON object held as serialized, optionally zlib-compressed bytes.
+
+    It is read-only and decoded on each access rather than cached, so a
+    stored record only ever holds the bytes.
+    """
+
+    __slots__ = ("_data", "_compressed")
+
+    def __init__(self, data: bytes, compressed: bool = False) -> None:
+        self._data = data
+        self._compressed = compressed
+
+    @classmethod
+    def pack(cls, value: Mapping[str, Any]) -> "PackedJson":
+        data = pydantic_core.to_json(value)
+        if len(data) >= COMPRESS_MIN_BYTES:
+            return cls(zlib.compress(data), compressed=True)
+        return cls(data)
+
+    @property
+    def size(self) -> int:
+        """Bytes held, after compression."""
+        return len(self._data)
+
+    def json(self) -> bytes:
+        """Return the serialized JSON object."""
+        return zlib.decompress(self._data) if self._compressed else self._data
+
+    def unpack(self) -> dict[str, Any]:
+        """Decode into a new dict."""
+        return pydantic_core.from_json(self.json())
+
+    def __getitem__(self, key: str) -> Any:
+        return self.unpack()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.unpack())
+
+    def __len__(self) -> int:
+        return len(self.unpack())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Mapping):
+            return self.unpack() == dict(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"PackedJson({self.size} bytes)"
+
+    def __reduce__(self) -> tuple:
+        return PackedJson, (self._data, self._compressed)
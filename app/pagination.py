@@ -0,0 +1,41 @@
+"""Opaque keyset cursors for paginated list endpoints."""
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+@dataclass
+class Page(Generic[T]):
+    """One page of results plus the cursor for the page after it."""
+
+    items: list[T]
+    next_cursor: str | None = None
+
+
+def encode_cursor(key: int, tiebreak: str | int) -> str:
+    """Encode a (sort key, tiebreak) position as an opaque cursor."""
+    raw = json.dumps([key, tiebreak], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, tiebreak_type: type) -> tuple[int, str | int]:
+    """Decode a cursor produced by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another list.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, tiebreak = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if type(key) is not int or type(tiebreak) is not tiebreak_type:
+        raise ValueError("Invalid cursor")
+    return key, tiebreak
@@ -1,32 +1,86 @@
 """Audit log endpoints."""
 
 from datetime import datetime
+from typing import Literal
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.auth import get_current_user
-from app.db import InMemoryDB, get_db
-from app.models import AuditLogEntry, AuditLogFilter, User
+from app.backend import StorageBackend
+from app.db import get_db
+from app.models import AuditCount, AuditLogEntry, AuditLogFilter, User
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.streaming import ndjson_response, wants_ndjson
 
 router = APIRouter(prefix="/audit", tags=["audit"])
 
 
+@router.get("/encounters/counts", response_model=list[AuditCount])
+async def count_audit_logs(
+    user: User = Depends(get_current_user),
+    db: StorageBackend = Depends(get_db),
+    group_by: Literal["user", "encounter"] | None = Query(None, alias="groupBy"),
+    bucket: Literal["hour", "day"] = Query("day"),
+    encounter_id: str | None = Query(None, alias="encounterId"),
+    user_id: str | None = Query(None, alias="userId"),
+    date_from: datetime | None = Query(None, alias="dateFrom"),
+    date_to: datetime | None = Query(None, alias="dateTo"),
+) -> list[AuditCount]:
+    """Count PHI accesses per hour or day (UTC), ordered by bucket.
+
+    Grouping:
+    - groupBy: Count per `user` or per `encounter` (default: all access)
+    - bucket: `hour` or `day`
+
+    Filters:
+    - encounterId: Count one encounter (requires groupBy=encounter or none)
+    - userId: Count one user (requires groupBy=user or none)
+    - dateFrom: Count from this time, rounded down to the hour
+    - dateTo: Count until this time, rounded down to the hour
+
+    Counts are maintained on every audit write, so this does not scan the
+    audit log.
+    """
+    filter = AuditLogFilter(
+        encounter_id=encounter_id,
+        user_id=user_id,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    try:
+        return await db.count_audit_logs(filter, group_by, bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get("/encounters", response_model=list[AuditLogEntry])
 async def list_audit_logs(
+    response: Response,
     user: User = Depends(get_current_user),
-    db: InMemoryDB = Depends(get_db),
+    db: StorageBackend = Depends(get_db),
     encounter_id: str | None = Query(None, alias="encounterId"),
     user_id: str | None = Query(None, alias="userId"),
     date_from: datetime | None = Query(None, alias="dateFrom"),
     date_to: datetime | None = Query(None, alias="dateTo"),
-) -> list[AuditLogEntry]:
-    """List audit logs for PHI access.
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    accept: str | None = Header(None),
+) -> list[AuditLogEntry] | StreamingResponse:
+    """List audit logs for PHI access, ordered by timestamp.
 
     Filters:
     - encounterId: Filter by encounter
     - userId: Filter by user who accessed
     - dateFrom: Filter logs on or after this date
     - dateTo: Filter logs on or before this date
+
+    Pagination:
+    - limit: Maximum number of logs to return
+    - cursor: Value of the X-Next-Cursor header from the previous page
+
+    With `Accept: application/x-ndjson` every match after the cursor (up to
+    limit, if given) is streamed as one JSON object per line.
     """
     filter = AuditLogFilter(
         encounter_id=encounter_id,
@@ -34,4 +88,16 @@ async def list_audit_logs(
         date_from=date_from,
         date_to=date_to,
     )
-    return await db.list_audit_logs(filter)
+    try:
+        if wants_ndjson(accept):
+            return ndjson_response(db.iter_audit_logs(filter, cursor, limit))
+        page = await db.page_audit_logs(filter, limit or DEFAULT_PAGE_SIZE, cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
@@ -1,41 +1,163 @@
 """Encounter endpoints."""
 
+from collections.abc import AsyncIterator
 from datetime import datetime
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
+from pydantic import ValidationError
 
 from app.auth import get_current_user
-from app.db import InMemoryDB, get_db
-from app.models import Encounter, EncounterCreate, EncounterFilter, User
+from app.backend import StorageBackend
+from app.db import get_db
+from app.etag import CACHE_CONTROL, make_etag, none_match
+from app.json_cache import JsonCache, get_json_cache
+from app.models import (
+    Encounter,
+    EncounterBatchItemResult,
+    EncounterBatchResult,
+    EncounterCreate,
+    EncounterFilter,
+    User,
+)
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.streaming import ndjson_response, wants_ndjson
 
 router = APIRouter(prefix="/encounters", tags=["encounters"])
 
+MAX_BATCH_SIZE = 1000
+
+# Longest a change feed request may long-poll, in seconds
+MAX_CHANGE_WAIT_SECONDS = 30
+
+
+def _json_response(content: bytes, headers: dict[str, str] | None = None) -> Response:
+    # Bodies come from the JSON cache, so skip response_model serialization
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def _not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def _parse_fields(fields: str | None) -> frozenset[str] | None:
+    """Map a comma-separated list of camelCase fields to model field names.
+
+    Raises:
+        HTTPException: 400 if a field is not an encounter field.
+    """
+    if fields is None:
+        return None
+    aliases = {
+        info.alias or name: name for name, info in Encounter.model_fields.items()
+    }
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in aliases]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid fields: {', '.join(unknown) or fields!r}",
+        )
+    return frozenset(aliases[field] for field in requested)
+
+
+async def _audit_chunks(
+    chunks: AsyncIterator[list[Encounter]], db: StorageBackend, user: User
+) -> AsyncIterator[list[Encounter]]:
+    """Log PHI access for each chunk before it is sent."""
+    async for chunk in chunks:
+        await db.create_audit_logs((e.encounter_id for e in chunk), user.user_id)
+        yield chunk
+
 
 @router.post("", response_model=Encounter)
 async def create_encounter(
     data: EncounterCreate,
     user: User = Depends(get_current_user),
-    db: InMemoryDB = Depends(get_db),
-) -> Encounter:
+    db: StorageBackend = Depends(get_db),
+    json_cache: JsonCache = Depends(get_json_cache),
+) -> Response:
     """Create a new encounter record.
 
     Returns the created encounter with generated ID.
     """
-    encounter = Encounter(**data.model_dump(), created_by=user.user_id)
-    return await db.create_encounter(encounter)
+    encounter = Encounter.from_create(data, created_by=user.user_id)
+    await db.create_encounter(encounter)
+    return _json_response(json_cache.encounter(encounter))
+
+
+@router.post("/batch", response_model=EncounterBatchResult)
+async def create_encounters_batch(
+    items: list[Any] = Body(
+        ...,
+        max_length=MAX_BATCH_SIZE,
+        # Items are validated one by one below; document them as they are
+        json_schema_extra={"items": {"$ref": "#/components/schemas/EncounterCreate"}},
+    ),
+    user: User = Depends(get_current_user),
+    db: StorageBackend = Depends(get_db),
+) -> EncounterBatchResult:
+    """Create up to 1000 encounters in one request.
+
+    Each item is validated independently. Valid items are stored together
+    and invalid ones are reported with their validation errors.
+    """
+    encounters = []
+    results = []
+    for index, item in enumerate(items):
+        try:
+            data = EncounterCreate.model_validate(item)
+        except ValidationError as e:
+            # Only loc/msg: the raw input may contain PHI
+            errors = [{"loc": err["loc"], "msg": err["msg"]} for err in e.errors()]
+            results.append(
+                EncounterBatchItemResult(index=index, status="invalid", errors=errors)
+            )
+            continue
+
+        encounter = Encounter.from_create(data, created_by=user.user_id)
+        encounters.append(encounter)
+        results.append(
+            EncounterBatchItemResult(
+                index=index, status="created", encounter_id=encounter.encounter_id
+            )
+        )
+
+    await db.create_encounters(encounters)
+
+    return EncounterBatchResult(
+        created=len(encounters),
+        failed=len(items) - len(encounters),
+        results=results,
+    )
 
 
 @router.get("", response_model=list[Encounter])
 async def list_encounters(
     user: User = Depends(get_current_user),
-    db: InMemoryDB = Depends(get_db),
+    db: StorageBackend = Depends(get_db),
+    json_cache: JsonCache = Depends(get_json_cache),
     patient_id: str | None = Query(None, alias="patientId"),
     provider_id: str | None = Query(None, alias="providerId"),
     encounter_type: str | None = Query(None, alias="encounterType"),
     date_from: datetime | None = Query(None, alias="dateFrom"),
     date_to: datetime | None = Query(None, alias="dateTo"),
-) -> list[Encounter]:
-    """List encounters with optional filters.
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    fields: str | None = Query(None),
+    accept: str | None = Header(None),
+    if_none_match: str | None = Header(None),
+) -> Response:
+    """List encounters with optional filters, ordered by encounter date.
 
     Filters:
     - patientId: Filter by patient
@@ -43,6 +165,20 @@ async def list_encounters(
     - encounterType: Filter by type
     - dateFrom: Filter encounters on or after this date
     - dateTo: Filter encounters on or before this date
+
+    Pagination:
+    - limit: Maximum number of encounters to return
+    - cursor: Value of the X-Next-Cursor header from the previous page
+
+    Projection:
+    - fields: Comma-separated camelCase fields to return, e.g.
+      `fields=encounterId,encounterDate,encounterType`
+
+    With `Accept: application/x-ndjson` every match after the cursor (up to
+    limit, if given) is streamed as one JSON object per line.
+
+    Pages carry an ETag that changes whenever any encounter is written;
+    send it back in If-None-Match to get 304 Not Modified instead.
     """
     filter = EncounterFilter(
         patient_id=patient_id,
@@ -51,23 +187,105 @@ async def list_encounters(
         date_from=date_from,
         date_to=date_to,
     )
-    encounters = await db.list_encounters(filter)
+    projection = _parse_fields(fields)
+    try:
+        if wants_ndjson(accept):
+            chunks = db.iter_encounters(filter, cursor, limit, fields=projection)
+            return ndjson_response(
+                _audit_chunks(chunks, db, user),
+                lambda encounter: json_cache.encounter(encounter, projection),
+            )
+        # Read before the page, so the tag is never newer than the page
+        generation = await db.encounter_generation()
+        etag = make_etag(
+            generation,
+            filter.model_dump_json(),
+            limit or DEFAULT_PAGE_SIZE,
+            cursor,
+            sorted(projection or ()),
+        )
+        not_modified = none_match(if_none_match, etag)
+        page = await db.page_encounters(
+            filter,
+            limit or DEFAULT_PAGE_SIZE,
+            cursor,
+            # A 304 needs only the ids, to audit them
+            fields=frozenset({"encounter_id"}) if not_modified else projection,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
 
-    # Log access to PHI for each encounter returned
-    for encounter in encounters:
-        await db.create_audit_log(encounter.encounter_id, user.user_id)
+    # Log access to PHI for each encounter returned. A 304 is logged too:
+    # it confirms the client's copy of these records is current.
+    await db.create_audit_logs((e.encounter_id for e in page.items), user.user_id)
 
-    return encounters
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if not_modified:
+        return _not_modified(headers)
+    return _json_response(json_cache.array(page.items, projection), headers)
+
+
+@router.get("/changes", response_model=list[Encounter])
+async def list_encounter_changes(
+    user: User = Depends(get_current_user),
+    db: StorageBackend = Depends(get_db),
+    json_cache: JsonCache = Depends(get_json_cache),
+    after: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    wait: float = Query(0, ge=0, le=MAX_CHANGE_WAIT_SECONDS),
+    fields: str | None = Query(None),
+) -> Response:
+    """List encounters inserted after a sequence number, in insert order.
+
+    For incremental sync: each response carries X-Last-Sequence, the
+    sequence of its last encounter (or `after` if it is empty); pass it
+    back as `after` to fetch only newer records.
+
+    - after: Sequence number to resume after (0 for the beginning)
+    - limit: Maximum number of encounters to return
+    - wait: If nothing is newer than `after`, wait up to this many seconds
+      for an insert before returning an empty list
+    - fields: Comma-separated camelCase fields to return
+    """
+    projection = _parse_fields(fields)
+    changes = await db.encounter_changes(after, limit, wait, fields=projection)
+
+    # Log access to PHI for each encounter delivered
+    await db.create_audit_logs((e.encounter_id for e in changes.items), user.user_id)
+
+    return _json_response(
+        json_cache.array(changes.items, projection),
+        {"X-Last-Sequence": str(changes.last_sequence)},
+    )
 
 
 @router.get("/{encounter_id}", response_model=Encounter)
 async def get_encounter(
     encounter_id: str,
     user: User = Depends(get_current_user),
-    db: InMemoryDB = Depends(get_db),
-) -> Encounter:
-    """Retrieve a specific encounter by ID."""
-    encounter = await db.get_encounter(encounter_id)
+    db: StorageBackend = Depends(get_db),
+    json_cache: JsonCache = Depends(get_json_cache),
+    fields: str | None = Query(None),
+    if_none_match: str | None = Header(None),
+) -> Response:
+    """Retrieve a specific encounter by ID.
+
+    - fields: Comma-separated camelCase fields to return
+
+    The response ETag is derived from the encounter id, its updated_at and
+    the fields returned; send it back in If-None-Match to get 304 Not
+    Modified instead.
+    """
+    projection = _parse_fields(fields)
+    encounter = await db.get_encounter(
+        encounter_id,
+        fields=projection | {"updated_at"} if projection is not None else None,
+    )
 
     if not encounter:
         raise HTTPException(
@@ -75,7 +293,15 @@ async def get_encounter(
             detail="Encounter not found",
         )
 
-    # Log access to PHI
+    # Log access to PHI, including on 304
     await db.create_audit_log(encounter.encounter_id, user.user_id)
 
-    return encounter
+    etag = make_etag(
+        encounter.encounter_id,
+        encounter.updated_at.isoformat(),
+        sorted(projection or ()),
+    )
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if none_match(if_none_match, etag):
+        return _not_modified(headers)
+    return _json_response(json_cache.encounter(encounter, projection), headers)
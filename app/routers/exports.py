@@ -0,0 +1,79 @@
+"""Bulk export endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.auth import get_current_user
+from app.backend import StorageBackend
+from app.db import get_db
+from app.exports import MEDIA_TYPES, ExportManager, get_export_manager
+from app.models import ExportCreate, ExportJob, User
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+
+async def _get_job(job_id: str, user: User, exports: ExportManager) -> ExportJob:
+    """Return the user's job.
+
+    Raises:
+        HTTPException: 404 if the job does not exist or belongs to another
+            user.
+    """
+    job = await exports.get(job_id)
+    if job is None or job.created_by != user.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found",
+        )
+    return job
+
+
+@router.post("", response_model=ExportJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_export(
+    data: ExportCreate,
+    user: User = Depends(get_current_user),
+    db: StorageBackend = Depends(get_db),
+    exports: ExportManager = Depends(get_export_manager),
+) -> ExportJob:
+    """Start exporting the encounters matching a filter in the background.
+
+    Poll GET /exports/{jobId} for progress; once its status is `completed`
+    the file is available from GET /exports/{jobId}/download. Exported
+    encounters are audited as accessed by the requesting user.
+    """
+    job = ExportJob(format=data.format, filter=data.filter, created_by=user.user_id)
+    return await exports.submit(job, db)
+
+
+@router.get("/{job_id}", response_model=ExportJob)
+async def get_export(
+    job_id: str,
+    user: User = Depends(get_current_user),
+    exports: ExportManager = Depends(get_export_manager),
+) -> ExportJob:
+    """Get an export's status and progress (rows and bytes written so far)."""
+    return await _get_job(job_id, user, exports)
+
+
+@router.get("/{job_id}/download")
+async def download_export(
+    job_id: str,
+    user: User = Depends(get_current_user),
+    exports: ExportManager = Depends(get_export_manager),
+) -> FileResponse:
+    """Download a completed export.
+
+    Only the user who started the export can download it; its encounters
+    were audited when the file was written.
+    """
+    job = await _get_job(job_id, user, exports)
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export is {job.status}",
+        )
+    return FileResponse(
+        exports.output_path(job),
+        media_type=MEDIA_TYPES[job.format],
+        filename=f"encounters-{job.job_id}.{job.format}",
+    )
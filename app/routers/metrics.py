@@ -0,0 +1,30 @@
+"""Prometheus metrics endpoint."""
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app import metrics
+from app.backend import StorageBackend
+from app.db import InMemoryDB, get_db
+from app.logging_pipeline import dropped_records
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(db: StorageBackend = Depends(get_db)) -> PlainTextResponse:
+    """Return service metrics in the Prometheus text format.
+
+    Contains only route templates and counts, never PHI.
+    """
+    for table, count in (await db.record_counts()).items():
+        metrics.DB_RECORDS.set(count, (table,))
+    metrics.LOG_RECORDS_DROPPED.set_total(dropped_records())
+    if isinstance(db, InMemoryDB) and db.wal is not None:
+        metrics.WAL_FSYNCS.set_total(db.wal.fsyncs)
+        metrics.WAL_FSYNC_SECONDS.set_total(db.wal.fsync_seconds)
+        metrics.WAL_RECORDS.set_total(db.wal.records_written)
+
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
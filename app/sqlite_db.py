@@ -0,0 +1,504 @@
+"""SQLite storage backend for encounters and audit logs."""
+
+import asyncio
+import json
+import sqlite3
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from queue import SimpleQueue
+from typing import Any, TypeVar
+from uuid import uuid4
+
+from pydantic import SecretStr
+
+from app.audit_counts import HOUR_MICROS, Dimension
+from app.backend import SortKey, StorageBackend, date_bounds
+from app.indexes import from_micros, to_micros
+from app.models import AuditLogEntry, AuditLogFilter, Encounter, EncounterFilter
+from app.packed_json import PackedJson
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS encounters (
+    encounter_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    created_by TEXT NOT NULL,
+    patient_id TEXT NOT NULL,
+    clinical_data TEXT NOT NULL,
+    provider_id TEXT NOT NULL,
+    encounter_date TEXT NOT NULL,
+    date_key INTEGER NOT NULL,
+    encounter_type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS encounters_by_date
+    ON encounters (date_key, encounter_id);
+CREATE INDEX IF NOT EXISTS encounters_by_patient
+    ON encounters (patient_id, date_key, encounter_id);
+CREATE INDEX IF NOT EXISTS encounters_by_provider
+    ON encounters (provider_id, date_key, encounter_id);
+CREATE INDEX IF NOT EXISTS encounters_by_type
+    ON encounters (encounter_type, date_key, encounter_id);
+
+CREATE TABLE IF NOT EXISTS audit_logs (
+    row_id INTEGER PRIMARY KEY,
+    audit_id TEXT NOT NULL,
+    encounter_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audit_logs_by_time
+    ON audit_logs (timestamp, row_id);
+CREATE INDEX IF NOT EXISTS audit_logs_by_encounter
+    ON audit_logs (encounter_id, timestamp, row_id);
+CREATE INDEX IF NOT EXISTS audit_logs_by_user
+    ON audit_logs (user_id, timestamp, row_id);
+
+-- Bumped by every encounter write so list responses can be validated
+-- without reading them; seeded randomly so a recreated file never reuses
+-- an old value
+CREATE TABLE IF NOT EXISTS encounter_generation (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO encounter_generation VALUES (0, random());
+CREATE TRIGGER IF NOT EXISTS encounters_generation AFTER INSERT ON encounters
+BEGIN
+    UPDATE encounter_generation SET value = value + 1;
+END;
+"""
+
+# Hourly access counts kept up to date by a trigger on audit_logs, so they
+# stay consistent across every process writing to the file
+_AUDIT_COUNTS_SCHEMA = (
+    """
+    CREATE TABLE audit_counts (
+        dimension TEXT NOT NULL,
+        key TEXT NOT NULL,
+        hour INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (dimension, hour, key)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE TRIGGER audit_logs_count AFTER INSERT ON audit_logs
+    BEGIN
+        INSERT INTO audit_counts
+            VALUES ('all', '', NEW.timestamp / {HOUR_MICROS}, 1)
+            ON CONFLICT DO UPDATE SET count = count + 1;
+        INSERT INTO audit_counts
+            VALUES ('user', NEW.user_id, NEW.timestamp / {HOUR_MICROS}, 1)
+            ON CONFLICT DO UPDATE SET count = count + 1;
+        INSERT INTO audit_counts
+            VALUES ('encounter', NEW.encounter_id, NEW.timestamp / {HOUR_MICROS}, 1)
+            ON CONFLICT DO UPDATE SET count = count + 1;
+    END
+    """,
+    # Backfill rows written before the table existed
+    *(
+        f"""
+        INSERT INTO audit_counts
+            SELECT '{dimension}', {column}, timestamp / {HOUR_MICROS} AS hour, COUNT(*)
+            FROM audit_logs GROUP BY {column}, hour
+        """
+        for dimension, column in (
+            ("all", "''"),
+            ("user", "user_id"),
+            ("encounter", "encounter_id"),
+        )
+    ),
+)
+
+# Change feed sequence numbers, assigned in commit order by a trigger (writes
+# are serialized, so max + 1 never races). Existing rows are numbered in
+# rowid order when the column is added.
+_ENCOUNTER_SEQUENCE_SCHEMA = (
+    "ALTER TABLE encounters ADD COLUMN seq INTEGER",
+    "UPDATE encounters SET seq = rowid",
+    "CREATE UNIQUE INDEX encounters_by_seq ON encounters (seq)",
+    """
+    CREATE TRIGGER encounters_sequence AFTER INSERT ON encounters
+    BEGIN
+        UPDATE encounters
+            SET seq = (SELECT coalesce(max(seq), 0) + 1 FROM encounters)
+            WHERE rowid = NEW.rowid;
+    END
+    """,
+)
+
+_ENCOUNTER_COLUMNS = (
+    "encounter_id, created_at, updated_at, created_by, patient_id, "
+    "clinical_data, provider_id, encounter_date, date_key, encounter_type"
+)
+_INSERT_ENCOUNTER = (
+    f"INSERT INTO encounters ({_ENCOUNTER_COLUMNS}) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_AUDIT_LOG = (
+    "INSERT INTO audit_logs (audit_id, encounter_id, user_id, timestamp) "
+    "VALUES (?, ?, ?, ?)"
+)
+
+
+def _encounter_row(encounter: Encounter) -> tuple:
+    return (
+        encounter.encounter_id,
+        encounter.created_at.isoformat(),
+        encounter.updated_at.isoformat(),
+        encounter.created_by,
+        encounter.patient_id.get_secret_value(),
+        json.dumps(encounter.clinical_data),
+        encounter.provider_id,
+        encounter.encounter_date.isoformat(),
+        to_micros(encounter.encounter_date),
+        encounter.encounter_type,
+    )
+
+
+# Encounter fields in column order, and how to decode stored values
+_ENCOUNTER_FIELDS = (
+    "encounter_id",
+    "created_at",
+    "updated_at",
+    "created_by",
+    "patient_id",
+    "clinical_data",
+    "provider_id",
+    "encounter_date",
+    "encounter_type",
+)
+_DECODERS: dict[str, Callable[[Any], Any]] = {
+    "created_at": datetime.fromisoformat,
+    "updated_at": datetime.fromisoformat,
+    "patient_id": SecretStr,
+    "clinical_data": lambda value: PackedJson(value.encode()),
+    "encounter_date": datetime.fromisoformat,
+}
+
+
+def _select_columns(fields: frozenset[str] | None) -> list[str]:
+    """Return the columns to read: the sort key, then the requested fields."""
+    return [
+        "date_key",
+        "encounter_id",
+        *(
+            field
+            for field in _ENCOUNTER_FIELDS[1:]
+            if fields is None or field in fields
+        ),
+    ]
+
+
+def _row_encounter(columns: list[str], row: tuple) -> Encounter:
+    """Rebuild a stored encounter without re-running validation.
+
+    Only the selected columns are decoded; clinical_data is left as JSON
+    and decoded only if a response reads it.
+    """
+    values = {
+        column: _DECODERS[column](value) if column in _DECODERS else value
+        for column, value in zip(columns[1:], row[1:])
+    }
+    return Encounter.model_construct(**values)
+
+
+def _keyset_query(
+    table: str,
+    columns: str,
+    conditions: list[str],
+    params: list[Any],
+    order: tuple[str, str],
+    after: SortKey | None,
+    limit: int | None,
+) -> tuple[str, list[Any]]:
+    """Build a keyset-paginated SELECT ordered by the (key, tiebreak) columns."""
+    conditions = list(conditions)
+    params = list(params)
+    if after is not None:
+        conditions.append(f"({order[0]}, {order[1]}) > (?, ?)")
+        params.extend(after)
+    sql = f"SELECT {columns} FROM {table}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {order[0]}, {order[1]}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+class SQLiteDB(StorageBackend):
+    """SQLite-backed storage shared by every process that opens the same file.
+
+    Queries run on a dedicated thread pool, each thread borrowing a
+    connection from a fixed pool, so blocking I/O never runs on the event
+    loop. The database uses WAL journaling so readers do not block the
+    writer. ``path`` must be a file: each pooled connection to
+    ``:memory:`` would see a separate database.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="sqlite"
+        )
+        self._pool: SimpleQueue[sqlite3.Connection] = SimpleQueue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect(path))
+
+        conn = self._pool.get()
+        try:
+            conn.executescript(_SCHEMA)
+            self._create_if_missing(conn, "audit_counts", _AUDIT_COUNTS_SCHEMA)
+            self._create_if_missing(
+                conn, "encounters_by_seq", _ENCOUNTER_SEQUENCE_SCHEMA
+            )
+        finally:
+            self._pool.put(conn)
+        self._pool_size = pool_size
+
+    @staticmethod
+    def _create_if_missing(
+        conn: sqlite3.Connection, name: str, statements: Iterable[str]
+    ) -> None:
+        """Run ``statements`` if the file has no schema object ``name`` yet.
+
+        Migrates files that predate a table or column. Runs in one immediate
+        transaction, so concurrent workers opening the same file migrate it
+        once.
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = ?", (name,)
+            ).fetchone()
+            if not exists:
+                for statement in statements:
+                    conn.execute(statement)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run ``fn`` in a transaction on a pooled connection off the loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._with_connection, fn)
+
+    def _with_connection(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        conn = self._pool.get()
+        try:
+            with conn:
+                return fn(conn)
+        finally:
+            self._pool.put(conn)
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for _ in range(self._pool_size):
+            self._pool.get().close()
+
+    async def record_counts(self) -> dict[str, int]:
+        # Rows are never deleted, so the highest sequence and row id are the
+        # counts; each is one index seek where COUNT(*) scans the table
+        sql = (
+            "SELECT (SELECT max(seq) FROM encounters), "
+            "(SELECT max(row_id) FROM audit_logs)"
+        )
+
+        def count(conn: sqlite3.Connection) -> dict[str, int]:
+            encounters, audit_logs = conn.execute(sql).fetchone()
+            return {"encounters": encounters or 0, "audit_logs": audit_logs or 0}
+
+        return await self._run(count)
+
+    # Encounters
+
+    async def create_encounter(self, encounter: Encounter) -> Encounter:
+        await self.create_encounters([encounter])
+        return encounter
+
+    async def create_encounters(self, encounters: list[Encounter]) -> list[Encounter]:
+        rows = [_encounter_row(encounter) for encounter in encounters]
+        await self._run(lambda conn: conn.executemany(_INSERT_ENCOUNTER, rows))
+        return encounters
+
+    async def latest_sequence(self) -> int:
+        row = await self._run(
+            lambda conn: conn.execute("SELECT max(seq) FROM encounters").fetchone()
+        )
+        return row[0] or 0
+
+    async def _fetch_changes(
+        self, after: int, limit: int, fields: frozenset[str] | None = None
+    ) -> list[tuple[int, Encounter]]:
+        columns = ["seq", *_select_columns(fields)[1:]]
+        sql = (
+            f"SELECT {', '.join(columns)} FROM encounters "
+            "WHERE seq > ? ORDER BY seq LIMIT ?"
+        )
+        rows = await self._run(
+            lambda conn: conn.execute(sql, (after, limit)).fetchall()
+        )
+        return [(row[0], _row_encounter(columns, row)) for row in rows]
+
+    async def encounter_generation(self) -> str:
+        row = await self._run(
+            lambda conn: conn.execute(
+                "SELECT value FROM encounter_generation"
+            ).fetchone()
+        )
+        return str(row[0])
+
+    async def get_encounter(
+        self, encounter_id: str, fields: frozenset[str] | None = None
+    ) -> Encounter | None:
+        columns = _select_columns(fields)
+        sql = f"SELECT {', '.join(columns)} FROM encounters WHERE encounter_id = ?"
+        row = await self._run(
+            lambda conn: conn.execute(sql, (encounter_id,)).fetchone()
+        )
+        return _row_encounter(columns, row) if row else None
+
+    async def _fetch_encounters(
+        self,
+        filter: EncounterFilter,
+        after: tuple[int, str] | None,
+        limit: int | None,
+        fields: frozenset[str] | None = None,
+    ) -> list[tuple[SortKey, Encounter]]:
+        conditions: list[str] = []
+        params: list[Any] = []
+        for column, value in (
+            ("patient_id", filter.patient_id),
+            ("provider_id", filter.provider_id),
+            ("encounter_type", filter.encounter_type),
+        ):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        lo, hi = date_bounds(filter)
+        if lo is not None:
+            conditions.append("date_key >= ?")
+            params.append(lo)
+        if hi is not None:
+            conditions.append("date_key <= ?")
+            params.append(hi)
+
+        columns = _select_columns(fields)
+        sql, params = _keyset_query(
+            "encounters",
+            ", ".join(columns),
+            conditions,
+            params,
+            ("date_key", "encounter_id"),
+            after,
+            limit,
+        )
+        rows = await self._run(lambda conn: conn.execute(sql, params).fetchall())
+        return [((row[0], row[1]), _row_encounter(columns, row)) for row in rows]
+
+    # Audit logs
+
+    async def create_audit_log(self, encounter_id: str, user_id: str) -> AuditLogEntry:
+        timestamp = datetime.now(timezone.utc)
+        entry = AuditLogEntry(
+            audit_id=str(uuid4()),
+            encounter_id=encounter_id,
+            user_id=user_id,
+            timestamp=timestamp,
+        )
+        row = (entry.audit_id, encounter_id, user_id, to_micros(timestamp))
+        await self._run(lambda conn: conn.execute(_INSERT_AUDIT_LOG, row))
+        return entry
+
+    async def create_audit_logs(
+        self, encounter_ids: Iterable[str], user_id: str
+    ) -> None:
+        key = to_micros(datetime.now(timezone.utc))
+        rows = [
+            (str(uuid4()), encounter_id, user_id, key) for encounter_id in encounter_ids
+        ]
+        if not rows:
+            return
+        await self._run(lambda conn: conn.executemany(_INSERT_AUDIT_LOG, rows))
+
+    async def _fetch_audit_logs(
+        self,
+        filter: AuditLogFilter,
+        after: tuple[int, int] | None,
+        limit: int | None,
+    ) -> list[tuple[SortKey, AuditLogEntry]]:
+        conditions: list[str] = []
+        params: list[Any] = []
+        if filter.encounter_id:
+            conditions.append("encounter_id = ?")
+            params.append(filter.encounter_id)
+        if filter.user_id:
+            conditions.append("user_id = ?")
+            params.append(filter.user_id)
+        lo, hi = date_bounds(filter)
+        if lo is not None:
+            conditions.append("timestamp >= ?")
+            params.append(lo)
+        if hi is not None:
+            conditions.append("timestamp <= ?")
+            params.append(hi)
+
+        sql, params = _keyset_query(
+            "audit_logs",
+            "row_id, audit_id, encounter_id, user_id, timestamp",
+            conditions,
+            params,
+            ("timestamp", "row_id"),
+            after,
+            limit,
+        )
+        rows = await self._run(lambda conn: conn.execute(sql, params).fetchall())
+        return [
+            (
+                (row[4], row[0]),
+                AuditLogEntry.model_construct(
+                    audit_id=row[1],
+                    encounter_id=row[2],
+                    user_id=row[3],
+                    timestamp=from_micros(row[4]),
+                ),
+            )
+            for row in rows
+        ]
+
+    async def _count_audit_logs(
+        self,
+        dimension: Dimension,
+        key: str | None,
+        lo_hour: int | None,
+        hi_hour: int | None,
+        bucket_hours: int,
+    ) -> list[tuple[int, str, int]]:
+        conditions = ["dimension = ?"]
+        params: list[Any] = [dimension]
+        if lo_hour is not None:
+            conditions.append("hour >= ?")
+            params.append(lo_hour)
+        if hi_hour is not None:
+            conditions.append("hour <= ?")
+            params.append(hi_hour)
+        if key is not None:
+            conditions.append("key = ?")
+            params.append(key)
+        sql = (
+            "SELECT hour - hour % ? AS bucket, key, SUM(count) FROM audit_counts "
+            f"WHERE {' AND '.join(conditions)} "
+            "GROUP BY bucket, key ORDER BY bucket, key"
+        )
+        params.insert(0, bucket_hours)
+        return await self._run(lambda conn: conn.execute(sql, params).fetchall())
@@ -0,0 +1,40 @@
+"""Newline-delimited JSON streaming for list endpoints."""
+
+from collections.abc import AsyncIterator, Callable
+
+from fastapi.responses import StreamingResponse
+
+from app.models.base import CamelModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(accept: str | None) -> bool:
+    """Return True if the Accept header asks for NDJSON."""
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept
+
+
+def _dump_json(item: CamelModel) -> bytes:
+    return item.model_dump_json(by_alias=True).encode()
+
+
+async def _ndjson_lines(
+    chunks: AsyncIterator[list[CamelModel]],
+    serialize: Callable[[CamelModel], bytes],
+) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        yield b"".join(serialize(item) + b"\n" for item in chunk)
+
+
+def ndjson_response(
+    chunks: AsyncIterator[list[CamelModel]],
+    serialize: Callable[[CamelModel], bytes] = _dump_json,
+) -> StreamingResponse:
+    """Stream chunks of models as one JSON object per line.
+
+    ``serialize`` turns one model into JSON bytes; by default the model is
+    dumped with camelCase aliases.
+    """
+    return StreamingResponse(
+        _ndjson_lines(chunks, serialize), media_type=NDJSON_MEDIA_TYPE
+    )
@@ -0,0 +1,193 @@
+"""Write-ahead log and snapshots for the in-memory database.
+
+The data directory holds ``snapshot.pkl`` plus numbered log generations
+``wal-<gen>.log``. A snapshot records the first generation it does not
+cover; recovery loads it and replays the later generations in order.
+"""
+
+import asyncio
+import logging
+import os
+import pickle
+import struct
+import time
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Each record is framed as (payload length, crc32) followed by the payload
+_HEADER = struct.Struct("<II")
+_SNAPSHOT_NAME = "snapshot.pkl"
+
+
+def _log_name(gen: int) -> str:
+    return f"wal-{gen:010d}.log"
+
+
+def _log_generations(directory: Path) -> list[int]:
+    return sorted(
+        int(path.name[4:-4])
+        for path in directory.glob("wal-*.log")
+        if path.name[4:-4].isdigit()
+    )
+
+
+def _fsync_dir(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _read_log(path: Path) -> Iterator[Any]:
+    """Yield the records of one log file, truncating a torn tail."""
+    with open(path, "r+b") as f:
+        data = f.read()
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            length, crc = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            payload = data[start : start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            yield pickle.loads(payload)
+            offset = start + length
+        if offset < len(data):
+            logger.warning("Truncating torn tail of %s at byte %d", path, offset)
+            f.truncate(offset)
+
+
+class WriteAheadLog:
+    """Append-only log with group commit.
+
+    ``append`` frames a record and queues it synchronously; awaiting the
+    returned future waits until it is durable. A single flush task writes
+    and fsyncs everything queued since the previous flush, so concurrent
+    writers share one fsync.
+    """
+
+    def __init__(self, directory: Path | str) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        generations = _log_generations(self.directory)
+        # Always start a fresh generation so recovery never appends after
+        # a truncated tail
+        self._gen = generations[-1] + 1 if generations else 0
+        self._files: dict[int, Any] = {}
+        self._pending: list[tuple[int, bytes]] = []
+        self._waiters: list[asyncio.Future] = []
+        self._flush_task: asyncio.Task | None = None
+
+        self.records_written = 0
+        self.fsyncs = 0
+        self.fsync_seconds = 0.0
+
+    @property
+    def generation(self) -> int:
+        return self._gen
+
+    def append(self, record: Any) -> asyncio.Future:
+        """Queue a record and return a future resolved once it is fsynced."""
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        self._pending.append(
+            (self._gen, _HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        )
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_loop())
+        return waiter
+
+    def rotate(self) -> int:
+        """Direct later appends to a new generation and return its number."""
+        self._gen += 1
+        return self._gen
+
+    async def sync(self) -> None:
+        """Wait until everything queued so far is durable."""
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+    async def _flush_loop(self) -> None:
+        try:
+            while self._pending:
+                batch, waiters = self._pending, self._waiters
+                self._pending, self._waiters = [], []
+                try:
+                    await asyncio.to_thread(self._write, batch)
+                except Exception as e:
+                    for waiter in waiters:
+                        waiter.set_exception(e)
+                else:
+                    for waiter in waiters:
+                        waiter.set_result(None)
+        finally:
+            self._flush_task = None
+
+    def _write(self, batch: list[tuple[int, bytes]]) -> None:
+        by_gen: dict[int, list[bytes]] = {}
+        for gen, frame in batch:
+            by_gen.setdefault(gen, []).append(frame)
+
+        for gen, frames in sorted(by_gen.items()):
+            f = self._files.get(gen)
+            if f is None:
+                f = self._files[gen] = open(self.directory / _log_name(gen), "ab")
+            f.write(b"".join(frames))
+            f.flush()
+            start = time.perf_counter()
+            os.fsync(f.fileno())
+            self.fsync_seconds += time.perf_counter() - start
+            self.fsyncs += 1
+            self.records_written += len(frames)
+
+        # Older generations receive no further writes once flushed
+        for gen in [gen for gen in self._files if gen < self._gen]:
+            self._files.pop(gen).close()
+
+    def write_snapshot(self, state: Any, gen: int) -> None:
+        """Durably replace the snapshot and drop the logs it covers.
+
+        ``state`` must reflect every record in generations before ``gen``.
+        Blocking; run it off the event loop.
+        """
+        path = self.directory / _SNAPSHOT_NAME
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(
+                {"gen": gen, "state": state}, f, protocol=pickle.HIGHEST_PROTOCOL
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _fsync_dir(self.directory)
+
+        for old in _log_generations(self.directory):
+            if old < gen:
+                (self.directory / _log_name(old)).unlink()
+
+    def recover(self) -> tuple[Any | None, Iterator[Any]]:
+        """Return the snapshot state (or None) and the records to replay."""
+        path = self.directory / _SNAPSHOT_NAME
+        state, first_gen = None, 0
+        if path.exists():
+            with open(path, "rb") as f:
+                snapshot = pickle.load(f)
+            state, first_gen = snapshot["state"], snapshot["gen"]
+
+        def records() -> Iterator[Any]:
+            for gen in _log_generations(self.directory):
+                if first_gen <= gen < self._gen:
+                    yield from _read_log(self.directory / _log_name(gen))
+
+        return state, records()
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
@@ -0,0 +1,76 @@
+"""Synthetic encounter and audit-log data for benchmarks."""
+
+import random
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+
+from pydantic import SecretStr
+
+from app.backend import StorageBackend
+from app.config import get_settings
+from app.models import Encounter
+
+START_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DAYS = 365
+PROVIDERS = 200
+USERS = 50
+
+
+def patient_ids(size: int) -> list[str]:
+    """Roughly ten encounters per patient."""
+    return [f"PAT-{i:07d}" for i in range(max(1, size // 10))]
+
+
+def generate_encounters(size: int, seed: int = 0) -> Iterator[Encounter]:
+    """Yield ``size`` encounters spread over a year of dates.
+
+    Records are built with ``model_construct``: the values are valid by
+    construction and validating millions of them would dominate setup time.
+    Ids include ``size``, so data sets of different sizes never share an id
+    (and a process-wide JSON cache never serves one size's bodies for
+    another's).
+    """
+    rng = random.Random(seed)
+    patients = patient_ids(size)
+    types = sorted(get_settings().encounter_types)
+    for i in range(size):
+        created = START_DATE + timedelta(seconds=rng.randrange(DAYS * 86400))
+        yield Encounter.model_construct(
+            encounter_id=f"enc-{seed}-{size}-{i:08d}",
+            created_at=created,
+            updated_at=created,
+            created_by=f"user-{rng.randrange(USERS)}",
+            patient_id=SecretStr(rng.choice(patients)),
+            clinical_data={"notes": "x" * rng.randrange(64, 512)},
+            provider_id=f"PRV-{rng.randrange(PROVIDERS):04d}",
+            encounter_date=created - timedelta(days=rng.randrange(30)),
+            encounter_type=rng.choice(types),
+        )
+
+
+async def seed(
+    db: StorageBackend,
+    size: int,
+    audit_per_encounter: int = 2,
+    seed: int = 0,
+    batch_size: int = 5000,
+) -> list[str]:
+    """Load ``size`` encounters plus audit rows into ``db``; return the ids."""
+    rng = random.Random(seed)
+    ids: list[str] = []
+    batch: list[Encounter] = []
+    for encounter in generate_encounters(size, seed):
+        batch.append(encounter)
+        if len(batch) == batch_size:
+            await db.create_encounters(batch)
+            ids.extend(e.encounter_id for e in batch)
+            batch = []
+    if batch:
+        await db.create_encounters(batch)
+        ids.extend(e.encounter_id for e in batch)
+
+    total = len(ids) * audit_per_encounter
+    for start in range(0, total, batch_size):
+        accessed = [rng.choice(ids) for _ in range(min(batch_size, total - start))]
+        await db.create_audit_logs(accessed, f"user-{rng.randrange(USERS)}")
+    return ids
@@ -0,0 +1,262 @@
+"""Load-generation benchmark for the encounter API.
+
+Drives the ASGI app in-process at several data sizes and reports latency
+percentiles, throughput and peak RSS per scenario. Results are written as
+JSON and can be compared against a previous run:
+
+    python -m benchmarks.run --sizes 10000 100000 --output bench_results.json
+    python -m benchmarks.run --baseline bench_results.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from app.app import app
+from app.backend import StorageBackend
+from app.config import get_settings
+from app.db import InMemoryDB, get_db
+from app.sqlite_db import SQLiteDB
+from benchmarks.datagen import DAYS, START_DATE, patient_ids, seed
+
+# A request is (method, url, httpx keyword arguments)
+Request = tuple[str, str, dict[str, Any]]
+Scenario = Callable[[random.Random], Request]
+
+
+def build_scenarios(ids: list[str], size: int) -> dict[str, Scenario]:
+    patients = patient_ids(size)
+    types = sorted(get_settings().encounter_types)
+
+    def create(rng: random.Random) -> Request:
+        day = START_DATE + timedelta(days=rng.randrange(DAYS))
+        payload = {
+            "patientId": rng.choice(patients),
+            "providerId": f"PRV-{rng.randrange(200):04d}",
+            "encounterDate": day.isoformat(),
+            "encounterType": rng.choice(types),
+            "clinicalData": {"notes": "x" * 256},
+        }
+        return "POST", "/encounters", {"json": payload}
+
+    def get_by_id(rng: random.Random) -> Request:
+        return "GET", f"/encounters/{rng.choice(ids)}", {}
+
+    def list_by_patient(rng: random.Random) -> Request:
+        return "GET", "/encounters", {"params": {"patientId": rng.choice(patients)}}
+
+    def list_date_range(rng: random.Random) -> Request:
+        start = START_DATE + timedelta(days=rng.randrange(DAYS - 7))
+        params = {
+            "dateFrom": start.isoformat(),
+            "dateTo": (start + timedelta(days=7)).isoformat(),
+            "limit": 100,
+        }
+        return "GET", "/encounters", {"params": params}
+
+    def audit_by_encounter(rng: random.Random) -> Request:
+        return "GET", "/audit/encounters", {"params": {"encounterId": rng.choice(ids)}}
+
+    def audit_last_24h(rng: random.Random) -> Request:
+        since = datetime.now(timezone.utc) - timedelta(hours=24)
+        params = {"dateFrom": since.isoformat(), "limit": 100}
+        return "GET", "/audit/encounters", {"params": params}
+
+    weighted = [
+        (create, 10),
+        (get_by_id, 50),
+        (list_by_patient, 15),
+        (list_date_range, 10),
+        (audit_by_encounter, 15),
+    ]
+
+    def mixed(rng: random.Random) -> Request:
+        scenario = rng.choices(
+            [s for s, _ in weighted], weights=[w for _, w in weighted]
+        )[0]
+        return scenario(rng)
+
+    return {
+        "create": create,
+        "get_by_id": get_by_id,
+        "list_by_patient": list_by_patient,
+        "list_date_range": list_date_range,
+        "audit_by_encounter": audit_by_encounter,
+        "audit_last_24h": audit_last_24h,
+        "mixed": mixed,
+    }
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> dict[str, float]:
+    rng = random.Random(seed)
+    planned = [scenario(rng) for _ in range(requests)]
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(request: Request) -> None:
+        nonlocal errors
+        method, url, kwargs = request
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(request) for request in planned))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def make_backend(name: str, workdir: Path, size: int) -> StorageBackend:
+    if name == "sqlite":
+        return SQLiteDB(str(workdir / f"bench-{size}.db"))
+    return InMemoryDB()
+
+
+async def run_size(args: argparse.Namespace, size: int, workdir: Path) -> dict:
+    db = make_backend(args.backend, workdir, size)
+    app.dependency_overrides[get_db] = lambda: db
+
+    start = time.perf_counter()
+    ids = await seed(db, size)
+    seed_seconds = time.perf_counter() - start
+
+    api_key = next(iter(get_settings().api_keys))
+    transport = httpx.ASGITransport(app=app)
+    results: dict[str, Any] = {
+        "size": size,
+        "seed_seconds": seed_seconds,
+        "scenarios": {},
+    }
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={"X-API-Key": api_key},
+    ) as client:
+        for name, scenario in build_scenarios(ids, size).items():
+            if args.scenarios and name not in args.scenarios:
+                continue
+            stats = await run_scenario(
+                client, scenario, args.requests, args.concurrency, seed=size
+            )
+            results["scenarios"][name] = stats
+            print(
+                f"size={size:>9} {name:<20} "
+                f"p50={stats['p50_ms']:8.2f}ms p95={stats['p95_ms']:8.2f}ms "
+                f"p99={stats['p99_ms']:8.2f}ms {stats['throughput_rps']:9.1f} req/s"
+            )
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    app.dependency_overrides.clear()
+    await db.close()
+    return results
+
+
+def compare(results: list[dict], baseline_path: Path, tolerance: float) -> list[str]:
+    """Return scenarios whose p95 latency regressed beyond ``tolerance``."""
+    baseline = {
+        (run["size"], name): stats
+        for run in json.loads(baseline_path.read_text())["results"]
+        for name, stats in run["scenarios"].items()
+    }
+    regressions = []
+    for run in results:
+        for name, stats in run["scenarios"].items():
+            before = baseline.get((run["size"], name))
+            if before and stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"size={run['size']} {name}: p95 "
+                    f"{before['p95_ms']:.2f}ms -> {stats['p95_ms']:.2f}ms"
+                )
+    return regressions
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--scenarios", nargs="*", help="Subset of scenarios to run")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--baseline", type=Path, help="Previous results to compare")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed p95 slowdown vs baseline before failing (fraction)",
+    )
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace) -> int:
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sorted(args.sizes):
+            results.append(await run_size(args, size, Path(workdir)))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -1,6 +1,90 @@
-"""Entry point to run server"""
+"""Entry point to run server
+
+python server.py                 # development: one process, auto-reload
+python server.py --production    # multi-worker production mode
+"""
+
+import argparse
+import importlib.util
+import os
 
 import uvicorn
 
+from app.config import get_settings
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Patient Encounter API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Run worker processes without auto-reload",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes in production mode (default: CPU count with "
+        "the sqlite backend, 1 with memory)",
+    )
+    parser.add_argument(
+        "--keep-alive",
+        type=int,
+        default=75,
+        help="Seconds to hold idle connections open; keep above the load "
+        "balancer's idle timeout so it never reuses a closed connection",
+    )
+    parser.add_argument(
+        "--backlog", type=int, default=4096, help="Pending connection queue size"
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=30,
+        help="Seconds to drain in-flight requests on shutdown",
+    )
+    return parser.parse_args(argv)
+
+
+def production_config(args: argparse.Namespace) -> dict:
+    """Return uvicorn options for production mode.
+
+    Raises:
+        SystemExit: If several workers would each keep their own copy of
+            the in-memory store.
+    """
+    workers = args.workers
+    shared = get_settings().storage_backend != "memory"
+    if workers is None:
+        workers = (os.cpu_count() or 1) if shared else 1
+    if workers > 1 and not shared:
+        raise SystemExit(
+            "The memory backend keeps state per process; run one worker or set "
+            "storage_backend: sqlite so all workers share one database"
+        )
+    return {
+        "host": args.host,
+        "port": args.port,
+        "workers": workers,
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+        "timeout_keep_alive": args.keep_alive,
+        "backlog": args.backlog,
+        "timeout_graceful_shutdown": args.graceful_timeout,
+        "proxy_headers": True,
+        # Requests are logged by RequestLoggingMiddleware
+        "access_log": False,
+    }
+
+
 if __name__ == "__main__":
-    uvicorn.run("app.app:app", host="0.0.0.0", port=8000, reload=True)
+    args = parse_args()
+    if args.production:
+        uvicorn.run("app.app:app", **production_config(args))
+    else:
+        uvicorn.run("app.app:app", host=args.host, port=args.port, reload=True)
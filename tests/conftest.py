@@ -0,0 +1,17 @@
+"""Shared test helpers."""
+
+from datetime import datetime, timezone
+
+from app.models import Encounter
+
+
+def make_encounter(**overrides) -> Encounter:
+    """Build a valid encounter, with any fields overridden."""
+    fields = {
+        "patient_id": "PAT-1",
+        "provider_id": "PRV-1",
+        "encounter_date": datetime(2024, 1, 10, tzinfo=timezone.utc),
+        "encounter_type": "follow_up",
+    }
+    fields.update(overrides)
+    return Encounter(**fields)
@@ -1,5 +1,7 @@
 """Integration tests for /audit endpoints."""
 
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -137,6 +139,44 @@ class TestListAuditLogs:
         assert response.status_code == 200
         assert response.json() == []
 
+    def test_pagination(self):
+        """Test that cursors walk the audit log without gaps or repeats."""
+        params = {"userId": "dev-user", "limit": 1}
+        first = client.get("/audit/encounters", headers=HEADERS, params=params)
+        second = client.get(
+            "/audit/encounters",
+            headers=HEADERS,
+            params={**params, "cursor": first.headers["X-Next-Cursor"]},
+        )
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert len(first.json()) == 1
+        assert len(second.json()) == 1
+        assert first.json()[0]["auditId"] != second.json()[0]["auditId"]
+        assert first.json()[0]["timestamp"] <= second.json()[0]["timestamp"]
+
+    def test_ndjson_stream(self):
+        """Test streaming audit logs as NDJSON."""
+        response = client.get(
+            "/audit/encounters",
+            headers={**HEADERS, "Accept": "application/x-ndjson"},
+            params={"encounterId": self.encounter_ids[0]},
+        )
+
+        assert response.status_code == 200
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert len(records) == 1
+        assert records[0]["encounterId"] == self.encounter_ids[0]
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        response = client.get(
+            "/audit/encounters", headers=HEADERS, params={"cursor": "bm90LWpzb24"}
+        )
+
+        assert response.status_code == 400
+
     def test_requires_auth(self):
         """Test that endpoint requires authentication."""
         response = client.get("/audit/encounters")
@@ -148,3 +188,59 @@ class TestListAuditLogs:
         response = client.get("/audit/encounters", headers={"X-API-Key": "wrong-key"})
 
         assert response.status_code == 401
+
+
+class TestCountAuditLogs:
+    """Tests for GET /audit/encounters/counts."""
+
+    @pytest.fixture(autouse=True)
+    def seed_audit_logs(self):
+        """Create an encounter and read it twice."""
+        resp = client.post(
+            "/encounters",
+            headers=HEADERS,
+            json={
+                "patientId": "PAT-COUNT-1",
+                "providerId": "PRV-001",
+                "encounterDate": "2024-01-10T10:00:00Z",
+                "encounterType": "follow_up",
+            },
+        )
+        self.encounter_id = resp.json()["encounterId"]
+        for _ in range(2):
+            client.get(f"/encounters/{self.encounter_id}", headers=HEADERS)
+
+    def test_counts_by_encounter(self):
+        """Test that an encounter's accesses are counted in one bucket."""
+        response = client.get(
+            "/audit/encounters/counts",
+            headers=HEADERS,
+            params={"groupBy": "encounter", "encounterId": self.encounter_id},
+        )
+
+        assert response.status_code == 200
+        (count,) = response.json()
+        assert count["encounterId"] == self.encounter_id
+        assert count["count"] == 2
+        assert count["bucketStart"].endswith("T00:00:00Z")
+
+    def test_totals_match_log(self):
+        """Test that ungrouped counts add up to the raw audit log."""
+        counts = client.get(
+            "/audit/encounters/counts", headers=HEADERS, params={"bucket": "hour"}
+        ).json()
+        logs = client.get(
+            "/audit/encounters", headers=HEADERS, params={"limit": 1000}
+        ).json()
+
+        assert sum(c["count"] for c in counts) == len(logs)
+
+    def test_cross_filter_rejected(self):
+        """Test that filtering on the ungrouped dimension returns 400."""
+        response = client.get(
+            "/audit/encounters/counts",
+            headers=HEADERS,
+            params={"groupBy": "user", "encounterId": self.encounter_id},
+        )
+
+        assert response.status_code == 400
@@ -0,0 +1,80 @@
+"""Unit tests for incremental audit counters."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.audit_counts import HOUR_MICROS, AuditCounters
+from app.indexes import to_micros
+
+JAN_1_0900 = to_micros(datetime(2024, 1, 1, 9, 15, tzinfo=timezone.utc))
+JAN_1_1000 = to_micros(datetime(2024, 1, 1, 10, 5, tzinfo=timezone.utc))
+JAN_2_0900 = to_micros(datetime(2024, 1, 2, 9, 0, tzinfo=timezone.utc))
+JAN_1 = JAN_1_0900 // HOUR_MICROS - 9
+
+
+@pytest.fixture
+def counters() -> AuditCounters:
+    counters = AuditCounters()
+    counters.add(["enc-1", "enc-2"], "user-1", JAN_1_0900)
+    counters.add(["enc-1"], "user-2", JAN_1_1000)
+    counters.add(["enc-1"], "user-1", JAN_2_0900)
+    counters.add([], "user-3", JAN_2_0900)
+    return counters
+
+
+class TestAuditCounters:
+    """Tests for AuditCounters add/query."""
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            pytest.param(
+                ("all", None, None, None, 24),
+                [(JAN_1, "", 3), (JAN_1 + 24, "", 1)],
+                id="all_by_day",
+            ),
+            pytest.param(
+                ("user", None, None, None, 24),
+                [(JAN_1, "user-1", 2), (JAN_1, "user-2", 1), (JAN_1 + 24, "user-1", 1)],
+                id="user_by_day",
+            ),
+            pytest.param(
+                ("encounter", "enc-1", None, None, 1),
+                [
+                    (JAN_1 + 9, "enc-1", 1),
+                    (JAN_1 + 10, "enc-1", 1),
+                    (JAN_1 + 33, "enc-1", 1),
+                ],
+                id="one_encounter_by_hour",
+            ),
+            pytest.param(
+                ("all", None, JAN_1 + 10, JAN_1 + 10, 1),
+                [(JAN_1 + 10, "", 1)],
+                id="hour_range",
+            ),
+        ],
+    )
+    def test_query(self, counters, query, expected):
+        """Test that hourly counters roll up into the requested buckets."""
+        assert counters.query(*query) == expected
+
+    def test_state_round_trip(self, counters):
+        """Test that counters restored from a snapshot answer the same."""
+        restored = AuditCounters.from_state(counters.state())
+
+        assert restored.query("user", None, None, None, 1) == counters.query(
+            "user", None, None, None, 1
+        )
+
+    def test_counts_only_given_dimensions(self):
+        """Test that dimensions left out are neither counted nor restored."""
+        counters = AuditCounters(("all", "user"))
+        counters.add(["enc-1", "enc-2"], "user-1", JAN_1_0900)
+
+        restored = AuditCounters.from_state(counters.state())
+
+        assert list(restored.state()) == ["all", "user"]
+        assert restored.query("all", None, None, None, 24) == [(JAN_1, "", 2)]
+        with pytest.raises(KeyError):
+            restored.query("encounter", None, None, None, 24)
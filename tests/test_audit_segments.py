@@ -0,0 +1,149 @@
+"""Unit tests for time-partitioned audit log segments."""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.audit_counts import HOUR_MICROS
+from app.audit_segments import SegmentedAuditLog
+from app.indexes import to_micros
+
+DAY_1 = to_micros(datetime(2024, 1, 1, 12, tzinfo=timezone.utc))
+DAY_2 = to_micros(datetime(2024, 1, 2, 12, tzinfo=timezone.utc))
+DAY_3 = to_micros(datetime(2024, 1, 3, 12, tzinfo=timezone.utc))
+DAY_1_HOUR = DAY_1 // HOUR_MICROS
+
+# (encounter_ids, user_id, timestamp) appended in order, as a log would be
+RECORDS = [
+    (["enc-1", "enc-2"], "user-1", DAY_1),
+    (["enc-1"], "user-2", DAY_1 + 1),
+    (["enc-3"], "user-1", DAY_2),
+    (["enc-1", "enc-3"], "user-2", DAY_3),
+]
+
+
+def fetch(log: SegmentedAuditLog, **kwargs):
+    query = {
+        "encounter_id": None,
+        "user_id": None,
+        "lo": None,
+        "hi": None,
+        "after": None,
+        "limit": None,
+    }
+    query.update(kwargs)
+    return asyncio.run(log.fetch(**query))
+
+
+@pytest.fixture
+def log(tmp_path) -> SegmentedAuditLog:
+    log = SegmentedAuditLog(tmp_path)
+    for encounter_ids, user_id, timestamp in RECORDS:
+        log.append(encounter_ids, user_id, timestamp)
+    asyncio.run(log.write_sealed())
+    return log
+
+
+class TestSegmentedAuditLog:
+    """Tests for segment rollover, pruning and recovery."""
+
+    def test_seals_past_days_to_disk(self, log, tmp_path):
+        """Test that only the active day stays in memory."""
+        assert len(list(tmp_path.glob("audit-*.seg"))) == 2
+        assert not log.has_sealed
+        assert len(log) == 6
+
+    def test_fetch_spans_segments_in_order(self, log):
+        """Test that rows from disk and memory merge in time order."""
+        rows = fetch(log)
+
+        assert [key[1] for key, _ in rows] == [0, 1, 2, 3, 4, 5]
+        assert [entry.encounter_id for _, entry in rows] == [
+            "enc-1",
+            "enc-2",
+            "enc-1",
+            "enc-3",
+            "enc-1",
+            "enc-3",
+        ]
+
+    @pytest.mark.parametrize(
+        "query,expected_rows,opened",
+        [
+            pytest.param({"lo": DAY_3}, [4, 5], 0, id="date_prunes_files"),
+            pytest.param({"encounter_id": "enc-2"}, [1], 2, id="encounter"),
+            pytest.param({"user_id": "user-2", "hi": DAY_2}, [2], 2, id="both"),
+            pytest.param({"after": (DAY_1 + 1, 2), "limit": 1}, [3], 1, id="cursor"),
+        ],
+    )
+    def test_fetch_prunes(self, log, query, expected_rows, opened):
+        """Test that filters skip segment files that cannot match."""
+        rows = fetch(log, **query)
+
+        assert [key[1] for key, _ in rows] == expected_rows
+        assert len(log._readers) == opened
+
+    def test_fetch_reads_files_in_place(self, log, tmp_path):
+        """Test that sealed rows are read through the file's own indexes."""
+        reopened = SegmentedAuditLog(tmp_path)
+
+        rows = fetch(reopened, encounter_id="enc-1", lo=DAY_1 + 1)
+
+        assert [key for key, _ in rows] == [(DAY_1 + 1, 2)]
+        assert rows[0][1].user_id == "user-2"
+        assert not fetch(reopened, encounter_id="enc-9")
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            pytest.param(
+                (None, None, None, 24),
+                [
+                    (DAY_1_HOUR - 12, "enc-1", 2),
+                    (DAY_1_HOUR - 12, "enc-2", 1),
+                    (DAY_1_HOUR + 12, "enc-3", 1),
+                    (DAY_1_HOUR + 36, "enc-1", 1),
+                    (DAY_1_HOUR + 36, "enc-3", 1),
+                ],
+                id="all_by_day",
+            ),
+            pytest.param(
+                ("enc-3", DAY_1_HOUR + 1, None, 1),
+                [(DAY_1_HOUR + 24, "enc-3", 1), (DAY_1_HOUR + 48, "enc-3", 1)],
+                id="one_encounter_from_hour",
+            ),
+            pytest.param(("enc-9", None, None, 1), [], id="unknown_encounter"),
+        ],
+    )
+    def test_counts_encounters(self, log, query, expected):
+        """Test that encounter counts merge segment files and memory."""
+        assert asyncio.run(log.count_encounters(*query)) == expected
+        assert list(log._active.counts.state()["encounter"]) == [DAY_1_HOUR + 48]
+
+    def test_reopen_reads_sealed_segments(self, log, tmp_path):
+        """Test that sealed history stays queryable from a new instance."""
+        reopened = SegmentedAuditLog(tmp_path)
+
+        assert [key[1] for key, _ in fetch(reopened)] == [0, 1, 2, 3]
+        assert len(reopened) == 4
+
+    def test_replay_skips_rows_on_disk(self, log, tmp_path):
+        """Test that replaying a full log does not duplicate sealed rows."""
+        recovered = SegmentedAuditLog(tmp_path)
+        recovered.restore(None)
+        for encounter_ids, user_id, timestamp in RECORDS:
+            recovered.append(encounter_ids, user_id, timestamp)
+        recovered.finish_recovery()
+
+        assert [key for key, _ in fetch(recovered)] == [key for key, _ in fetch(log)]
+        assert len(recovered) == 6
+
+    def test_without_directory_keeps_one_segment(self):
+        """Test that nothing is sealed when no directory is configured."""
+        log = SegmentedAuditLog()
+        for encounter_ids, user_id, timestamp in RECORDS:
+            log.append(encounter_ids, user_id, timestamp)
+
+        assert not log.has_sealed
+        assert len(fetch(log)) == 6
@@ -0,0 +1,58 @@
+"""Unit tests for the columnar audit log store."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.audit_store import AuditLogStore
+from app.indexes import to_micros
+
+JAN_10 = to_micros(datetime(2024, 1, 10, tzinfo=timezone.utc))
+JAN_20 = to_micros(datetime(2024, 1, 20, tzinfo=timezone.utc))
+JAN_30 = to_micros(datetime(2024, 1, 30, tzinfo=timezone.utc))
+
+
+@pytest.fixture
+def store() -> AuditLogStore:
+    store = AuditLogStore()
+    store.append(["enc-1", "enc-2"], "user-1", JAN_20)
+    store.append(["enc-1"], "user-2", JAN_30)
+    store.append(["enc-2"], "user-2", JAN_10)  # out of order
+    return store
+
+
+class TestAuditLogStore:
+    """Tests for AuditLogStore append/scan/entry."""
+
+    def test_entry_round_trip(self, store):
+        """Test that a row materializes with its original values."""
+        entry = store.entry(0)
+
+        assert entry.encounter_id == "enc-1"
+        assert entry.user_id == "user-1"
+        assert entry.timestamp == datetime(2024, 1, 20, tzinfo=timezone.utc)
+        assert len(entry.audit_id) == 36
+
+    @pytest.mark.parametrize(
+        "scan_kwargs,expected_rows",
+        [
+            pytest.param({}, [3, 0, 1, 2], id="all_in_time_order"),
+            pytest.param({"encounter_id": "enc-1"}, [0, 2], id="encounter"),
+            pytest.param({"user_id": "user-2"}, [3, 2], id="user"),
+            pytest.param(
+                {"encounter_id": "enc-2", "user_id": "user-2"}, [3], id="both"
+            ),
+            pytest.param({"lo": JAN_20, "hi": JAN_20}, [0, 1], id="range"),
+            pytest.param(
+                {"encounter_id": "enc-1", "lo": JAN_30}, [2], id="range_and_id"
+            ),
+            pytest.param({"user_id": "unknown"}, [], id="unknown_id"),
+        ],
+    )
+    def test_scan(self, store, scan_kwargs, expected_rows):
+        """Test that scan yields matching rows in timestamp order."""
+        assert list(store.scan(**scan_kwargs)) == expected_rows
+
+    def test_scan_after(self, store):
+        """Test that scanning resumes strictly after a cursor position."""
+        assert list(store.scan(after=store.sort_key(0))) == [1, 2]
@@ -0,0 +1,116 @@
+"""Unit tests for API key authentication and settings reload."""
+
+import asyncio
+import os
+
+import pytest
+
+from app import config
+from app.auth import KeyStore, get_key_store, hash_api_key
+
+
+@pytest.fixture
+def config_files(tmp_path, monkeypatch):
+    """Point settings at temporary .env and config.yml files."""
+    dotenv = tmp_path / ".env"
+    config_yml = tmp_path / "config.yml"
+    dotenv.write_text("API_KEYS=key-1:user-1:One\n")
+    config_yml.write_text("encounter_types: [follow_up]\n")
+    monkeypatch.setattr(config, "DOTENV_PATH", dotenv)
+    monkeypatch.setattr(config, "CONFIG_PATH", config_yml)
+    monkeypatch.setattr(config, "_settings", None)
+    monkeypatch.setattr(config, "_dotenv_keys", set())
+    monkeypatch.setenv("API_KEYS", "")
+    config.reload_settings()
+    yield dotenv, config_yml
+    # Variables copied in from the test .env are not undone by monkeypatch
+    for key in config._dotenv_keys:
+        os.environ.pop(key, None)
+
+
+class TestKeyStore:
+    """Tests for KeyStore lookups."""
+
+    def test_lookup(self):
+        """Test that known keys map to prebuilt users and others miss."""
+        store = KeyStore({"secret": {"user_id": "u1", "name": "User One"}})
+
+        user = store.lookup("secret")
+
+        assert user.user_id == "u1"
+        assert store.lookup("secret") is user
+        assert store.lookup("other") is None
+
+    def test_stores_only_hashes(self):
+        """Test that plaintext keys are not retained."""
+        store = KeyStore({"secret": {"user_id": "u1", "name": "User One"}})
+
+        assert list(store._users) == [hash_api_key("secret")]
+
+
+class TestReloadSettings:
+    """Tests for reloading API keys and config from disk."""
+
+    def test_rotated_key_applies(self, config_files):
+        """Test that a key rotated in .env is honoured after reload."""
+        dotenv, _ = config_files
+        assert get_key_store().lookup("key-1").user_id == "user-1"
+
+        dotenv.write_text("API_KEYS=key-2:user-2:Two\n")
+        config.reload_settings()
+
+        assert get_key_store().lookup("key-1") is None
+        assert get_key_store().lookup("key-2").user_id == "user-2"
+
+    def test_removed_key_revoked(self, config_files):
+        """Test that deleting API_KEYS from .env falls back to config.yml."""
+        dotenv, config_yml = config_files
+        config_yml.write_text("api_keys:\n  key-3: {user_id: user-3, name: Three}\n")
+
+        dotenv.write_text("LOG_LEVEL=INFO\n")
+        config.reload_settings()
+
+        assert get_key_store().lookup("key-1") is None
+        assert get_key_store().lookup("key-3").user_id == "user-3"
+
+    def test_invalid_config_keeps_previous(self, config_files):
+        """Test that a bad config.yml leaves the current settings in place."""
+        _, config_yml = config_files
+        before = config.get_settings()
+
+        config_yml.write_text("sqlite_pool_size: 0\n")
+        with pytest.raises(ValueError):
+            config.reload_settings()
+
+        assert config.get_settings() is before
+
+    def test_invalid_dotenv_keeps_environment(self, config_files):
+        """Test that .env values are only applied once the settings are valid."""
+        dotenv, _ = config_files
+
+        dotenv.write_text("API_KEYS=key-2:user-2:Two\nSQLITE_POOL_SIZE=0\n")
+        with pytest.raises(ValueError):
+            config.reload_settings()
+
+        assert os.environ["API_KEYS"] == "key-1:user-1:One"
+        assert "SQLITE_POOL_SIZE" not in os.environ
+        assert config._dotenv_keys == {"API_KEYS"}
+        assert get_key_store().lookup("key-1").user_id == "user-1"
+
+    def test_watch_config_reloads_on_change(self, config_files):
+        """Test that the watcher picks up an edited config.yml."""
+        _, config_yml = config_files
+
+        async def edit_and_watch():
+            watcher = asyncio.create_task(config.watch_config(0.01))
+            await asyncio.sleep(0.05)
+            config_yml.write_text("encounter_types: [discharge]\n")
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if "discharge" in config.get_settings().encounter_types:
+                    break
+            watcher.cancel()
+
+        asyncio.run(edit_and_watch())
+
+        assert config.get_settings().encounter_types == frozenset({"discharge"})
@@ -0,0 +1,388 @@
+"""Unit tests for the storage backends."""
+
+import asyncio
+import sqlite3
+from collections.abc import Iterator
+from datetime import datetime, timezone
+
+import pytest
+
+from app.backend import StorageBackend
+from app.db import InMemoryDB
+from app.packed_json import PackedJson
+from app.sqlite_db import SQLiteDB
+from app.models import AuditLogFilter, EncounterFilter
+from tests.conftest import make_encounter
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def empty_db(request, tmp_path) -> Iterator[StorageBackend]:
+    if request.param == "sqlite":
+        db = SQLiteDB(str(tmp_path / "test.db"), pool_size=2)
+        yield db
+        asyncio.run(db.close())
+    else:
+        yield InMemoryDB()
+
+
+@pytest.fixture
+def db(empty_db) -> StorageBackend:
+    db = empty_db
+    encounters = [
+        make_encounter(patient_id="PAT-A", provider_id="PRV-1"),
+        make_encounter(patient_id="PAT-A", provider_id="PRV-2"),
+        make_encounter(
+            patient_id="PAT-B",
+            provider_id="PRV-1",
+            encounter_type="initial_assessment",
+        ),
+    ]
+    for encounter in encounters:
+        asyncio.run(db.create_encounter(encounter))
+    return db
+
+
+class TestListEncounters:
+    """Tests for list_encounters index lookups."""
+
+    @pytest.mark.parametrize(
+        "filter_kwargs,expected",
+        [
+            pytest.param({}, 3, id="no_filter"),
+            pytest.param({"patient_id": "PAT-A"}, 2, id="patient"),
+            pytest.param({"provider_id": "PRV-1"}, 2, id="provider"),
+            pytest.param({"encounter_type": "follow_up"}, 2, id="type"),
+            pytest.param(
+                {"patient_id": "PAT-A", "provider_id": "PRV-1"}, 1, id="intersect"
+            ),
+            pytest.param(
+                {"patient_id": "PAT-B", "encounter_type": "follow_up"},
+                0,
+                id="disjoint",
+            ),
+            pytest.param({"patient_id": "PAT-NONE"}, 0, id="unknown_value"),
+        ],
+    )
+    def test_filter(self, db, filter_kwargs, expected):
+        """Test that index intersection matches the requested filters."""
+        results = asyncio.run(db.list_encounters(EncounterFilter(**filter_kwargs)))
+
+        assert len(results) == expected
+        for encounter in results:
+            for key, value in filter_kwargs.items():
+                actual = getattr(encounter, key)
+                if key == "patient_id":
+                    actual = actual.get_secret_value()
+                assert actual == value
+
+    def test_date_range_out_of_order_inserts(self, empty_db):
+        """Test that range queries see out-of-order inserts in date order."""
+        db = empty_db
+        for day in (20, 5, 15, 10, 25):
+            encounter = make_encounter(
+                encounter_date=datetime(2024, 1, day, tzinfo=timezone.utc)
+            )
+            asyncio.run(db.create_encounter(encounter))
+
+        filter = EncounterFilter(
+            date_from=datetime(2024, 1, 10, tzinfo=timezone.utc),
+            date_to=datetime(2024, 1, 20, tzinfo=timezone.utc),
+        )
+        results = asyncio.run(db.list_encounters(filter))
+
+        assert [e.encounter_date.day for e in results] == [10, 15, 20]
+
+    @pytest.mark.parametrize(
+        "filter_kwargs,expected",
+        [
+            pytest.param(
+                {"patient_id": "PAT-A", "date_from": "2024-02-01T00:00:00Z"},
+                1,
+                id="range_drives",
+            ),
+            pytest.param(
+                {"patient_id": "PAT-B", "date_to": "2024-02-01T00:00:00Z"},
+                2,
+                id="bucket_drives",
+            ),
+        ],
+    )
+    def test_date_range_combined_with_index(self, db, filter_kwargs, expected):
+        """Test range and hash filters combine whichever index drives."""
+        late = make_encounter(
+            patient_id="PAT-A",
+            encounter_date=datetime(2024, 3, 1, tzinfo=timezone.utc),
+        )
+        asyncio.run(db.create_encounter(late))
+        asyncio.run(db.create_encounter(make_encounter(patient_id="PAT-B")))
+
+        results = asyncio.run(db.list_encounters(EncounterFilter(**filter_kwargs)))
+
+        assert len(results) == expected
+        assert all(
+            e.patient_id.get_secret_value() == filter_kwargs["patient_id"]
+            for e in results
+        )
+
+    def test_iter_encounters_chunks(self, db):
+        """Test that chunked iteration resumes without gaps or repeats."""
+
+        async def collect():
+            return [chunk async for chunk in db.iter_encounters(chunk_size=2)]
+
+        chunks = asyncio.run(collect())
+
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        ids = [e.encounter_id for chunk in chunks for e in chunk]
+        assert len(set(ids)) == 3
+
+
+class TestFieldProjection:
+    """Tests for reading a subset of encounter fields."""
+
+    def test_projected_fields_match(self, db):
+        """Test that projected reads carry the requested fields unchanged."""
+        fields = frozenset({"encounter_id", "encounter_date", "encounter_type"})
+        full = asyncio.run(db.list_encounters())
+
+        page = asyncio.run(db.page_encounters(fields=fields))
+        single = asyncio.run(db.get_encounter(full[0].encounter_id, fields=fields))
+
+        assert [e.encounter_id for e in page.items] == [e.encounter_id for e in full]
+        for projected, encounter in zip([single, *page.items], [full[0], *full]):
+            assert projected.model_dump(include=fields) == encounter.model_dump(
+                include=fields
+            )
+
+    def test_sqlite_skips_unrequested_columns(self, tmp_path):
+        """Test that SQLite does not load fields outside the projection."""
+        db = SQLiteDB(str(tmp_path / "test.db"))
+        encounter = make_encounter(clinical_data={"notes": "text"})
+        asyncio.run(db.create_encounter(encounter))
+
+        stored = asyncio.run(
+            db.get_encounter(encounter.encounter_id, fields=frozenset({"provider_id"}))
+        )
+        asyncio.run(db.close())
+
+        assert stored.provider_id == "PRV-1"
+        # Unread fields fall back to model defaults
+        assert stored.clinical_data == {}
+
+
+class TestEncounterGeneration:
+    """Tests for encounter_generation."""
+
+    def test_changes_on_write(self, empty_db):
+        """Test that the token changes with each encounter write only."""
+        db = empty_db
+        before = asyncio.run(db.encounter_generation())
+        asyncio.run(db.create_audit_log("enc-1", "user-1"))
+        unchanged = asyncio.run(db.encounter_generation())
+        asyncio.run(db.create_encounters([make_encounter(), make_encounter()]))
+        after = asyncio.run(db.encounter_generation())
+
+        assert unchanged == before
+        assert after != before
+
+
+class TestEncounterChanges:
+    """Tests for the encounter change feed."""
+
+    def test_resumes_after_sequence(self, empty_db):
+        """Test that changes come in insert order and resume by sequence."""
+        db = empty_db
+        encounters = [make_encounter(patient_id=f"PAT-{i}") for i in range(3)]
+        for encounter in encounters:
+            asyncio.run(db.create_encounter(encounter))
+
+        first = asyncio.run(db.encounter_changes(0, limit=2))
+        rest = asyncio.run(db.encounter_changes(first.last_sequence))
+        empty = asyncio.run(db.encounter_changes(rest.last_sequence))
+
+        ids = [e.encounter_id for e in first.items + rest.items]
+        assert ids == [e.encounter_id for e in encounters]
+        assert rest.last_sequence == asyncio.run(db.latest_sequence()) == 3
+        assert empty.items == []
+        assert empty.last_sequence == 3
+
+    def test_long_poll_wakes_on_insert(self, empty_db):
+        """Test that a waiting request returns once an encounter arrives."""
+        db = empty_db
+        encounter = make_encounter()
+
+        async def poll_then_insert():
+            poll = asyncio.create_task(db.encounter_changes(0, wait=5))
+            await asyncio.sleep(0.05)
+            await db.create_encounter(encounter)
+            return await asyncio.wait_for(poll, 2)
+
+        changes = asyncio.run(poll_then_insert())
+
+        assert [e.encounter_id for e in changes.items] == [encounter.encounter_id]
+
+    def test_long_poll_times_out(self, empty_db):
+        """Test that a wait with no inserts returns an empty batch."""
+        changes = asyncio.run(empty_db.encounter_changes(0, wait=0.05))
+
+        assert changes.items == []
+        assert changes.last_sequence == 0
+
+
+class TestClinicalData:
+    """Tests for packed clinical_data storage."""
+
+    def test_round_trip(self, empty_db):
+        """Test that stored clinical_data reads and serializes unchanged."""
+        clinical_data = {"notes": "n" * 2000, "scores": {"phq9": [1, 2, 3]}}
+        encounter = make_encounter(clinical_data=clinical_data)
+        asyncio.run(empty_db.create_encounter(encounter))
+
+        stored = asyncio.run(empty_db.get_encounter(encounter.encounter_id))
+
+        assert isinstance(stored.clinical_data, PackedJson)
+        assert stored == encounter
+        assert stored.model_dump_json() == encounter.model_dump_json()
+
+
+class TestInMemoryShards:
+    """Tests for InMemoryDB encounter sharding."""
+
+    @pytest.mark.parametrize("shards", [1, 4, 16])
+    def test_merged_order_independent_of_shards(self, shards):
+        """Test that lists merge shards into one (date, id) ordering."""
+        db = InMemoryDB(shards=shards)
+
+        async def create_all():
+            await asyncio.gather(
+                *(
+                    db.create_encounter(
+                        make_encounter(
+                            encounter_date=datetime(
+                                2024, 1, 1 + day % 28, tzinfo=timezone.utc
+                            )
+                        )
+                    )
+                    for day in range(40)
+                )
+            )
+
+        asyncio.run(create_all())
+        results = asyncio.run(db.list_encounters())
+        keys = [(e.encounter_date, e.encounter_id) for e in results]
+
+        assert len(results) == 40
+        assert keys == sorted(keys)
+
+
+class TestRecordCounts:
+    """Tests for record_counts."""
+
+    def test_counts(self, db):
+        """Test that counts match the stored encounters and audit logs."""
+        asyncio.run(db.create_audit_logs(["enc-1", "enc-2"], "user-1"))
+
+        assert asyncio.run(db.record_counts()) == {"encounters": 3, "audit_logs": 2}
+
+
+class TestCreateAuditLogs:
+    """Tests for create_audit_logs."""
+
+    def test_records_each_access(self, empty_db):
+        """Test that a batch writes one entry per encounter with one timestamp."""
+        db = empty_db
+
+        asyncio.run(db.create_audit_logs(["enc-1", "enc-2"], "user-1"))
+        logs = asyncio.run(db.list_audit_logs())
+
+        assert [log.encounter_id for log in logs] == ["enc-1", "enc-2"]
+        assert len({log.audit_id for log in logs}) == 2
+        assert len({log.timestamp for log in logs}) == 1
+
+
+class TestCountAuditLogs:
+    """Tests for count_audit_logs."""
+
+    def test_counts_match_log(self, empty_db):
+        """Test that grouped counts agree with the raw audit log."""
+        db = empty_db
+        asyncio.run(db.create_audit_logs(["enc-1", "enc-2"], "user-1"))
+        asyncio.run(db.create_audit_log("enc-1", "user-2"))
+
+        by_user = asyncio.run(db.count_audit_logs(group_by="user", bucket="hour"))
+        by_encounter = asyncio.run(
+            db.count_audit_logs(AuditLogFilter(encounter_id="enc-1"))
+        )
+
+        assert {(c.user_id, c.count) for c in by_user} == {
+            ("user-1", 2),
+            ("user-2", 1),
+        }
+        assert [c.count for c in by_encounter] == [2]
+        assert by_encounter[0].encounter_id == "enc-1"
+
+    def test_rejects_cross_filter(self, empty_db):
+        """Test that counts per (user, encounter) pair are refused."""
+        filter = AuditLogFilter(user_id="user-1", encounter_id="enc-1")
+
+        with pytest.raises(ValueError):
+            asyncio.run(empty_db.count_audit_logs(filter))
+
+
+class TestSQLiteDB:
+    """Tests specific to the SQLite backend."""
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that a second backend on the same file sees stored records."""
+        path = str(tmp_path / "shared.db")
+        encounter = make_encounter(clinical_data={"notes": "text"})
+
+        writer = SQLiteDB(path)
+        asyncio.run(writer.create_encounter(encounter))
+        asyncio.run(writer.close())
+
+        reader = SQLiteDB(path)
+        stored = asyncio.run(reader.get_encounter(encounter.encounter_id))
+        asyncio.run(reader.close())
+
+        assert stored == encounter
+
+    def test_numbers_existing_encounters(self, tmp_path):
+        """Test that a file created before the change feed gets sequences."""
+        path = str(tmp_path / "old.db")
+        db = SQLiteDB(path)
+        asyncio.run(db.create_encounters([make_encounter(), make_encounter()]))
+        asyncio.run(db.close())
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            "DROP TRIGGER encounters_sequence; DROP INDEX encounters_by_seq;"
+            "ALTER TABLE encounters DROP COLUMN seq;"
+        )
+        conn.close()
+
+        reopened = SQLiteDB(path)
+        asyncio.run(reopened.create_encounter(make_encounter()))
+        changes = asyncio.run(reopened.encounter_changes(0))
+        asyncio.run(reopened.close())
+
+        assert len(changes.items) == 3
+        assert changes.last_sequence == 3
+
+    def test_backfills_audit_counts(self, tmp_path):
+        """Test that a file created before audit counts gets them backfilled."""
+        path = str(tmp_path / "old.db")
+        db = SQLiteDB(path)
+        asyncio.run(db.create_audit_logs(["enc-1", "enc-2"], "user-1"))
+        asyncio.run(db.close())
+        conn = sqlite3.connect(path)
+        conn.executescript("DROP TRIGGER audit_logs_count; DROP TABLE audit_counts;")
+        conn.close()
+
+        reopened = SQLiteDB(path)
+        counts = asyncio.run(reopened.count_audit_logs(group_by="encounter"))
+        asyncio.run(reopened.close())
+
+        assert {(c.encounter_id, c.count) for c in counts} == {
+            ("enc-1", 1),
+            ("enc-2", 1),
+        }
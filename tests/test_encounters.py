@@ -1,5 +1,7 @@
 """Integration tests for /encounters endpoints."""
 
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -164,6 +166,63 @@ class TestCreateEncounter:
         assert response.status_code == 401
 
 
+class TestCreateEncountersBatch:
+    """Tests for POST /encounters/batch."""
+
+    def test_mixed_batch(self):
+        """Test that valid items are created and invalid ones are reported."""
+        payload = [
+            {
+                "patientId": "PAT-BATCH-1",
+                "providerId": "PRV-BATCH",
+                "encounterDate": "2024-03-01T10:00:00Z",
+                "encounterType": "follow_up",
+            },
+            {
+                "patientId": "PAT-BATCH-2",
+                "providerId": "PRV-BATCH",
+                "encounterDate": "2024-03-02T10:00:00Z",
+                "encounterType": "invalid_type",
+            },
+            "not-an-object",
+        ]
+
+        response = client.post("/encounters/batch", headers=HEADERS, json=payload)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 1
+        assert data["failed"] == 2
+        statuses = [result["status"] for result in data["results"]]
+        assert statuses == ["created", "invalid", "invalid"]
+        assert "encounterType" in data["results"][1]["errors"][0]["loc"]
+        assert "PAT-BATCH-2" not in response.text
+
+        encounter_id = data["results"][0]["encounterId"]
+        get_response = client.get(f"/encounters/{encounter_id}", headers=HEADERS)
+        assert get_response.json()["patientId"] == "PAT-BATCH-1"
+
+    def test_schema_documents_items(self):
+        """Test that the OpenAPI body is an array of EncounterCreate."""
+        body = app.openapi()["paths"]["/encounters/batch"]["post"]["requestBody"]
+
+        schema = body["content"]["application/json"]["schema"]
+        assert schema["items"] == {"$ref": "#/components/schemas/EncounterCreate"}
+        assert schema["maxItems"] == 1000
+
+    def test_too_large(self):
+        """Test that oversized batches are rejected."""
+        response = client.post("/encounters/batch", headers=HEADERS, json=[{}] * 1001)
+
+        assert response.status_code == 422
+
+    def test_requires_auth(self):
+        """Test that endpoint requires authentication."""
+        response = client.post("/encounters/batch", json=[])
+
+        assert response.status_code == 422  # Missing header
+
+
 class TestListEncounters:
     """Tests for GET /encounters."""
 
@@ -268,6 +327,143 @@ class TestListEncounters:
         for patient_id in expected_patient_ids:
             assert patient_id in actual_patient_ids
 
+    def test_pagination(self):
+        """Test that cursors walk the list and only returned pages are audited."""
+        provider_id = "PRV-PAGED"
+        for day in (3, 1, 2):
+            client.post(
+                "/encounters",
+                headers=HEADERS,
+                json={
+                    "patientId": "PAT-PAGED",
+                    "providerId": provider_id,
+                    "encounterDate": f"2024-05-0{day}T09:00:00Z",
+                    "encounterType": "follow_up",
+                },
+            )
+
+        params = {"providerId": provider_id, "limit": 2}
+        first = client.get("/encounters", headers=HEADERS, params=params)
+        cursor = first.headers["X-Next-Cursor"]
+        second = client.get(
+            "/encounters", headers=HEADERS, params={**params, "cursor": cursor}
+        )
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert "X-Next-Cursor" not in second.headers
+        dates = [enc["encounterDate"][:10] for enc in first.json() + second.json()]
+        assert dates == ["2024-05-01", "2024-05-02", "2024-05-03"]
+
+        last_id = second.json()[0]["encounterId"]
+        audit = client.get(
+            "/audit/encounters", headers=HEADERS, params={"encounterId": last_id}
+        )
+        assert len(audit.json()) == 1
+
+    def test_ndjson_stream(self):
+        """Test streaming as NDJSON audits every streamed encounter."""
+        response = client.get(
+            "/encounters",
+            headers={**HEADERS, "Accept": "application/x-ndjson"},
+            params={"patientId": "PAT-BOB"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert records
+        assert all(record["patientId"] == "PAT-BOB" for record in records)
+
+        audit = client.get(
+            "/audit/encounters",
+            headers=HEADERS,
+            params={"encounterId": records[-1]["encounterId"]},
+        )
+        assert len(audit.json()) >= 1
+
+    def test_fields_projection(self):
+        """Test that fields limits each listed encounter to those keys."""
+        response = client.get(
+            "/encounters",
+            headers=HEADERS,
+            params={"fields": "encounterId,encounterDate,encounterType"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()
+        for record in response.json():
+            assert set(record) == {"encounterId", "encounterDate", "encounterType"}
+
+    def test_fields_projection_ndjson(self):
+        """Test that streamed encounters are projected too."""
+        response = client.get(
+            "/encounters",
+            headers={**HEADERS, "Accept": "application/x-ndjson"},
+            params={"fields": "encounterId"},
+        )
+
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert records
+        assert all(set(record) == {"encounterId"} for record in records)
+
+    @pytest.mark.parametrize(
+        "fields",
+        [
+            pytest.param("encounterId,ssn", id="unknown"),
+            pytest.param("encounter_id", id="snake_case"),
+            pytest.param(",", id="empty"),
+        ],
+    )
+    def test_invalid_fields(self, fields):
+        """Test that fields outside the encounter model are rejected."""
+        response = client.get("/encounters", headers=HEADERS, params={"fields": fields})
+
+        assert response.status_code == 400
+
+    def test_conditional_get(self):
+        """Test that a list ETag holds until an encounter is written."""
+        params = {"patientId": "PAT-ETAG-LIST"}
+        payload = {
+            "patientId": "PAT-ETAG-LIST",
+            "providerId": "PRV-456",
+            "encounterDate": "2024-01-15T10:30:00Z",
+            "encounterType": "follow_up",
+        }
+        client.post("/encounters", headers=HEADERS, json=payload)
+        first = client.get("/encounters", headers=HEADERS, params=params)
+        etag = first.headers["ETag"]
+
+        cached = client.get(
+            "/encounters", headers={**HEADERS, "If-None-Match": etag}, params=params
+        )
+        client.post("/encounters", headers=HEADERS, json=payload)
+        changed = client.get(
+            "/encounters", headers={**HEADERS, "If-None-Match": etag}, params=params
+        )
+
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert len(changed.json()) == 2
+        audit = client.get(
+            "/audit/encounters",
+            headers=HEADERS,
+            params={"encounterId": first.json()[0]["encounterId"]},
+        )
+        assert len(audit.json()) == 3
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        response = client.get(
+            "/encounters", headers=HEADERS, params={"cursor": "not-a-cursor"}
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
     def test_requires_auth(self):
         """Test that endpoint requires authentication."""
         response = client.get("/encounters")
@@ -281,6 +477,58 @@ class TestListEncounters:
         assert response.status_code == 401
 
 
+class TestEncounterChanges:
+    """Tests for GET /encounters/changes."""
+
+    def test_incremental_sync(self):
+        """Test that syncing from the last sequence returns only new records."""
+        latest = client.get(
+            "/encounters/changes", headers=HEADERS, params={"limit": 1000}
+        )
+        after = latest.headers["X-Last-Sequence"]
+        payload = {
+            "patientId": "PAT-CHANGES",
+            "providerId": "PRV-456",
+            "encounterDate": "2024-01-15T10:30:00Z",
+            "encounterType": "follow_up",
+        }
+        created = client.post("/encounters", headers=HEADERS, json=payload).json()
+
+        response = client.get(
+            "/encounters/changes", headers=HEADERS, params={"after": after}
+        )
+        empty = client.get(
+            "/encounters/changes",
+            headers=HEADERS,
+            params={"after": response.headers["X-Last-Sequence"], "wait": 0.05},
+        )
+
+        assert response.status_code == 200
+        assert [e["encounterId"] for e in response.json()] == [created["encounterId"]]
+        assert int(response.headers["X-Last-Sequence"]) == int(after) + 1
+        assert empty.json() == []
+        assert empty.headers["X-Last-Sequence"] == response.headers["X-Last-Sequence"]
+        audit = client.get(
+            "/audit/encounters",
+            headers=HEADERS,
+            params={"encounterId": created["encounterId"]},
+        )
+        assert len(audit.json()) == 1
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            pytest.param({"after": -1}, id="negative_after"),
+            pytest.param({"wait": 31}, id="wait_too_long"),
+        ],
+    )
+    def test_validation_error(self, params):
+        """Test that out-of-range parameters are rejected."""
+        response = client.get("/encounters/changes", headers=HEADERS, params=params)
+
+        assert response.status_code == 422
+
+
 class TestGetEncounter:
     """Tests for GET /encounters/{encounter_id}."""
 
@@ -302,6 +550,67 @@ class TestGetEncounter:
         assert data["encounterId"] == encounter_id
         assert data["patientId"] == "PAT-GET-TEST"
 
+    def test_fields_projection(self):
+        """Test that fields omits clinical data and still audits the read."""
+        payload = {
+            "patientId": "PAT-FIELDS",
+            "providerId": "PRV-456",
+            "encounterDate": "2024-01-15T10:30:00Z",
+            "encounterType": "follow_up",
+            "clinicalData": {"notes": "private"},
+        }
+        encounter_id = client.post("/encounters", headers=HEADERS, json=payload).json()[
+            "encounterId"
+        ]
+
+        response = client.get(
+            f"/encounters/{encounter_id}",
+            headers=HEADERS,
+            params={"fields": "encounterDate,providerId"},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "encounterDate": "2024-01-15T10:30:00Z",
+            "providerId": "PRV-456",
+        }
+        audit = client.get(
+            "/audit/encounters", headers=HEADERS, params={"encounterId": encounter_id}
+        )
+        assert len(audit.json()) == 1
+
+    def test_conditional_get(self):
+        """Test that a matching If-None-Match returns an audited 304."""
+        payload = {
+            "patientId": "PAT-ETAG",
+            "providerId": "PRV-456",
+            "encounterDate": "2024-01-15T10:30:00Z",
+            "encounterType": "follow_up",
+        }
+        encounter_id = client.post("/encounters", headers=HEADERS, json=payload).json()[
+            "encounterId"
+        ]
+        url = f"/encounters/{encounter_id}"
+        etag = client.get(url, headers=HEADERS).headers["ETag"]
+
+        cached = client.get(url, headers={**HEADERS, "If-None-Match": etag})
+        projected = client.get(
+            url,
+            headers={**HEADERS, "If-None-Match": etag},
+            params={"fields": "encounterId"},
+        )
+
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+        assert cached.headers["Cache-Control"] == "private, no-cache"
+        assert projected.status_code == 200
+        assert projected.headers["ETag"] != etag
+        audit = client.get(
+            "/audit/encounters", headers=HEADERS, params={"encounterId": encounter_id}
+        )
+        assert len(audit.json()) == 3
+
     def test_not_found(self):
         """Test that non-existent encounter returns 404."""
         response = client.get("/encounters/non-existent-id", headers=HEADERS)
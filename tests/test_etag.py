@@ -0,0 +1,37 @@
+"""Unit tests for ETag helpers."""
+
+import pytest
+
+from app.etag import make_etag, none_match
+
+ETAG = make_etag("enc-1", "2024-01-15T10:30:00+00:00")
+
+
+class TestMakeEtag:
+    """Tests for make_etag."""
+
+    def test_strong_and_stable(self):
+        """Test that tags are quoted, strong and depend only on the parts."""
+        assert ETAG.startswith('"') and ETAG.endswith('"')
+        assert make_etag("enc-1", "2024-01-15T10:30:00+00:00") == ETAG
+        assert make_etag("enc-1", "2024-01-16T10:30:00+00:00") != ETAG
+
+
+class TestNoneMatch:
+    """Tests for none_match."""
+
+    @pytest.mark.parametrize(
+        "header,expected",
+        [
+            pytest.param(None, False, id="absent"),
+            pytest.param(ETAG, True, id="exact"),
+            pytest.param(f'"other", {ETAG}', True, id="list"),
+            pytest.param(f"W/{ETAG}", True, id="weak"),
+            pytest.param("*", True, id="wildcard"),
+            pytest.param('"other"', False, id="different"),
+            pytest.param(ETAG.strip('"'), False, id="unquoted"),
+        ],
+    )
+    def test_match(self, header, expected):
+        """Test If-None-Match parsing and weak comparison."""
+        assert none_match(header, ETAG) is expected
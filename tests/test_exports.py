@@ -0,0 +1,169 @@
+"""Tests for background bulk exports."""
+
+import asyncio
+import csv
+import io
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.app import app
+from app.db import InMemoryDB
+from app.exports import ExportManager, get_export_manager
+from app.models import EncounterFilter, ExportJob
+from tests.conftest import make_encounter
+
+HEADERS = {"X-API-Key": "dev-api-key"}
+
+
+async def run_export(manager: ExportManager, db: InMemoryDB, **job_fields) -> ExportJob:
+    job = await manager.submit(ExportJob(created_by="user-1", **job_fields), db)
+    while job.status in ("pending", "running"):
+        await asyncio.sleep(0.01)
+    await manager.close()
+    return job
+
+
+class TestExportManager:
+    """Tests for ExportManager."""
+
+    @pytest.fixture
+    def db(self) -> InMemoryDB:
+        db = InMemoryDB()
+        encounters = [
+            make_encounter(patient_id=f"PAT-{i % 2}", clinical_data={"n": i})
+            for i in range(1200)
+        ]
+        asyncio.run(db.create_encounters(encounters))
+        return db
+
+    def test_ndjson(self, db, tmp_path):
+        """Test that an NDJSON export holds every match, audited in batches."""
+        manager = ExportManager(tmp_path)
+        filter = EncounterFilter(patient_id="PAT-0")
+
+        job = asyncio.run(run_export(manager, db, format="ndjson", filter=filter))
+
+        records = [
+            json.loads(line)
+            for line in manager.output_path(job).read_text().splitlines()
+        ]
+        assert job.status == "completed"
+        assert job.rows_written == len(records) == 600
+        assert job.bytes_written == manager.output_path(job).stat().st_size
+        assert all(record["patientId"] == "PAT-0" for record in records)
+        logs = asyncio.run(db.list_audit_logs())
+        assert len(logs) == 600
+        assert {log.user_id for log in logs} == {"user-1"}
+        # One timestamp per audited chunk
+        assert len({log.timestamp for log in logs}) == 2
+        assert not list(tmp_path.glob("*.part"))
+
+    def test_csv(self, db, tmp_path):
+        """Test that a CSV export has a header and JSON clinical data."""
+        manager = ExportManager(tmp_path)
+
+        job = asyncio.run(
+            run_export(manager, db, format="csv", filter=EncounterFilter())
+        )
+
+        rows = list(csv.DictReader(io.StringIO(manager.output_path(job).read_text())))
+        assert len(rows) == 1200
+        assert rows[0]["patientId"] in ("PAT-0", "PAT-1")
+        assert "n" in json.loads(rows[0]["clinicalData"])
+
+    def test_empty_csv_has_header(self, db, tmp_path):
+        """Test that an export with no matches still writes a valid file."""
+        manager = ExportManager(tmp_path)
+        filter = EncounterFilter(patient_id="PAT-NONE")
+
+        job = asyncio.run(run_export(manager, db, format="csv", filter=filter))
+
+        assert job.status == "completed"
+        assert manager.output_path(job).read_text().startswith("encounterId,")
+
+    def test_status_visible_to_other_managers(self, db, tmp_path):
+        """Test that status is read from disk by another worker process."""
+        job = asyncio.run(
+            run_export(
+                ExportManager(tmp_path), db, format="ndjson", filter=EncounterFilter()
+            )
+        )
+
+        other = ExportManager(tmp_path)
+
+        assert asyncio.run(other.get(job.job_id)) == job
+        assert asyncio.run(other.get("../secrets")) is None
+
+    def test_finished_jobs_leave_memory(self, db, tmp_path):
+        """Test that finished jobs are evicted and served from disk."""
+        manager = ExportManager(tmp_path)
+
+        job = asyncio.run(
+            run_export(manager, db, format="ndjson", filter=EncounterFilter())
+        )
+
+        assert job.job_id not in manager._jobs
+        assert asyncio.run(manager.get(job.job_id)) == job
+
+
+class TestExportEndpoints:
+    """Tests for /exports endpoints."""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        manager = ExportManager(tmp_path)
+        app.dependency_overrides[get_export_manager] = lambda: manager
+        with TestClient(app) as client:
+            yield client
+            client.portal.call(manager.close)
+        app.dependency_overrides.clear()
+
+    def test_export_and_download(self, client):
+        """Test creating an export, polling it and downloading the file."""
+        encounter = {
+            "patientId": "PAT-EXPORT",
+            "providerId": "PRV-456",
+            "encounterDate": "2024-01-15T10:30:00Z",
+            "encounterType": "follow_up",
+        }
+        client.post("/encounters", headers=HEADERS, json=encounter)
+
+        created = client.post(
+            "/exports",
+            headers=HEADERS,
+            json={"filter": {"patientId": "PAT-EXPORT"}, "format": "ndjson"},
+        )
+        job_id = created.json()["jobId"]
+        deadline = time.monotonic() + 5
+        while (job := client.get(f"/exports/{job_id}", headers=HEADERS).json())[
+            "status"
+        ] != "completed" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        download = client.get(f"/exports/{job_id}/download", headers=HEADERS)
+
+        assert created.status_code == 202
+        assert job["rowsWritten"] == 1
+        assert download.status_code == 200
+        assert download.headers["content-type"] == "application/x-ndjson"
+        assert json.loads(download.text)["patientId"] == "PAT-EXPORT"
+
+    def test_not_found(self, client):
+        """Test that unknown export ids return 404."""
+        response = client.get("/exports/no-such-job", headers=HEADERS)
+
+        assert response.status_code == 404
+
+    def test_invalid_format(self, client):
+        """Test that unsupported formats are rejected."""
+        response = client.post("/exports", headers=HEADERS, json={"format": "xml"})
+
+        assert response.status_code == 422
+
+    def test_requires_auth(self, client):
+        """Test that endpoint requires authentication."""
+        response = client.post("/exports", json={})
+
+        assert response.status_code == 422  # Missing header
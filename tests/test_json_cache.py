@@ -0,0 +1,49 @@
+"""Unit tests for the encounter JSON cache."""
+
+import json
+
+from app.json_cache import JsonCache
+from tests.conftest import make_encounter
+
+
+class TestJsonCache:
+    """Tests for JsonCache."""
+
+    def test_matches_model_serialization(self):
+        """Test that cached bytes are the camelCase JSON with the patient id."""
+        encounter = make_encounter(clinical_data={"notes": "text"})
+        cache = JsonCache(max_bytes=1 << 20)
+
+        data = cache.encounter(encounter)
+
+        assert data == encounter.model_dump_json(by_alias=True).encode()
+        assert json.loads(data)["patientId"] == "PAT-1"
+        assert cache.encounter(encounter) is data
+
+    def test_array(self):
+        """Test that arrays concatenate cached objects into valid JSON."""
+        encounters = [make_encounter(), make_encounter()]
+        cache = JsonCache(max_bytes=1 << 20)
+
+        data = json.loads(cache.array(encounters))
+
+        assert [e["encounterId"] for e in data] == [e.encounter_id for e in encounters]
+        assert json.loads(cache.array([])) == []
+
+    def test_evicts_least_recently_used(self):
+        """Test that the cache stays within max_bytes, evicting oldest first."""
+        encounters = [make_encounter() for _ in range(3)]
+        entry_size = len(encounters[0].model_dump_json(by_alias=True))
+        cache = JsonCache(max_bytes=entry_size * 2)
+
+        cache.encounter(encounters[0])
+        cache.encounter(encounters[1])
+        cache.encounter(encounters[0])
+        cache.encounter(encounters[2])
+
+        assert len(cache) == 2
+        assert cache.size <= cache.max_bytes
+        assert set(cache._entries) == {
+            encounters[0].encounter_id,
+            encounters[2].encounter_id,
+        }
@@ -0,0 +1,59 @@
+"""Tests for the queued JSON logging pipeline."""
+
+import json
+import logging
+import queue
+
+import pytest
+
+from app.logging_pipeline import BoundedQueueHandler, JsonFormatter
+
+
+def make_record(message: str = "hello", **extra) -> logging.LogRecord:
+    record = logging.makeLogRecord({"msg": message, "levelname": "INFO"})
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter:
+    """Tests for JsonFormatter."""
+
+    def test_includes_extra_fields(self):
+        """Test that structured extras are emitted as JSON keys."""
+        line = JsonFormatter().format(make_record(path="/encounters", status=200))
+
+        data = json.loads(line)
+        assert data["message"] == "hello"
+        assert data["path"] == "/encounters"
+        assert data["status"] == 200
+        assert "timestamp" in data
+
+
+class TestBoundedQueueHandler:
+    """Tests for overflow handling."""
+
+    @pytest.mark.parametrize(
+        "policy,expected_queued",
+        [
+            pytest.param("drop", 10, id="drop"),
+            pytest.param("sample", 9, id="sample"),
+        ],
+    )
+    def test_overflow(self, policy, expected_queued):
+        """Test that records beyond capacity are discarded and counted."""
+        handler = BoundedQueueHandler(queue.Queue(maxsize=10), policy, sample_rate=2)
+
+        for i in range(12):
+            handler.emit(make_record(f"record {i}"))
+
+        assert handler.queue.qsize() == expected_queued
+        assert handler.dropped == 12 - expected_queued
+
+    def test_formatting_is_deferred(self):
+        """Test that queued records are not formatted on the caller."""
+        handler = BoundedQueueHandler(queue.Queue(maxsize=4))
+        record = make_record("user %s", args=("dev-user",))
+
+        handler.emit(record)
+
+        assert handler.queue.get_nowait() is record
@@ -0,0 +1,53 @@
+"""Tests for metrics recording and the /metrics endpoint."""
+
+from fastapi.testclient import TestClient
+
+from app.app import app
+from app.metrics import Histogram, _REGISTRY
+
+client = TestClient(app)
+
+HEADERS = {"X-API-Key": "dev-api-key"}
+
+
+class TestHistogram:
+    """Tests for Histogram rendering."""
+
+    def test_cumulative_buckets(self):
+        """Test that buckets are cumulative and bounds are inclusive."""
+        histogram = Histogram("test_seconds", "Test.", ("route",), (0.1, 1.0))
+        _REGISTRY.remove(histogram)
+
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value, ("/x",))
+
+        text = histogram.render()
+        assert 'test_seconds_bucket{route="/x",le="0.1"} 2' in text
+        assert 'test_seconds_bucket{route="/x",le="1.0"} 3' in text
+        assert 'test_seconds_bucket{route="/x",le="+Inf"} 4' in text
+        assert 'test_seconds_count{route="/x"} 4' in text
+
+
+class TestMetricsEndpoint:
+    """Tests for GET /metrics."""
+
+    def test_exposes_request_and_db_metrics(self):
+        """Test that requests are labelled by route template, not raw path."""
+        client.get("/encounters/secret-encounter-id", headers=HEADERS)
+        client.get("/encounters", headers=HEADERS, params={"patientId": "PAT-M"})
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert (
+            'http_requests_total{route="/encounters/{encounter_id}",'
+            'method="GET",status="404"}' in text
+        )
+        assert "http_request_duration_seconds_bucket" in text
+        assert 'db_records{table="encounters"}' in text
+        assert "db_list_encounters_rows_returned_total" in text
+        assert "# TYPE log_records_dropped_total counter" in text
+        assert "secret-encounter-id" not in text
+        assert "PAT-M" not in text
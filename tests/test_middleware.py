@@ -1,7 +1,11 @@
 """Tests for middleware PHI redaction."""
 
+import logging
+
 import pytest
+from fastapi.testclient import TestClient
 
+from app.app import app
 from app.middleware import redact_query_params
 
 
@@ -36,8 +40,63 @@ class TestRedactQueryParams:
                 "",
                 id="empty_string",
             ),
+            pytest.param(
+                "PATIENTID=PAT-123&Patient_Id=PAT-456",
+                "PATIENTID=[REDACTED]&Patient_Id=[REDACTED]",
+                id="case_and_underscore_variants",
+            ),
+            pytest.param(
+                "xpatientId=PAT-123&patientIds=PAT-456",
+                "xpatientId=PAT-123&patientIds=PAT-456",
+                id="partial_key_not_redacted",
+            ),
+            pytest.param(
+                "patient%49d=PAT-123&patient%5Fid=PAT-456",
+                "patientId=[REDACTED]&patient_id=[REDACTED]",
+                id="percent_encoded_key",
+            ),
+            pytest.param(
+                "pat%69entId=PAT-123",
+                "patientId=[REDACTED]",
+                id="encoded_patient_prefix",
+            ),
         ],
     )
     def test_redact(self, input_query, expected):
         """Test that PHI query params are redacted."""
         assert redact_query_params(input_query) == expected
+
+
+class TestRequestLoggingMiddleware:
+    """Tests for request/response logging."""
+
+    def test_logs_redacted_request(self, caplog):
+        """Test that request logs carry the status and no PHI."""
+        client = TestClient(app)
+
+        with caplog.at_level(logging.INFO, logger="app.middleware"):
+            client.get(
+                "/encounters",
+                headers={"X-API-Key": "dev-api-key"},
+                params={"patientId": "PAT-SECRET"},
+            )
+
+        messages = [record.getMessage() for record in caplog.records]
+        assert "Request: GET /encounters?patientId=[REDACTED]" in messages
+        assert any("status=200" in message for message in messages)
+        assert not any("PAT-SECRET" in message for message in messages)
+
+    def test_logs_redacted_encoded_key(self, caplog):
+        """Test that a percent-encoded PHI key is redacted as the router reads it."""
+        client = TestClient(app)
+
+        with caplog.at_level(logging.INFO, logger="app.middleware"):
+            client.get(
+                "/encounters?patient%49d=PAT-SECRET",
+                headers={"X-API-Key": "dev-api-key"},
+            )
+
+        assert not any("PAT-SECRET" in record.getMessage() for record in caplog.records)
+        assert not any(
+            "PAT-SECRET" in getattr(record, "query", "") for record in caplog.records
+        )
@@ -0,0 +1,32 @@
+"""Unit tests for API models."""
+
+from app.models import Encounter, EncounterCreate
+
+
+class TestEncounterFromCreate:
+    """Tests for the trusted Encounter.from_create constructor."""
+
+    def test_matches_validated_construction(self):
+        """Test that the fast path builds the same record as full validation."""
+        data = EncounterCreate.model_validate(
+            {
+                "patientId": "PAT-1",
+                "providerId": "PRV-1",
+                "encounterDate": "2024-01-15T10:30:00Z",
+                "encounterType": "follow_up",
+                "clinicalData": {"notes": "text", "scores": [1, 2]},
+            }
+        )
+
+        fast = Encounter.from_create(data, created_by="user-1")
+        slow = Encounter(
+            **data.model_dump(),
+            created_by="user-1",
+            encounter_id=fast.encounter_id,
+            created_at=fast.created_at,
+            updated_at=fast.updated_at,
+        )
+
+        assert fast == slow
+        assert fast.model_dump_json() == slow.model_dump_json()
+        assert fast.clinical_data is data.clinical_data
@@ -0,0 +1,34 @@
+"""Unit tests for packed JSON payloads."""
+
+import pickle
+
+import pytest
+
+from app.packed_json import COMPRESS_MIN_BYTES, PackedJson
+
+
+class TestPackedJson:
+    """Tests for PackedJson."""
+
+    @pytest.mark.parametrize(
+        "value,compressed",
+        [
+            pytest.param({"notes": "short"}, False, id="small_plain"),
+            pytest.param({"notes": "x" * COMPRESS_MIN_BYTES}, True, id="large_zlib"),
+        ],
+    )
+    def test_round_trip(self, value, compressed):
+        """Test that packed payloads decode to the original mapping."""
+        packed = PackedJson.pack(value)
+
+        assert packed.unpack() == value
+        assert packed == value
+        assert dict(packed) == value
+        assert packed._compressed is compressed
+        assert pickle.loads(pickle.dumps(packed)) == value
+
+    def test_compresses_large_payloads(self):
+        """Test that repetitive notes are stored in far fewer bytes."""
+        value = {"notes": "patient reports improved sleep. " * 1000}
+
+        assert PackedJson.pack(value).size < len(value["notes"]) / 10
@@ -0,0 +1,47 @@
+"""Unit tests for the server entry point."""
+
+import pytest
+
+import server
+from app import config
+from app.config import Settings
+
+
+class TestProductionConfig:
+    """Tests for production_config."""
+
+    @pytest.mark.parametrize(
+        "backend,workers,allowed",
+        [
+            pytest.param("memory", 1, True, id="memory_single_worker"),
+            pytest.param("memory", 4, False, id="memory_multi_worker"),
+            pytest.param("sqlite", 4, True, id="sqlite_multi_worker"),
+        ],
+    )
+    def test_shared_state_required(self, monkeypatch, backend, workers, allowed):
+        """Test that several workers require a backend they can share."""
+        monkeypatch.setattr(config, "_settings", Settings(storage_backend=backend))
+        args = server.parse_args(["--production", "--workers", str(workers)])
+
+        if allowed:
+            options = server.production_config(args)
+            assert options["workers"] == workers
+            assert options["timeout_graceful_shutdown"] == 30
+        else:
+            with pytest.raises(SystemExit):
+                server.production_config(args)
+
+    @pytest.mark.parametrize(
+        "backend,expected",
+        [
+            pytest.param("memory", 1, id="memory"),
+            pytest.param("sqlite", 8, id="sqlite"),
+        ],
+    )
+    def test_default_workers(self, monkeypatch, backend, expected):
+        """Test that the default starts with the shipped memory backend."""
+        monkeypatch.setattr(config, "_settings", Settings(storage_backend=backend))
+        monkeypatch.setattr(server.os, "cpu_count", lambda: 8)
+        args = server.parse_args(["--production"])
+
+        assert server.production_config(args)["workers"] == expected
@@ -0,0 +1,166 @@
+"""Tests for write-ahead logging and snapshot recovery."""
+
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+from app.db import InMemoryDB
+from app.models import Encounter
+from tests.conftest import make_encounter
+
+
+async def write(db: InMemoryDB, patient_id: str) -> Encounter:
+    encounter = await db.create_encounter(make_encounter(patient_id=patient_id))
+    await db.create_audit_logs([encounter.encounter_id], "user-1")
+    return encounter
+
+
+class TestRecovery:
+    """Tests for InMemoryDB recovery from the WAL directory."""
+
+    def test_replays_log_without_snapshot(self, tmp_path):
+        """Test that acknowledged writes survive a crash with no snapshot."""
+        db = InMemoryDB(wal_dir=tmp_path)
+        encounter = asyncio.run(write(db, "PAT-1"))
+        logs = asyncio.run(db.list_audit_logs())
+
+        recovered = InMemoryDB(wal_dir=tmp_path)
+
+        assert asyncio.run(recovered.get_encounter(encounter.encounter_id)) == encounter
+        assert asyncio.run(recovered.list_audit_logs()) == logs
+        assert recovered.recovery_stats["replayed_records"] == 2
+        assert db.wal.fsyncs >= 1
+
+    def test_snapshot_plus_log_tail(self, tmp_path):
+        """Test recovery from a snapshot followed by later log records."""
+        db = InMemoryDB(wal_dir=tmp_path)
+        asyncio.run(write(db, "PAT-1"))
+        asyncio.run(db.snapshot())
+        asyncio.run(write(db, "PAT-2"))
+
+        recovered = InMemoryDB(wal_dir=tmp_path)
+
+        assert len(asyncio.run(recovered.list_encounters())) == 2
+        assert len(asyncio.run(recovered.list_audit_logs())) == 2
+        assert recovered.recovery_stats["replayed_records"] == 2
+        assert len(list(tmp_path.glob("wal-*.log"))) == 1
+
+    def test_change_sequences_stable(self, tmp_path):
+        """Test that recovery reassigns the same change feed sequences."""
+        db = InMemoryDB(wal_dir=tmp_path, shards=4)
+        for i in range(5):
+            asyncio.run(write(db, f"PAT-{i}"))
+            if i == 2:
+                asyncio.run(db.snapshot())
+        before = asyncio.run(db.encounter_changes(0))
+
+        recovered = InMemoryDB(wal_dir=tmp_path, shards=4)
+        after = asyncio.run(recovered.encounter_changes(0))
+
+        assert after == before
+
+    def test_empty_audit_batch_not_logged(self, tmp_path):
+        """Test that an audit batch with no ids writes nothing durable."""
+        db = InMemoryDB(wal_dir=tmp_path)
+
+        asyncio.run(db.create_audit_logs([], "user-1"))
+
+        assert db.wal.records_written == 0
+        assert db.wal.fsyncs == 0
+
+    def test_change_feed_waits_for_fsync(self, tmp_path, monkeypatch):
+        """Test that the change feed only shows encounters once durable."""
+        db = InMemoryDB(wal_dir=tmp_path)
+        fsync_done = threading.Event()
+        write = db.wal._write
+        monkeypatch.setattr(
+            db.wal, "_write", lambda batch: fsync_done.wait(5) and write(batch)
+        )
+
+        async def create_during_poll():
+            poll = asyncio.create_task(db.encounter_changes(0, wait=5))
+            create = asyncio.create_task(db.create_encounter(make_encounter()))
+            await asyncio.sleep(0.05)
+            pending = (
+                await db.latest_sequence(),
+                (await db.encounter_changes(0)).items,
+                poll.done(),
+            )
+            fsync_done.set()
+            await create
+            return pending, await poll
+
+        pending, changes = asyncio.run(create_during_poll())
+
+        assert pending == (0, [], False)
+        assert changes.last_sequence == 1
+
+    def test_close_snapshots(self, tmp_path):
+        """Test that a clean shutdown leaves nothing to replay."""
+        db = InMemoryDB(wal_dir=tmp_path)
+        asyncio.run(write(db, "PAT-1"))
+        asyncio.run(db.close())
+
+        recovered = InMemoryDB(wal_dir=tmp_path)
+
+        assert recovered.recovery_stats["replayed_records"] == 0
+        assert recovered.recovery_stats["encounters"] == 1
+
+    def test_torn_tail_is_ignored(self, tmp_path):
+        """Test that a partially written final record is discarded."""
+        db = InMemoryDB(wal_dir=tmp_path)
+        asyncio.run(write(db, "PAT-1"))
+        (log,) = tmp_path.glob("wal-*.log")
+        with open(log, "ab") as f:
+            f.write(b"\x40\x00\x00\x00partial")
+
+        recovered = InMemoryDB(wal_dir=tmp_path)
+
+        assert recovered.recovery_stats["encounters"] == 1
+        assert recovered.recovery_stats["replayed_records"] == 2
+
+    def test_concurrent_writes_share_fsyncs(self, tmp_path):
+        """Test that concurrent writers are group-committed."""
+        db = InMemoryDB(wal_dir=tmp_path)
+
+        async def write_many():
+            await asyncio.gather(*(write(db, f"PAT-{i}") for i in range(50)))
+
+        asyncio.run(write_many())
+
+        assert db.wal.records_written == 100
+        assert db.wal.fsyncs < 100
+
+    def test_sealed_audit_segments_not_replayed_twice(self, tmp_path, monkeypatch):
+        """Test recovery when audit segments were sealed after the snapshot."""
+        clock = iter(datetime(2024, 1, day, tzinfo=timezone.utc) for day in range(1, 9))
+
+        class _Clock(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return next(clock)
+
+        monkeypatch.setattr("app.db.datetime", _Clock)
+        wal_dir, audit_dir = tmp_path / "wal", tmp_path / "audit"
+        db = InMemoryDB(wal_dir=wal_dir, audit_dir=audit_dir)
+
+        async def write_days():
+            await write(db, "PAT-1")
+            await db.snapshot()
+            for i in range(2, 5):
+                await write(db, f"PAT-{i}")
+            await db._audit_logs.write_sealed()
+
+        asyncio.run(write_days())
+        logs = asyncio.run(db.list_audit_logs())
+        counts = asyncio.run(db.count_audit_logs(group_by="encounter"))
+
+        recovered = InMemoryDB(wal_dir=wal_dir, audit_dir=audit_dir)
+
+        assert len(list(audit_dir.glob("audit-*.seg"))) == 3
+        assert asyncio.run(recovered.list_audit_logs()) == logs
+        assert len(logs) == 4
+        assert asyncio.run(recovered.count_audit_logs(group_by="encounter")) == counts
+        assert [count.encounter_id for count in counts] == [
+            log.encounter_id for log in logs
+        ]